@@ -7,180 +7,507 @@ Actor エージェント用のプロジェクト管理ユーティリティ
 """
 
 import os
+import re
 import json
+import pickle
+import hashlib
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 
-def get_project_claude_config(project_id: str) -> Optional[Dict[str, Any]]:
+try:
+    from .task_history import (HISTORY_SECTION, TaskHistoryIndex, append_entry, journal_path,
+                               merge_journal, schedule_merge)
+except ImportError:
+    from task_history import (HISTORY_SECTION, TaskHistoryIndex, append_entry, journal_path,
+                              merge_journal, schedule_merge)
+
+ORCHESTRA_DIR = Path(__file__).parent.parent.parent
+
+# 解析結果のキャッシュ（CLAUDE.md と同じディレクトリの .CLAUDE.md.json）の形式。解析方法を変えたら上げる
+CONFIG_CACHE_VERSION = 1
+
+# 見出しのキーワード → 設定のキー（小文字にした見出しとの部分一致、上から順に判定）
+SECTION_KEYWORDS = (
+    ('testing', ('テスト', 'test')),
+    ('deployment', ('デプロイ', 'deploy', 'リリース', 'release')),
+    ('dependencies', ('依存', 'dependenc', 'requirement', 'ライブラリ')),
+    ('structure', ('構造', '構成', 'structure', 'layout')),
+    ('commands', ('コマンド', 'command', 'script', 'スクリプト')),
+)
+
+# コマンドとみなす行の先頭
+COMMAND_TOOLS = {
+    'npm', 'npx', 'yarn', 'pnpm', 'node', 'make', 'python', 'python3', 'pip', 'pip3', 'pytest',
+    'poetry', 'uv', 'docker', 'docker-compose', 'go', 'cargo', 'bundle', 'rails', 'rake', 'git', 'bash', 'sh'
+}
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+LIST_ITEM_PATTERN = re.compile(r'^(?:[-*+]|\d+[.)])\s+(.*)$')
+INLINE_CODE_PATTERN = re.compile(r'`([^`]+)`')
+TREE_PREFIX_PATTERN = re.compile(r'^[\s│├└─|`+\\-]*')
+
+_cache_lock = threading.Lock()
+# projects.json のパス → (署名, {プロジェクトID: プロジェクト})
+_projects_cache: Dict[str, Any] = {}
+# CLAUDE.md のパス → (署名, 内容, 内容のハッシュ, pickle した解析結果)
+_config_cache: Dict[str, Any] = {}
+# タスク履歴ジャーナルのパス → TaskHistoryIndex
+_history_indexes: Dict[str, TaskHistoryIndex] = {}
+
+def _file_signature(path) -> Optional[List[int]]:
+    """変更検出用の [inode, mtime_ns, size]（存在しなければ None）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+def _load_projects(base_dir: Path) -> Optional[Dict[str, Dict[str, Any]]]:
+    """projects.json をプロジェクトIDで引ける形で読み込む（変更がなければ読み直さない）"""
+    projects_file = base_dir / "data" / "projects.json"
+    signature = _file_signature(projects_file)
+    if signature is None:
+        logging.warning(f"Projects file not found: {projects_file}")
+        return None
+
+    key = str(projects_file)
+    with _cache_lock:
+        cached = _projects_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(projects_file, 'r', encoding='utf-8') as f:
+        projects = {p.get('id'): p for p in json.load(f) if isinstance(p, dict)}
+    with _cache_lock:
+        _projects_cache[key] = (signature, projects)
+    return projects
+
+def _resolve_project(project_id: str, base_dir: Optional[str] = None):
+    """(プロジェクト, プロジェクトディレクトリ) を返す（見つからなければ None）"""
+    base_dir = Path(base_dir) if base_dir else ORCHESTRA_DIR
+    projects = _load_projects(base_dir)
+    if projects is None:
+        return None
+
+    project = projects.get(project_id)
+    if not project:
+        logging.warning(f"Project not found: {project_id}")
+        return None
+
+    project_name = project.get('repository') or project.get('name')
+    return project, base_dir / "projects" / project_name
+
+def config_cache_path(claude_file) -> Path:
+    """解析結果のキャッシュファイルのパス"""
+    claude_file = Path(claude_file)
+    return claude_file.with_name(f".{claude_file.name}.json")
+
+def _load_cached_config(claude_file: Path, content_hash: str) -> Optional[Dict[str, Any]]:
+    """内容のハッシュが一致するときだけキャッシュファイルの解析結果を返す"""
+    try:
+        with open(config_cache_path(claude_file), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (isinstance(cached, dict) and cached.get('version') == CONFIG_CACHE_VERSION
+            and cached.get('content_hash') == content_hash):
+        return cached.get('config')
+    return None
+
+def _save_cached_config(claude_file: Path, signature, content_hash: str, config: Dict[str, Any]):
+    """解析結果をキャッシュファイルに書き出す（一時ファイルから置き換えるので読み手は常に完全な内容を読む）"""
+    cache_file = config_cache_path(claude_file)
+    temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CONFIG_CACHE_VERSION,
+                'signature': signature,
+                'content_hash': content_hash,
+                'config': config
+            }, f, ensure_ascii=False)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logging.warning(f"Could not write CLAUDE.md config cache: {e}")
+        try:
+            os.unlink(temp_file)
+        except OSError:
+            pass
+
+def load_claude_file(claude_file) -> Optional[Dict[str, Any]]:
+    """
+    CLAUDE.md の内容と解析結果を取得します。
+
+    ファイルの署名（inode・mtime・サイズ）が前回と同じならメモリ上の結果を返し、
+    変わっていれば読み直して、内容のハッシュが同じなら保存済みの解析結果を使います。
+
+    Args:
+        claude_file: CLAUDE.md のパス
+
+    Returns:
+        {'claude_content', 'content_hash', 'config'}、またはファイルがなければ None
+    """
+    claude_file = Path(claude_file)
+    key = str(claude_file)
+    signature = _file_signature(claude_file)
+    if signature is None:
+        return None
+
+    with _cache_lock:
+        cached = _config_cache.get(key)
+    if cached and cached[0] == signature:
+        return _config_entry(*cached[1:])
+
+    with open(claude_file, 'rb') as f:
+        data = f.read()
+        stat = os.fstat(f.fileno())
+    content_hash = hashlib.sha256(data).hexdigest()
+    claude_content = data.decode('utf-8')
+
+    config = _load_cached_config(claude_file, content_hash)
+    if config is None:
+        config = parse_claude_config(claude_content)
+        _save_cached_config(claude_file, signature, content_hash, config)
+
+    # 読んでいる間に書き換えられていなければ記録する（書き換えられていれば次回読み直す）
+    if [stat.st_ino, stat.st_mtime_ns, stat.st_size] == signature:
+        with _cache_lock:
+            _config_cache[key] = (signature, claude_content, content_hash,
+                                  pickle.dumps(config, pickle.HIGHEST_PROTOCOL))
+    return {'claude_content': claude_content, 'content_hash': content_hash, 'config': config}
+
+def _config_entry(claude_content: str, content_hash: str, config_blob: bytes) -> Dict[str, Any]:
+    # 呼び出し側がキャッシュを書き換えないよう、解析結果は毎回復元した複製を渡す（deepcopy より速い）
+    return {'claude_content': claude_content, 'content_hash': content_hash, 'config': pickle.loads(config_blob)}
+
+def get_project_claude_config(project_id: str, base_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     指定されたプロジェクトの CLAUDE.md ファイルを読み込み、
     そのプロジェクトの設定情報を取得します。
+
+    projects.json と CLAUDE.md は変更があったときだけ読み直します。
     
     Args:
         project_id: プロジェクトID
+        base_dir: Orchestra のディレクトリ（省略時はこのリポジトリ）
         
     Returns:
         プロジェクト設定情報の辞書、または None（見つからない場合）
     """
     try:
-        # プロジェクト情報を取得
-        projects_file = Path(__file__).parent.parent.parent / "data" / "projects.json"
-        
-        if not projects_file.exists():
-            logging.warning(f"Projects file not found: {projects_file}")
+        resolved = _resolve_project(project_id, base_dir)
+        if not resolved:
             return None
-            
-        with open(projects_file, 'r', encoding='utf-8') as f:
-            projects = json.load(f)
-            
-        # 指定されたプロジェクトを検索
-        project = None
-        for p in projects:
-            if p.get('id') == project_id:
-                project = p
-                break
-                
-        if not project:
-            logging.warning(f"Project not found: {project_id}")
-            return None
-            
-        # プロジェクトディレクトリのパスを構築
-        project_name = project.get('repository') or project.get('name')
-        project_dir = Path(__file__).parent.parent.parent / "projects" / project_name
+        project, project_dir = resolved
         claude_file = project_dir / "CLAUDE.md"
         
-        if not claude_file.exists():
+        entry = load_claude_file(claude_file)
+        if entry is None:
             logging.warning(f"CLAUDE.md not found: {claude_file}")
             return None
             
-        # CLAUDE.md ファイルを読み込み
-        with open(claude_file, 'r', encoding='utf-8') as f:
-            claude_content = f.read()
-            
         return {
-            'project': project,
+            'project': dict(project),
             'project_dir': str(project_dir),
             'claude_file': str(claude_file),
-            'claude_content': claude_content,
-            'config': parse_claude_config(claude_content)
+            'claude_content': entry['claude_content'],
+            'content_hash': entry['content_hash'],
+            'config': entry['config']
         }
         
     except Exception as e:
         logging.error(f"Error loading project config: {e}")
         return None
 
+def _classify_section(title: str) -> Optional[str]:
+    lowered = title.lower()
+    for key, keywords in SECTION_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return key
+    return None
+
+def _strip_markdown(text: str) -> str:
+    return text.replace('**', '').replace('`', '').strip()
+
+def _split_field(text: str):
+    """「**名前**: 値」形式なら (名前, 値)、そうでなければ None"""
+    plain = text.replace('**', '')
+    for separator in (':', '：'):
+        name, found, value = plain.partition(separator)
+        if found and name.strip() and '`' not in name and len(name) <= 40:
+            return name.strip(), value.strip()
+    return None
+
+def _is_command(text: str) -> bool:
+    tokens = text.split()
+    return bool(tokens) and (tokens[0] in COMMAND_TOOLS or tokens[0].startswith('./'))
+
+def command_name(command: str) -> str:
+    """
+    コマンドの名前（npm run build → build、npm test → test、make lint → lint）
+
+    Args:
+        command: コマンドライン
+
+    Returns:
+        config['commands'] のキー
+    """
+    tokens = command.split()
+    tool = tokens[0]
+    if tool in ('npm', 'yarn', 'pnpm') and len(tokens) > 1:
+        return tokens[2] if tokens[1] == 'run' and len(tokens) > 2 else tokens[1]
+    if tool == 'make' and len(tokens) > 1:
+        return tokens[1]
+    if len(tokens) > 1 and not tokens[1].startswith('-'):
+        return f"{tool} {tokens[1]}"
+    return tool
+
+def _add_command(config: Dict[str, Any], category: str, command: str):
+    """コマンドを config['commands'] に（テスト・デプロイのものはそれぞれの commands にも）追加"""
+    if category in ('testing', 'deployment'):
+        config[category]['commands'].append(command)
+        # コマンドのセクションにあるものを優先する
+        if _is_command(command):
+            config['commands'].setdefault(command_name(command), command)
+    else:
+        config['commands'][command_name(command)] = command
+
+def _parse_code_line(config: Dict[str, Any], category: str, line: str):
+    if category == 'structure':
+        # ツリー表示（├── src/  # 説明）
+        entry = TREE_PREFIX_PATTERN.sub('', line)
+        path, _, description = entry.partition('#')
+        if path.strip():
+            config['structure'][path.strip()] = description.strip()
+        return
+    if line.startswith('#'):
+        return
+    if line.startswith('$ '):
+        line = line[2:].strip()
+    if category == 'dependencies':
+        config['dependencies'].append(line)
+    elif _is_command(line) or category != 'commands':
+        _add_command(config, category, line)
+
+def _parse_list_item(config: Dict[str, Any], category: str, text: str):
+    commands = [code.strip() for code in INLINE_CODE_PATTERN.findall(text) if _is_command(code.strip())]
+    field = _split_field(text)
+
+    if category == 'dependencies':
+        config['dependencies'].append(_strip_markdown(text))
+    elif category == 'structure':
+        codes = INLINE_CODE_PATTERN.findall(text)
+        if codes:
+            path = codes[0].strip()
+            _, _, description = text.partition(f'`{codes[0]}`')
+            description = description.strip().lstrip(':：-– ').strip()
+        elif field:
+            path, description = field
+        else:
+            path, description = _strip_markdown(text), ''
+        config['structure'][path] = _strip_markdown(description)
+    elif commands:
+        for command in commands:
+            _add_command(config, category, command)
+    elif category == 'commands':
+        plain = _strip_markdown(text)
+        command = field[0] if field and _is_command(field[0]) else plain
+        if _is_command(command):
+            _add_command(config, category, command)
+    elif field:
+        config[category]['settings'][field[0]] = _strip_markdown(field[1])
+    else:
+        config[category]['notes'].append(_strip_markdown(text))
+
 def parse_claude_config(content: str) -> Dict[str, Any]:
     """
     CLAUDE.md の内容を解析して設定情報を抽出します。
+
+    見出しのキーワードでセクションを判別し、1回の走査でコードブロック・箇条書き・本文を振り分けます。
     
     Args:
         content: CLAUDE.md の内容
         
     Returns:
         設定情報の辞書
+        （commands: 名前 → コマンド、dependencies: 一覧、
+          testing / deployment: commands・settings・notes、structure: パス → 説明）
     """
     config = {
         'commands': {},
         'dependencies': [],
-        'testing': {},
-        'deployment': {},
+        'testing': {'commands': [], 'settings': {}, 'notes': []},
+        'deployment': {'commands': [], 'settings': {}, 'notes': []},
         'structure': {}
     }
     
-    lines = content.split('\n')
-    current_section = None
+    section = None
+    subsection = None
+    in_history = False
+    fence = None
     
-    for line in lines:
-        line = line.strip()
+    for raw_line in content.split('\n'):
+        line = raw_line.strip()
+        
+        # コードブロックの開始・終了（中の # は見出しではない）
+        if line.startswith('```') or line.startswith('~~~'):
+            if fence is None:
+                fence = line[:3]
+            elif line.startswith(fence):
+                fence = None
+            continue
         
-        # セクションヘッダーを検出
-        if line.startswith('##'):
-            current_section = line.replace('#', '').strip().lower()
-        elif line.startswith('```bash') or line.startswith('```'):
-            # コードブロック内のコマンドを抽出
+        category = subsection or section
+        if fence is not None:
+            if category and line:
+                _parse_code_line(config, category, line)
             continue
-        elif current_section and line:
-            # 各セクションの内容を解析
-            if 'コマンド' in current_section and line.startswith('npm '):
-                parts = line.split(' ', 2)
-                if len(parts) >= 2:
-                    config['commands'][parts[1]] = line
+        
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            level, title = len(heading.group(1)), heading.group(2)
+            if level == 1:
+                section, subsection, in_history = None, None, False
+            elif level == 2:
+                section, subsection = _classify_section(title), None
+                # タスク履歴の ### はタスクの記録なので設定としては読まない
+                in_history = title.strip() == HISTORY_SECTION
+            elif not in_history:
+                subsection = _classify_section(title)
+            continue
+        
+        if not category or not line:
+            continue
+        item = LIST_ITEM_PATTERN.match(line)
+        if item:
+            _parse_list_item(config, category, item.group(1).strip())
+        elif category == 'commands':
+            if _is_command(line):
+                _add_command(config, category, line)
+        elif category in ('testing', 'deployment'):
+            config[category]['notes'].append(_strip_markdown(line))
                     
     return config
 
-def get_project_working_directory(project_id: str) -> Optional[str]:
+def get_project_working_directory(project_id: str, base_dir: Optional[str] = None) -> Optional[str]:
     """
-    指定されたプロジェクトの作業ディレクトリを取得します。
+    指定されたプロジェクトの作業ディレクトリを取得します（CLAUDE.md は読みません）。
     
     Args:
         project_id: プロジェクトID
+        base_dir: Orchestra のディレクトリ（省略時はこのリポジトリ）
         
     Returns:
         プロジェクトの作業ディレクトリパス、または None
     """
-    project_config = get_project_claude_config(project_id)
-    if project_config:
-        return project_config['project_dir']
-    return None
+    try:
+        resolved = _resolve_project(project_id, base_dir)
+    except Exception as e:
+        logging.error(f"Error loading project config: {e}")
+        return None
+    if not resolved:
+        return None
+    project_dir = resolved[1]
+    if not (project_dir / "CLAUDE.md").exists():
+        logging.warning(f"CLAUDE.md not found: {project_dir / 'CLAUDE.md'}")
+        return None
+    return str(project_dir)
+
+def _project_claude_file(project_id: str, base_dir: Optional[str] = None) -> Optional[Path]:
+    """プロジェクトの CLAUDE.md のパス（プロジェクトかファイルがなければ None。内容は読まない）"""
+    resolved = _resolve_project(project_id, base_dir)
+    if not resolved:
+        return None
+    claude_file = resolved[1] / "CLAUDE.md"
+    if not claude_file.exists():
+        logging.warning(f"CLAUDE.md not found: {claude_file}")
+        return None
+    return claude_file
 
-def update_claude_task_history(project_id: str, task_info: Dict[str, Any]) -> bool:
+def update_claude_task_history(project_id: str, task_info: Dict[str, Any], base_dir: Optional[str] = None) -> bool:
     """
-    プロジェクトの CLAUDE.md にタスク履歴を追加します。
+    プロジェクトのタスク履歴にタスクを追加します。
+
+    履歴はジャーナルに1行追記するだけで、CLAUDE.md への反映はバックグラウンドでまとめて行います
+    （すぐに反映する場合は merge_task_history）。
     
     Args:
         project_id: プロジェクトID
         task_info: タスク情報
+        base_dir: Orchestra のディレクトリ（省略時はこのリポジトリ）
         
     Returns:
         更新が成功したかどうか
     """
     try:
-        project_config = get_project_claude_config(project_id)
-        if not project_config:
+        claude_file = _project_claude_file(project_id, base_dir)
+        if not claude_file:
             return False
             
-        claude_file = project_config['claude_file']
-        content = project_config['claude_content']
+        append_entry(claude_file, task_info)
+        schedule_merge(claude_file)
+        return True
         
-        # タスク履歴セクションを探してタスクを追加
-        task_entry = f"""
-### {task_info.get('title', 'タスク')} - {task_info.get('created_at', '')}
-- **ステータス**: {task_info.get('status', 'unknown')}
-- **担当**: {task_info.get('agent', 'Actor')}
-- **説明**: {task_info.get('description', '')}
+    except Exception as e:
+        logging.error(f"Error updating task history: {e}")
+        return False
 
-"""
+def merge_task_history(project_id: str, base_dir: Optional[str] = None) -> int:
+    """
+    未反映のタスク履歴をすぐに CLAUDE.md に反映します。
+    
+    Args:
+        project_id: プロジェクトID
+        base_dir: Orchestra のディレクトリ（省略時はこのリポジトリ）
         
-        # "## タスク履歴" セクションの後に追加
-        if "## タスク履歴" in content:
-            parts = content.split("## タスク履歴")
-            if len(parts) >= 2:
-                # 既存のタスク履歴セクションに追加
-                history_section = parts[1]
-                next_section_pos = history_section.find("\n## ")
-                
-                if next_section_pos != -1:
-                    # 次のセクションがある場合
-                    new_content = (parts[0] + "## タスク履歴" + 
-                                 history_section[:next_section_pos] + 
-                                 task_entry +
-                                 history_section[next_section_pos:])
-                else:
-                    # タスク履歴が最後のセクションの場合
-                    new_content = parts[0] + "## タスク履歴" + history_section + task_entry
-                    
-                # ファイルに書き込み
-                with open(claude_file, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
-                    
-                return True
-                
-        return False
+    Returns:
+        反映した件数
+    """
+    try:
+        claude_file = _project_claude_file(project_id, base_dir)
+        if not claude_file:
+            return 0
+        merged = 0
+        while True:
+            count = merge_journal(claude_file)
+            merged += count
+            if not count:
+                return merged
+    except Exception as e:
+        logging.error(f"Error merging task history: {e}")
+        return 0
+
+def get_recent_task_history(project_id: str, limit: int = 10, status: Optional[str] = None,
+                            agent: Optional[str] = None, base_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    最近のタスク履歴を新しい順に取得します（CLAUDE.md ではなくジャーナルの索引から）。
+    
+    Args:
+        project_id: プロジェクトID
+        limit: 最大件数
+        status: このステータスのものだけ
+        agent: この担当のものだけ
+        base_dir: Orchestra のディレクトリ（省略時はこのリポジトリ）
         
+    Returns:
+        タスク履歴の一覧（見つからない場合は空）
+    """
+    try:
+        resolved = _resolve_project(project_id, base_dir)
+        if not resolved:
+            return []
+        journal = journal_path(resolved[1] / "CLAUDE.md")
+        key = str(journal)
+        with _cache_lock:
+            index = _history_indexes.get(key)
+            if index is None:
+                index = _history_indexes[key] = TaskHistoryIndex(journal)
+        return index.recent(limit, status=status, agent=agent)
     except Exception as e:
-        logging.error(f"Error updating task history: {e}")
-        return False
+        logging.error(f"Error loading task history: {e}")
+        return []
 
 if __name__ == "__main__":
     # テスト用
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Actor エージェント用のタスク履歴
+
+タスク履歴は CLAUDE.md を直接書き換えず、プロジェクトディレクトリの .task_history.jsonl に
+1件1行で追記します（O_APPEND で1回の write、ロックなし）。
+バックグラウンドの TaskHistoryMerger がまとめて CLAUDE.md の「## タスク履歴」に反映し、
+反映済みの位置は同じ書き換えの中で見出し直後のコメントに記録します（ファイルロック下で一時ファイルから置き換え）。
+最近の履歴の検索は CLAUDE.md を読まず、ジャーナルの末尾から作った索引で行います。
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import atexit
+import fcntl
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+HISTORY_SECTION = 'タスク履歴'
+HISTORY_HEADING = f'## {HISTORY_SECTION}'
+JOURNAL_NAME = '.task_history.jsonl'
+
+# 反映済みの位置（ジャーナルの inode とバイト位置）。Markdown としては表示されない
+MERGE_MARKER_PATTERN = re.compile(r'<!-- task-history-journal: (\d+):(\d+) -->\n?')
+
+def journal_path(claude_file) -> Path:
+    """CLAUDE.md に対応するタスク履歴ジャーナルのパス"""
+    return Path(claude_file).with_name(JOURNAL_NAME)
+
+def _lock_path(claude_file) -> Path:
+    claude_file = Path(claude_file)
+    return claude_file.with_name(f".{claude_file.name}.lock")
+
+@contextmanager
+def locked(claude_file):
+    """CLAUDE.md の書き換えを直列化するファイルロック（プロセス間・スレッド間）"""
+    with open(_lock_path(claude_file), 'a') as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+def append_entry(claude_file, task_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    タスク履歴をジャーナルに1行追記します（ファイルの大きさによらず一定の時間）。
+
+    Args:
+        claude_file: プロジェクトの CLAUDE.md のパス
+        task_info: タスク情報（title・created_at・status・agent・description）
+
+    Returns:
+        追記したエントリ
+    """
+    entry = {
+        'id': uuid.uuid4().hex,
+        'title': task_info.get('title', 'タスク'),
+        'created_at': task_info.get('created_at', ''),
+        'status': task_info.get('status', 'unknown'),
+        'agent': task_info.get('agent', 'Actor'),
+        'description': task_info.get('description', ''),
+        'recorded_at': datetime.now().isoformat()
+    }
+    line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+    # 1行を1回の write で書くので、同時に追記しても行が混ざらない
+    fd = os.open(journal_path(claude_file), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+    return entry
+
+def render_entry(entry: Dict[str, Any]) -> str:
+    """CLAUDE.md に書き込むタスク履歴の1件"""
+    return f"""
+### {entry.get('title', 'タスク')} - {entry.get('created_at', '')}
+- **ステータス**: {entry.get('status', 'unknown')}
+- **担当**: {entry.get('agent', 'Actor')}
+- **説明**: {entry.get('description', '')}
+
+"""
+
+def _read_complete_lines(path: Path, offset: int, max_entries: int):
+    """offset から最大 max_entries 行を読み、(エントリ, 読み終えた位置) を返す（書きかけの行は読まない）"""
+    entries = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b'\n') or len(entries) >= max_entries:
+                break
+            offset += len(raw)
+            try:
+                entries.append(json.loads(raw))
+            except ValueError:
+                logging.warning(f"Skipping broken task history line in {path}")
+    return entries, offset
+
+def merge_journal(claude_file, max_entries: int = 500) -> int:
+    """
+    ジャーナルのうち CLAUDE.md に未反映のエントリを、まとめて「## タスク履歴」の末尾に書き込みます。
+
+    Args:
+        claude_file: プロジェクトの CLAUDE.md のパス
+        max_entries: 1回の書き換えで反映する最大件数
+
+    Returns:
+        反映した件数
+    """
+    claude_file = Path(claude_file)
+    journal = journal_path(claude_file)
+    try:
+        journal_stat = os.stat(journal)
+    except FileNotFoundError:
+        return 0
+
+    with locked(claude_file):
+        with open(claude_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        marker = MERGE_MARKER_PATTERN.search(content)
+        offset = 0
+        if marker and int(marker.group(1)) == journal_stat.st_ino:
+            offset = int(marker.group(2))
+        if offset >= journal_stat.st_size:
+            return 0
+        entries, merged_offset = _read_complete_lines(journal, offset, max_entries)
+        if merged_offset == offset:
+            # 書きかけの行しかない
+            return 0
+        offset = merged_offset
+
+        if marker:
+            content = content[:marker.start()] + content[marker.end():]
+        new_marker = f"<!-- task-history-journal: {journal_stat.st_ino}:{offset} -->\n"
+        rendered = ''.join(render_entry(entry) for entry in entries)
+
+        heading = content.find(HISTORY_HEADING)
+        if heading == -1:
+            # タスク履歴のセクションがなければ末尾に作る
+            separator = '' if content.endswith('\n') or not content else '\n'
+            content = f"{content}{separator}\n{HISTORY_HEADING}\n{new_marker}{rendered}"
+        else:
+            heading_end = content.find('\n', heading)
+            heading_end = len(content) if heading_end == -1 else heading_end + 1
+            # 見出しの直後に次のセクションが続く（履歴が空の）場合も見つけるよう、見出しの改行から探す
+            next_section = content.find('\n## ', heading_end - 1)
+            insert_at = len(content) if next_section == -1 else next_section
+            content = (content[:heading_end] + new_marker + content[heading_end:insert_at]
+                       + rendered + content[insert_at:])
+
+        # 一時ファイルから置き換える（読み手は常に完全な内容を読み、反映位置と内容が食い違わない）
+        temp_file = claude_file.with_name(f".{claude_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.chmod(temp_file, os.stat(claude_file).st_mode & 0o777)
+            os.replace(temp_file, claude_file)
+        except BaseException:
+            try:
+                os.unlink(temp_file)
+            except OSError:
+                pass
+            raise
+    return len(entries)
+
+class TaskHistoryIndex:
+    """ジャーナルの最近のエントリ（新しい順に検索できるよう、全体・ステータス別・担当別に保持）"""
+
+    def __init__(self, journal, max_entries: int = 1000):
+        self.journal = Path(journal)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.inode = None
+        self.offset = 0
+        self._reset()
+
+    def _reset(self):
+        self.entries = deque(maxlen=self.max_entries)
+        self.by_status: Dict[str, deque] = {}
+        self.by_agent: Dict[str, deque] = {}
+
+    def _add(self, entry: Dict[str, Any]):
+        self.entries.append(entry)
+        for index, key in ((self.by_status, entry.get('status')), (self.by_agent, entry.get('agent'))):
+            bucket = index.get(key)
+            if bucket is None:
+                bucket = index[key] = deque(maxlen=self.max_entries)
+            bucket.append(entry)
+
+    def _read_tail_offset(self, size: int) -> int:
+        """末尾から max_entries 行ぶんさかのぼった行の先頭位置（初回は過去のジャーナル全体を読まない）"""
+        position, newlines, block = size, 0, 64 * 1024
+        with open(self.journal, 'rb') as f:
+            while position > 0:
+                start = max(0, position - block)
+                f.seek(start)
+                chunk = f.read(position - start)
+                index = len(chunk)
+                while True:
+                    index = chunk.rfind(b'\n', 0, index)
+                    if index == -1:
+                        break
+                    newlines += 1
+                    if newlines > self.max_entries:
+                        return start + index + 1
+                position = start
+        return 0
+
+    def refresh(self):
+        """前回から追記された行を読み込む（ジャーナルが作り直されていれば読み直す）"""
+        try:
+            stat = os.stat(self.journal)
+        except FileNotFoundError:
+            self.inode, self.offset = None, 0
+            self._reset()
+            return
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self._reset()
+            self.inode = stat.st_ino
+            self.offset = self._read_tail_offset(stat.st_size)
+        if stat.st_size == self.offset:
+            return
+        entries, self.offset = _read_complete_lines(self.journal, self.offset, float('inf'))
+        for entry in entries:
+            self._add(entry)
+
+    def recent(self, limit: int = 10, status: Optional[str] = None,
+               agent: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        最近のタスク履歴を新しい順に返します。
+
+        Args:
+            limit: 最大件数
+            status: このステータスのものだけ
+            agent: この担当のものだけ
+
+        Returns:
+            エントリの一覧
+        """
+        with self.lock:
+            self.refresh()
+            if status is not None:
+                candidates = self.by_status.get(status, ())
+            elif agent is not None:
+                candidates = self.by_agent.get(agent, ())
+            else:
+                candidates = self.entries
+            result = []
+            for entry in reversed(candidates):
+                if agent is not None and entry.get('agent') != agent:
+                    continue
+                result.append(dict(entry))
+                if len(result) >= limit:
+                    break
+            return result
+
+class TaskHistoryMerger:
+    """追記されたジャーナルを interval_seconds ごとにまとめて CLAUDE.md に反映するスレッド"""
+
+    def __init__(self, interval_seconds: float = 2.0, batch_size: int = 500):
+        self.pid = os.getpid()
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pending = set()
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True, name='task-history-merger')
+        self.thread.start()
+
+    def schedule(self, claude_file):
+        """claude_file のジャーナルを次の周回で反映する"""
+        with self.condition:
+            self.pending.add(str(claude_file))
+            self.condition.notify()
+
+    def flush(self):
+        """予約済みのジャーナルをすべて反映する（呼び出したスレッドで実行）"""
+        with self.condition:
+            paths, self.pending = self.pending, set()
+        for path in sorted(paths):
+            try:
+                while merge_journal(path, self.batch_size) >= self.batch_size:
+                    pass
+            except Exception as e:
+                logging.error(f"Error merging task history into {path}: {e}")
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+            # 続けて追記されるエントリを1回の書き換えにまとめる
+            time.sleep(self.interval_seconds)
+            self.flush()
+
+_merger_lock = threading.Lock()
+_merger: Optional[TaskHistoryMerger] = None
+
+def schedule_merge(claude_file):
+    """バックグラウンドの TaskHistoryMerger に反映を予約する（初回に起動し、終了時に残りを反映する）"""
+    global _merger
+    with _merger_lock:
+        # fork した子プロセスには親のスレッドがないので作り直す
+        if _merger is None or _merger.pid != os.getpid():
+            _merger = TaskHistoryMerger()
+            atexit.register(_merger.stop)
+        merger = _merger
+    merger.schedule(claude_file)
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+MessageHub / AgentClient / ブリッジのイベント送信・状態差分・ログ配信・プッシュ配信・状態テーブル・ループ間隔のベンチマーク
+"""
+
+import base64
+import json
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from benchmarks.harness import quiet
+from communication.agent_client import AgentClient
+from communication.event_delivery import EventDelivery
+from communication.ids import new_id
+from communication.lazy_import import lazy_import
+from communication.log_tailer import LogTailer
+from communication.message_hub import MessageHub
+from communication.push_server import OP_TEXT, PushServer
+from communication.status_stream import StatusDiffer
+from communication.status_table import StatusTable
+
+INBOX_SIZES = (10, 1000, 10000, 100000)
+QUICK_INBOX_SIZES = (10, 1000, 10000)
+BROADCAST_AGENTS = 5
+DELIVERY_EVENTS = 2000
+STATUS_FLEET_SIZES = (10, 1000)
+LOG_STREAM_LINES = 50
+PUSH_CLIENTS = (1, 10)
+PUSH_EVENTS = 200
+STATUS_TABLE_AGENTS = 20
+IDLE_PICKUP_ROUNDS = 5
+
+watchdog_observers = lazy_import('watchdog.observers')
+
+
+class HubState:
+    def __init__(self, inbox_size, agents=('sender', 'receiver')):
+        self.dir = Path(tempfile.mkdtemp(prefix='yco-bench-hub-'))
+        with quiet():
+            self.hub = MessageHub(str(self.dir))
+            for agent_id in agents:
+                self.hub.register_agent(agent_id, 'bench')
+        for agent_id in agents[1:]:
+            prefill_inbox(self.hub, agent_id, inbox_size)
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def prefill_inbox(hub, agent_id, size):
+    """send_message と同じ形式の既読メッセージで受信箱を埋める"""
+    timestamp = datetime.now().isoformat()
+    messages = [{
+        'id': new_id(),
+        'timestamp': timestamp,
+        'from': 'sender',
+        'to': agent_id,
+        'type': 'bench',
+        'content': {'n': n},
+        'priority': 'normal',
+        'status': 'read'
+    } for n in range(size)]
+    hub._write_json_file(hub.messages_dir / f"{agent_id}_inbox.json", messages)
+
+
+def register(suite):
+    sizes = QUICK_INBOX_SIZES if suite.quick else INBOX_SIZES
+
+    for size in sizes:
+        repeat = 3 if size >= 10000 else 10
+        params = {'inbox_size': size}
+
+        suite.run(f'message_hub.send_message[inbox={size}]',
+                  lambda state: state.hub.send_message('sender', 'receiver', 'bench', {'n': -1}),
+                  setup=lambda size=size: HubState(size),
+                  teardown=lambda state: state.cleanup(),
+                  repeat=repeat, params=params)
+
+        suite.run(f'message_hub.get_messages[inbox={size}]',
+                  lambda state: state.hub.get_messages('receiver', mark_as_read=True),
+                  setup=lambda size=size: HubState(size),
+                  teardown=lambda state: state.cleanup(),
+                  repeat=repeat, params=params)
+
+        if size <= 10000:
+            agents = ('sender',) + tuple(f'agent-{i}' for i in range(BROADCAST_AGENTS))
+            suite.run(f'message_hub.broadcast_message[agents={BROADCAST_AGENTS},inbox={size}]',
+                      lambda state: state.hub.broadcast_message('sender', 'bench', {'n': -1}),
+                      setup=lambda size=size, agents=agents: HubState(size, agents),
+                      teardown=lambda state: state.cleanup(),
+                      repeat=repeat, params=dict(params, agents=BROADCAST_AGENTS))
+
+    register_request_response(suite)
+    register_idle_pickup(suite)
+    register_event_delivery(suite)
+    register_status_stream(suite)
+    register_log_streaming(suite)
+    register_push_server(suite)
+    register_status_table(suite)
+
+
+def register_request_response(suite, rounds=20, poll_interval=0.01):
+    """AgentClient.request_response の往復レイテンシ（応答側は poll_interval でポーリング）"""
+    name = f'agent_client.request_response[poll={poll_interval}s]'
+    if not suite.selected(name):
+        return
+
+    directory = tempfile.mkdtemp(prefix='yco-bench-client-')
+    try:
+        with quiet():
+            requester = AgentClient('requester', 'bench', directory)
+            responder = AgentClient('responder', 'bench', directory)
+            responder.register_handler('ping', lambda message: {
+                'request_id': message['content']['request_id'],
+                'content': 'pong'
+            })
+            responder.start_polling(poll_interval)
+
+        samples = []
+        try:
+            for _ in range(rounds):
+                with quiet():
+                    start = time.perf_counter()
+                    response = requester.request_response('responder', 'ping', {}, timeout=10)
+                    elapsed = time.perf_counter() - start
+                if response == 'pong':
+                    samples.append(elapsed)
+        finally:
+            responder.stop_polling()
+
+        suite.record(name, samples, params={'rounds': rounds, 'poll_interval': poll_interval},
+                     extra={'timeouts': rounds - len(samples)})
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def register_idle_pickup(suite, rounds=IDLE_PICKUP_ROUNDS, idle_seconds=1.0, max_interval=0.5):
+    """しばらくメッセージがなかったエージェントが、届いたメッセージを処理するまでの時間と待機中の周回数"""
+    name = f'agent_client.idle_pickup[idle={idle_seconds}s]'
+    if not suite.selected(name):
+        return
+
+    base_dir = Path(tempfile.mkdtemp(prefix='yco-bench-cadence-'))
+    (base_dir / 'config').mkdir()
+    (base_dir / 'config' / 'orchestra.json').write_text(json.dumps({'cadence': {'agent_client': {
+        'min_interval_seconds': 0.01, 'max_interval_seconds': max_interval}}}), encoding='utf-8')
+    handled = threading.Event()
+    try:
+        with quiet():
+            sender = AgentClient('sender', 'bench', str(base_dir / 'communication'))
+            receiver = AgentClient('receiver', 'bench', str(base_dir / 'communication'))
+            receiver.register_handler('ping', lambda message: handled.set())
+            receiver.start_polling()
+        mode = 'observer' if receiver.observer is not None else 'timer'
+        iterations = [0]
+        process_once = receiver.process_messages_once
+
+        def counted():
+            iterations[0] += 1
+            return process_once()
+        receiver.process_messages_once = counted
+
+        samples = []
+        idle_iterations = 0
+        try:
+            for _ in range(rounds):
+                # 待ち時間が max_interval まで延びるのを待ってから送る
+                iterations[0] = 0
+                time.sleep(idle_seconds)
+                idle_iterations += iterations[0]
+                handled.clear()
+                with quiet():
+                    start = time.perf_counter()
+                    sender.send_message('receiver', 'ping', {})
+                    if handled.wait(10):
+                        samples.append(time.perf_counter() - start)
+        finally:
+            with quiet():
+                receiver.stop_polling()
+
+        suite.record(name, samples, params={'rounds': rounds, 'idle_seconds': idle_seconds,
+                                            'max_interval': max_interval, 'mode': mode},
+                     extra={'idle_iterations_per_second': idle_iterations / (rounds * idle_seconds)})
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+class DashboardStub:
+    """/api/websocket の代わりに受け取ったイベント数を数える HTTP サーバー（keep-alive 対応）"""
+
+    def __init__(self):
+        self.received = 0
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # ヘッダーと本文を別々に書き込むため、Nagle と遅延ACKで 40ms 待たないようにする
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests += 1
+                stub.received += len(body['events']) if body.get('type') == 'batch' else 1
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/api/websocket'
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def register_event_delivery(suite, events=DELIVERY_EVENTS):
+    """ログイベントを連続して送り、すべてダッシュボードに届くまでの時間（batch と1件ずつを比較）"""
+    for mode in ('batch', 'single'):
+        name = f'bridge.event_delivery[{mode},events={events}]'
+        if not suite.selected(name):
+            continue
+        stub = DashboardStub()
+        try:
+            samples = []
+            for _ in range(3):
+                delivery = EventDelivery(stub.url, max_buffer_events=events, linger_seconds=0,
+                                         max_batch_events=100 if mode == 'batch' else 1).start()
+                start = time.perf_counter()
+                for n in range(events):
+                    delivery.send('log', {'id': n, 'message': f'ログ {n}', 'level': 'info'})
+                delivery.flush(60)
+                samples.append(time.perf_counter() - start)
+                delivery.stop()
+            suite.record(name, samples, params={'events': events, 'mode': mode},
+                         extra={'requests': stub.requests, 'received': stub.received})
+        finally:
+            stub.stop()
+
+
+def fleet(size, tick=0, changed=1):
+    """size 台のエージェントの状態（changed 台だけ tick ごとに currentTask が変わる）"""
+    now = datetime.now().isoformat()
+    return [{
+        'id': f'actor-{n}', 'type': 'actor', 'name': f'Actor {n}', 'status': 'working',
+        'currentTask': f'実行中: {tick if n < changed else 0}件', 'lastSeen': now, 'pid': 10000 + n
+    } for n in range(size)]
+
+
+def register_status_stream(suite, ticks=50):
+    """1ティックあたりの差分の計算時間と送信サイズ（全体を毎回送る場合との比較）"""
+    for size in STATUS_FLEET_SIZES:
+        for changed in (0, 1):
+            name = f'status_stream.diff[agents={size},changed={changed}]'
+            if not suite.selected(name):
+                continue
+            differ = StatusDiffer(keyframe_interval_seconds=3600)
+            differ.diff(fleet(size))
+            samples, delta_bytes = [], 0
+            for tick in range(1, ticks + 1):
+                agents = fleet(size, tick, changed)
+                start = time.perf_counter()
+                update = differ.diff(agents)
+                samples.append(time.perf_counter() - start)
+                delta_bytes += len(json.dumps(update, ensure_ascii=False)) if update else 0
+            full_bytes = len(json.dumps(fleet(size), ensure_ascii=False))
+            suite.record(name, samples, params={'agents': size, 'changed': changed},
+                         extra={'bytes_per_tick': delta_bytes / ticks, 'full_snapshot_bytes': full_bytes})
+
+
+def register_log_streaming(suite, lines=LOG_STREAM_LINES):
+    """ログファイルに1行追記してから LogTailer のコールバックに届くまでの時間"""
+    name = f'bridge.log_streaming[lines={lines}]'
+    if not suite.selected(name):
+        return
+    directory = Path(tempfile.mkdtemp(prefix='yco-bench-logs-'))
+    received = threading.Event()
+    try:
+        observer = watchdog_observers.Observer()
+        mode = 'observer'
+    except ImportError:
+        observer, mode = None, 'polling'
+    tailer = LogTailer(directory, lambda entries: received.set(), poll_interval_seconds=0.01).start(observer)
+    try:
+        samples = []
+        with open(directory / 'task-bench.log', 'a', encoding='utf-8') as f:
+            for n in range(lines):
+                received.clear()
+                start = time.perf_counter()
+                f.write(f"[{datetime.now().isoformat()}] actor: ログ {n}\n")
+                f.flush()
+                if received.wait(5):
+                    samples.append(time.perf_counter() - start)
+        suite.record(name, samples, params={'lines': lines, 'mode': mode},
+                     extra={'delivered': len(samples)})
+    finally:
+        tailer.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class PushClient:
+    """PushServer に接続する最小限の WebSocket クライアント（テキストフレームのみ）"""
+
+    def __init__(self, port, query=''):
+        self.sock = socket.create_connection(('127.0.0.1', port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        self.sock.sendall((f'GET /{query} HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\n'
+                           f'Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n'
+                           'Sec-WebSocket-Version: 13\r\n\r\n').encode('ascii'))
+        self.buffer = b''
+        while b'\r\n\r\n' not in self.buffer:
+            self.buffer += self.sock.recv(4096)
+        response, self.buffer = self.buffer.split(b'\r\n\r\n', 1)
+        if not response.startswith(b'HTTP/1.1 101'):
+            raise ConnectionError(response.decode('latin-1'))
+
+    def _read(self, size):
+        while len(self.buffer) < size:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError('closed')
+            self.buffer += data
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def receive(self):
+        """次のフレーム (opcode, payload)"""
+        first, second = self._read(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack('!H', self._read(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', self._read(8))
+        return first & 0x0F, self._read(length)
+
+    def receive_message(self):
+        opcode, payload = self.receive()
+        return json.loads(payload) if opcode == OP_TEXT else None
+
+    def send(self, message):
+        payload = json.dumps(message).encode('utf-8')
+        mask = os.urandom(4)
+        header = struct.pack('!BB', 0x80 | OP_TEXT, 0x80 | len(payload)) if len(payload) < 126 else \
+            struct.pack('!BBH', 0x80 | OP_TEXT, 0x80 | 126, len(payload))
+        self.sock.sendall(header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+    def close(self):
+        self.sock.close()
+
+
+def register_push_server(suite, events=PUSH_EVENTS):
+    """publish してから接続中のすべてのクライアントが受け取るまでの時間"""
+    for clients in PUSH_CLIENTS:
+        name = f'bridge.push_server[clients={clients}]'
+        if not suite.selected(name):
+            continue
+        with quiet():
+            server = PushServer(port=0).start()
+        connections = [PushClient(server.port) for _ in range(clients)]
+        try:
+            samples = []
+            for n in range(events):
+                start = time.perf_counter()
+                server.publish('log', {'id': n, 'message': f'ログ {n}', 'level': 'info'})
+                for connection in connections:
+                    connection.receive_message()
+                samples.append(time.perf_counter() - start)
+            suite.record(name, samples, params={'clients': clients, 'events': events})
+        finally:
+            for connection in connections:
+                connection.close()
+            with quiet():
+                server.stop()
+
+
+def register_status_table(suite, agents=STATUS_TABLE_AGENTS):
+    """エージェント状態の読み込み（共有テーブルのスナップショットと agent_status.json のミラー）と自分のスロットの更新"""
+    directory = Path(tempfile.mkdtemp(prefix='yco-bench-status-'))
+    try:
+        table = StatusTable(directory / 'agent_status.table')
+        entries = fleet(agents)
+        for entry in entries:
+            table.slot(entry['id']).write(entry)
+        mirror = directory / 'agent_status.json'
+        table.write_mirror(mirror)
+
+        def read_mirror(_):
+            with open(mirror, 'r', encoding='utf-8') as f:
+                json.load(f)
+
+        params = {'agents': agents}
+        suite.run(f'status_table.snapshot[agents={agents}]', lambda _: table.snapshot(), repeat=200, params=params)
+        suite.run(f'status_table.read_mirror[agents={agents}]', read_mirror, repeat=200, params=params)
+        slot = table.slot(entries[0]['id'])
+        suite.run('status_table.write_slot', lambda _: slot.write(entries[0]), repeat=200)
+        suite.run(f'status_table.write_mirror[agents={agents}]', lambda _: table.write_mirror(mirror),
+                  repeat=50, params=params)
+        table.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Actor のプロジェクト設定とタスク履歴（agents/actor/project_utils.py）のベンチマーク
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.harness import REPO_DIR
+
+sys.path.insert(0, str(REPO_DIR / 'agents' / 'actor'))
+import project_utils  # noqa: E402
+
+HISTORY_SIZES = (10, 1000)
+CALLS = 200
+MERGE_BATCH = 100
+
+CLAUDE_TEMPLATE = """# bench
+
+## 開発コマンド
+```bash
+npm install
+npm run dev
+npm run build
+```
+
+## 依存関係
+- **Node.js** 18+
+- `next` 14
+
+## テスト
+- **フレームワーク**: Jest
+- `npm test` で全テスト
+
+## デプロイ
+- **環境**: Vercel
+
+## ディレクトリ構造
+```
+├── src/      # ソースコード
+└── public/   # 静的ファイル
+```
+
+## タスク履歴
+"""
+
+
+class ProjectState:
+    """一時ディレクトリ上の projects.json と CLAUDE.md（タスク履歴 history 件）"""
+
+    def __init__(self, history):
+        self.dir = Path(tempfile.mkdtemp(prefix='yco-bench-project-'))
+        (self.dir / 'data').mkdir()
+        project_dir = self.dir / 'projects' / 'bench'
+        project_dir.mkdir(parents=True)
+        with open(self.dir / 'data' / 'projects.json', 'w', encoding='utf-8') as f:
+            json.dump([{'id': 'project-bench', 'name': 'bench', 'repository': 'bench'}], f)
+        entries = ''.join(f"\n### ベンチマーク課題 {n} - 2024-01-01\n- **ステータス**: completed\n"
+                          f"- **担当**: Actor\n- **説明**: ベンチマーク用のタスク\n" for n in range(history))
+        self.claude_file = project_dir / 'CLAUDE.md'
+        self.claude_file.write_text(CLAUDE_TEMPLATE + entries, encoding='utf-8')
+
+    def append(self, n=0):
+        return project_utils.update_claude_task_history('project-bench', {
+            'title': f'追加の課題 {n}', 'created_at': '2024-01-01', 'status': 'completed' if n % 2 else 'failed'
+        }, base_dir=str(self.dir))
+
+    def load(self):
+        return project_utils.get_project_claude_config('project-bench', base_dir=str(self.dir))
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def measure(func, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def register(suite):
+    for history in HISTORY_SIZES:
+        params = {'history': history}
+        names = {kind: f'project_utils.get_project_claude_config[{kind},history={history}]'
+                 for kind in ('cached', 'sidecar', 'parse')}
+        if not any(suite.selected(name) for name in names.values()):
+            continue
+
+        state = ProjectState(history)
+        try:
+            state.load()
+            # 変更のないファイル（メモリ上の結果を返す）
+            suite.record(names['cached'], measure(state.load, CALLS), params=params)
+
+            # 再起動直後（保存済みの解析結果を読む）
+            def from_sidecar():
+                project_utils._config_cache.clear()
+                state.load()
+            suite.record(names['sidecar'], measure(from_sidecar, CALLS), params=params)
+
+            # 初回（解析して保存する）
+            def parse():
+                project_utils._config_cache.clear()
+                os.unlink(project_utils.config_cache_path(state.claude_file))
+                state.load()
+            suite.record(names['parse'], measure(parse, CALLS // 4), params=params)
+        finally:
+            project_utils._config_cache.clear()
+            state.cleanup()
+
+    for history in HISTORY_SIZES:
+        register_task_history(suite, history)
+
+
+def register_task_history(suite, history):
+    """タスク履歴の追記（ジャーナルへの1行）・CLAUDE.md へのまとめての反映・最近の履歴の検索"""
+    params = {'history': history}
+    names = {kind: f'project_utils.{kind}[history={history}]'
+             for kind in ('update_claude_task_history', 'merge_task_history', 'get_recent_task_history')}
+    if not any(suite.selected(name) for name in names.values()):
+        return
+
+    state = ProjectState(history)
+    try:
+        # CLAUDE.md の大きさに関係なく一定（反映は merge_task_history で計測する）
+        counter = iter(range(10 ** 9))
+        suite.record(names['update_claude_task_history'],
+                     measure(lambda: state.append(next(counter)), CALLS), params=params)
+        project_utils.merge_task_history('project-bench', base_dir=str(state.dir))
+
+        samples = []
+        for _ in range(5):
+            for n in range(MERGE_BATCH):
+                state.append(n)
+            start = time.perf_counter()
+            project_utils.merge_task_history('project-bench', base_dir=str(state.dir))
+            samples.append(time.perf_counter() - start)
+        suite.record(names['merge_task_history'], samples, params=dict(params, batch=MERGE_BATCH))
+
+        suite.record(names['get_recent_task_history'],
+                     measure(lambda: project_utils.get_recent_task_history(
+                         'project-bench', limit=10, status='failed', base_dir=str(state.dir)), CALLS),
+                     params=params)
+    finally:
+        state.cleanup()
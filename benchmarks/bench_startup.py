@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+起動時間のベンチマーク
+
+- 主要モジュールの import 時間（新しいプロセスで計測）
+- TaskProcessor をプロセスとして起動してから最初のタスクが開始されるまでの時間
+  （メッセージディレクトリに処理対象外のメッセージが残っている状態で、初回起動・再起動・fast_start 無効を比較）
+
+使用方法:
+  python -m benchmarks.bench_startup   # 再起動時の所要時間が STARTUP_TARGET_SECONDS を超えたら終了コード 1
+"""
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_task_processor import make_task
+from benchmarks.harness import FAKE_BIN_DIR, REPO_DIR, Suite
+
+IMPORT_MODULES = ('src.task_processor', 'communication.websocket_bridge')
+# 起動時には読み込まれないはずの重いモジュール
+HEAVY_MODULES = ('psutil', 'requests', 'watchdog.observers')
+INERT_MESSAGES = 2000
+QUICK_INERT_MESSAGES = 500
+STARTUP_TARGET_SECONDS = 2.0
+FIRST_TASK_TIMEOUT = 60
+
+IMPORT_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module):
+    """新しいインタープリタで module の import にかかった秒数と、読み込まれた重いモジュール"""
+    output = subprocess.check_output(
+        [sys.executable, '-c', IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL)
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['seconds'], result['heavy']
+
+
+class StartupDir:
+    """処理対象外のメッセージが残ったベースディレクトリ"""
+
+    def __init__(self, inert_messages, fast_start=True):
+        self.dir = Path(tempfile.mkdtemp(prefix='yco-bench-startup-'))
+        for sub in ('config', 'data', 'communication/messages', 'logs'):
+            (self.dir / sub).mkdir(parents=True)
+
+        with open(REPO_DIR / 'config' / 'orchestra.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config['task_processing'].update(simulated_work_seconds=None, workspace_dir='./workspace',
+                                         fast_start=fast_start)
+        config['autoscaling'] = {'enabled': False}
+        for section in ('metrics', 'tracing', 'profiling'):
+            config[section] = {'enabled': False}
+        self.write_json('config/orchestra.json', config)
+        self.write_json('data/projects.json', [{'id': f'project-{n}', 'name': f'Project {n}', 'weight': n + 1}
+                                               for n in range(3)])
+
+        # 前回の実行で残ったエージェント間メッセージ（アーカイブされない種類）
+        timestamp = datetime.now().isoformat()
+        for n in range(inert_messages):
+            message_id = f'bench-{n:06d}'
+            self.write_json(f'communication/messages/agent-msg-task-old-{n}-{message_id}.json', {
+                'id': message_id, 'from': 'producer', 'to': 'director', 'type': 'task_assignment',
+                'timestamp': timestamp, 'data': {'taskId': f'task-old-{n}'}
+            })
+
+    def write_json(self, relative_path, data):
+        with open(self.dir / relative_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def add_pending_task(self):
+        """新しい保留タスクを1件だけ持つ tasks.json を書き込み、そのIDを返す"""
+        task = make_task(0)
+        task['id'] = f'task-startup-{time.time_ns()}'
+        self.write_json('data/tasks.json', {'tasks': [task]})
+        return task['id']
+
+    def task_started(self, task_id):
+        try:
+            with open(self.dir / 'data' / 'tasks.json', 'r', encoding='utf-8') as f:
+                tasks = json.load(f).get('tasks', [])
+        except (OSError, ValueError):
+            return False
+        return any(task.get('id') == task_id and task.get('status') != 'pending' for task in tasks)
+
+    def time_to_first_task(self):
+        """プロセス起動から保留タスクが開始されるまでの秒数（計測後に SIGTERM で停止する）"""
+        task_id = self.add_pending_task()
+        env = dict(os.environ, PATH=f"{FAKE_BIN_DIR}{os.pathsep}{os.environ.get('PATH', '')}")
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-m', 'src.task_processor', str(self.dir)],
+                                   cwd=REPO_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = start + FIRST_TASK_TIMEOUT
+            while not self.task_started(task_id):
+                if process.poll() is not None or time.perf_counter() > deadline:
+                    raise RuntimeError('task processor did not start the task')
+                time.sleep(0.005)
+            return time.perf_counter() - start
+        finally:
+            # 停止時にスナップショットが保存される
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def register(suite):
+    for module in IMPORT_MODULES:
+        name = f'startup.import[{module}]'
+        if not suite.selected(name):
+            continue
+        samples, heavy = [], set()
+        for _ in range(5):
+            seconds, loaded = measure_import(module)
+            samples.append(seconds)
+            heavy.update(loaded)
+        suite.record(name, samples, params={'module': module},
+                     extra={'heavy_modules_loaded': sorted(heavy)})
+
+    inert_messages = QUICK_INERT_MESSAGES if suite.quick else INERT_MESSAGES
+    params = {'inert_messages': inert_messages, 'target_seconds': STARTUP_TARGET_SECONDS}
+    runs = 2 if suite.quick else 3
+    names = {mode: f'startup.time_to_first_task[{mode},inert={inert_messages}]'
+             for mode in ('cold', 'warm', 'fast_start_disabled')}
+
+    if suite.selected(names['cold']) or suite.selected(names['warm']):
+        cold, warm = [], []
+        for _ in range(runs):
+            state = StartupDir(inert_messages)
+            try:
+                # 1回目はスナップショットなし、2回目は前回の停止時に保存されたスナップショットから起動
+                cold.append(state.time_to_first_task())
+                warm.append(state.time_to_first_task())
+            finally:
+                state.cleanup()
+        for mode, samples in (('cold', cold), ('warm', warm)):
+            suite.record(names[mode], samples, params=params,
+                         extra={'within_target': max(samples) <= STARTUP_TARGET_SECONDS})
+
+    if suite.selected(names['fast_start_disabled']):
+        samples = []
+        state = StartupDir(inert_messages, fast_start=False)
+        try:
+            for _ in range(runs):
+                samples.append(state.time_to_first_task())
+        finally:
+            state.cleanup()
+        suite.record(names['fast_start_disabled'], samples, params=params,
+                     extra={'within_target': max(samples) <= STARTUP_TARGET_SECONDS})
+
+
+def main():
+    suite = Suite()
+    register(suite)
+    warm = [result for name, result in suite.results.items() if name.startswith('startup.time_to_first_task[warm')]
+    if any(not result['within_target'] for result in warm):
+        print(f"❌ Time to first task exceeded the {STARTUP_TARGET_SECONDS}s target")
+        sys.exit(1)
+    print(f"✅ Time to first task within the {STARTUP_TARGET_SECONDS}s target")
+
+
+if __name__ == '__main__':
+    main()
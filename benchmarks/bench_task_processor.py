@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+TaskProcessor のベンチマーク（claude CLI はスタブ、処理時間のシミュレーションは無効）
+"""
+
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.harness import REPO_DIR, quiet, use_fake_claude
+from src.task_processor import TaskProcessor
+
+TASK_COUNTS = (10, 100, 1000, 10000)
+QUICK_TASK_COUNTS = (10, 100, 1000)
+MESSAGE_COUNTS = (10, 50)
+PENDING_TASK_COUNTS = (4, 16)
+
+
+def make_task(number, status='pending'):
+    now = datetime.now().isoformat()
+    return {
+        'id': f'task-bench-{number}',
+        'projectId': f'project-{number % 3}',
+        'title': f'ベンチマーク課題 {number}',
+        'description': 'ベンチマーク用のタスク',
+        'priority': 'medium',
+        'tags': [],
+        'status': status,
+        'createdAt': now,
+        'updatedAt': now
+    }
+
+
+class ProcessorState:
+    """一時ディレクトリ上の TaskProcessor"""
+
+    def __init__(self, tasks=(), messages=(), projects=(), **processing):
+        self.dir = Path(tempfile.mkdtemp(prefix='yco-bench-tp-'))
+        for sub in ('config', 'data', 'communication/messages', 'logs'):
+            (self.dir / sub).mkdir(parents=True)
+
+        with open(REPO_DIR / 'config' / 'orchestra.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config['task_processing'].update(simulated_work_seconds=None, max_queue_depth=100000,
+                                         workspace_dir='./workspace', **processing)
+        config['autoscaling'] = {'enabled': False}
+        self.write_json('config/orchestra.json', config)
+        self.write_json('data/projects.json', list(projects))
+        self.write_json('data/tasks.json', {'tasks': list(tasks)})
+        for message in messages:
+            self.write_json(f"communication/messages/{message['id']}.json", message)
+
+        with quiet():
+            self.processor = TaskProcessor(self.dir)
+
+    def write_json(self, relative_path, data):
+        with open(self.dir / relative_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def cleanup(self):
+        self.processor.executor.shutdown(wait=True)
+        self.processor.workflow_engine.shutdown(wait=True)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def task_request_message(task):
+    """ダッシュボードが書き出すのと同じ形式のタスクリクエスト"""
+    return {
+        'id': f"task-{task['id']}",
+        'type': 'task_request',
+        'from': 'web_dashboard',
+        'to': 'producer',
+        'timestamp': datetime.now().isoformat(),
+        'data': task
+    }
+
+
+def drain_messages(state, timeout=120):
+    """メッセージがすべてアーカイブされるまで process_messages を繰り返す"""
+    processor = state.processor
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        processor.process_messages()
+        if not any(processor.messages_dir.glob('task-*.json')):
+            return
+        time.sleep(0.005)
+    raise TimeoutError('process_messages did not drain')
+
+
+def drain_pending_tasks(state, timeout=300):
+    """保留タスクがすべて完了するまで process_pending_tasks を繰り返す"""
+    processor = state.processor
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        processor.process_pending_tasks()
+        if all(task['status'] == 'completed' for task in processor.load_tasks()):
+            return
+        time.sleep(0.005)
+    raise TimeoutError('process_pending_tasks did not finish')
+
+
+def register(suite):
+    use_fake_claude()
+
+    for count in MESSAGE_COUNTS:
+        suite.run(f'task_processor.process_messages[messages={count}]',
+                  drain_messages,
+                  setup=lambda count=count: ProcessorState(
+                      tasks=[make_task(n) for n in range(count)],
+                      messages=[task_request_message(make_task(n)) for n in range(count)]),
+                  teardown=lambda state: state.cleanup(),
+                  repeat=3, params={'messages': count})
+
+    for count in PENDING_TASK_COUNTS:
+        suite.run(f'task_processor.process_pending_tasks[tasks={count}]',
+                  drain_pending_tasks,
+                  setup=lambda count=count: ProcessorState(tasks=[make_task(n) for n in range(count)]),
+                  teardown=lambda state: state.cleanup(),
+                  repeat=3, params={'tasks': count})
+
+    for count in (QUICK_TASK_COUNTS if suite.quick else TASK_COUNTS):
+        repeat = 5 if count >= 10000 else 20
+        tasks = [make_task(n, status='completed') for n in range(count)]
+        setup = lambda tasks=tasks: ProcessorState(tasks=tasks)
+        teardown = lambda state: state.cleanup()
+        params = {'tasks': count}
+
+        suite.run(f'task_processor.load_tasks[tasks={count}]',
+                  lambda state: state.processor.load_tasks(),
+                  setup=setup, teardown=teardown, repeat=repeat, params=params)
+        suite.run(f'task_processor.save_tasks[tasks={count}]',
+                  lambda state, tasks=tasks: state.processor.save_tasks(tasks),
+                  setup=setup, teardown=teardown, repeat=repeat, params=params)
+        suite.run(f'task_processor.update_task[tasks={count}]',
+                  lambda state: state.processor.update_task('task-bench-0', progress=50),
+                  setup=setup, teardown=teardown, repeat=repeat, params=params)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Benchmark Harness
+標準ライブラリのみで動くベンチマーク実行・集計・JSON出力
+"""
+
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+FAKE_BIN_DIR = Path(__file__).resolve().parent / 'bin'
+
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+
+def use_fake_claude():
+    """PATHの先頭にスタブの claude CLI を追加"""
+    path = os.environ.get('PATH', '')
+    if not path.startswith(str(FAKE_BIN_DIR)):
+        os.environ['PATH'] = f"{FAKE_BIN_DIR}{os.pathsep}{path}"
+
+
+@contextlib.contextmanager
+def quiet():
+    """計測中の print 出力を捨てる"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def summarize(samples):
+    """計測値（秒）の統計"""
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+    }
+
+
+class Suite:
+    """ベンチマークの登録と実行"""
+
+    def __init__(self, name_filter=None, quick=False):
+        self.name_filter = name_filter
+        self.quick = quick
+        self.results = {}
+
+    def selected(self, name):
+        return not self.name_filter or self.name_filter in name
+
+    def run(self, name, func, setup=None, teardown=None, repeat=5, params=None):
+        """setup() の戻り値を func に渡して repeat 回計測する（setup/teardown は計測外）"""
+        if not self.selected(name):
+            return None
+
+        samples = []
+        for _ in range(repeat):
+            state = setup() if setup else None
+            try:
+                with quiet():
+                    start = time.perf_counter()
+                    func(state)
+                    samples.append(time.perf_counter() - start)
+            finally:
+                if teardown:
+                    teardown(state)
+
+        result = {'params': params or {}, 'seconds': summarize(samples)}
+        self.results[name] = result
+        print(f"{name:60s} median {result['seconds']['median'] * 1000:10.3f} ms  "
+              f"p95 {result['seconds']['p95'] * 1000:10.3f} ms")
+        return result
+
+    def record(self, name, seconds_samples, params=None, extra=None):
+        """計測済みのサンプルを結果に追加（1回の実行で複数のサンプルを取るもの用）"""
+        if not self.selected(name) or not seconds_samples:
+            return None
+        result = {'params': params or {}, 'seconds': summarize(seconds_samples)}
+        if extra:
+            result.update(extra)
+        self.results[name] = result
+        print(f"{name:60s} median {result['seconds']['median'] * 1000:10.3f} ms  "
+              f"p95 {result['seconds']['p95'] * 1000:10.3f} ms")
+        return result
+
+
+def environment():
+    """結果の比較に必要な実行環境の情報"""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                         text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_results(suite, output):
+    data = {'environment': environment(), 'results': suite.results}
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved: {output}")
+    return data
+
+
+def compare(baseline_file, current):
+    """以前の結果JSONと比較して中央値の比を表示"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    print(f"\nComparison with {baseline_file} (median, current / baseline):")
+    for name, result in current['results'].items():
+        if name not in baseline:
+            continue
+        ratio = result['seconds']['median'] / baseline[name]['seconds']['median']
+        marker = '  ⚠️ slower' if ratio > 1.1 else ('  ✅ faster' if ratio < 0.9 else '')
+        print(f"  {name:60s} {ratio:6.2f}x{marker}")
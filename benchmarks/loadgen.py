@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Load Generator
+ダッシュボードと同じ形式の task-*.json / append_message メッセージを指定レートで書き込み、
+TaskProcessor（claude CLI はスタブ、リポジトリはローカルの git リモート）の
+段階ごとのレイテンシ（p50/p95/p99）とスループットを計測する
+
+使用方法:
+  python -m benchmarks.loadgen --count 200 --rate 20 --concurrency 4
+  python -m benchmarks.loadgen --count 200 --rate 0       # 一度に投入して飽和時のスループットを計測
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# `python benchmarks/loadgen.py` でも動作させる
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.task_processor as task_processor_module
+from benchmarks.bench_task_processor import ProcessorState, make_task, task_request_message
+from benchmarks.harness import environment, quiet, use_fake_claude
+from communication.durable import atomic_write_text
+from communication.ids import new_id
+
+STAGES = ('pickup', 'queue_wait', 'classification', 'model_call', 'git', 'log_write', 'completion', 'end_to_end')
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+PROJECT_ID = 'loadgen'
+CONVERSATION_TASKS = 10
+
+
+def percentile(ordered, fraction):
+    """ソート済みの値の nearest-rank パーセンタイル"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class StageRecorder:
+    """TaskProcessor のメソッドを包み、メッセージごとに各段階の所要時間を記録する"""
+
+    def __init__(self, processor, expected):
+        self.processor = processor
+        self.expected = expected
+        self.records = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.finished = 0
+        self.all_finished = threading.Event()
+        self.original_classify = None
+
+    def written(self, message_id):
+        self.records[message_id] = {'written': time.perf_counter()}
+
+    def record_for(self, message):
+        return self.records.get(message.get('id'))
+
+    def install(self):
+        processor = self.processor
+        for name, stage in (('generate_ai_response_for_task', 'respond'),
+                            ('execute_task', 'respond'),
+                            ('clone_or_update_repository', 'git'),
+                            ('save_task_log', 'log_write'),
+                            ('save_agent_message', 'log_write'),
+                            ('commit_message', 'completion'),
+                            ('archive_message', 'completion')):
+            setattr(processor, name, self.timed(getattr(processor, name), stage))
+
+        admit_message = processor.admit_message
+        run_admitted_message = processor.run_admitted_message
+
+        def admitted(message_file, message):
+            record = self.record_for(message)
+            if record is not None:
+                record.setdefault('admitted', time.perf_counter())
+            return admit_message(message_file, message)
+
+        def run_admitted(key, message_file, message):
+            record = self.record_for(message)
+            if record is not None:
+                record['started'] = time.perf_counter()
+            self.local.record = record
+            try:
+                return run_admitted_message(key, message_file, message)
+            finally:
+                self.local.record = None
+                if record is not None:
+                    record['finished'] = time.perf_counter()
+                    with self.lock:
+                        self.finished += 1
+                        if self.finished >= self.expected:
+                            self.all_finished.set()
+
+        processor.admit_message = admitted
+        processor.run_admitted_message = run_admitted
+
+        # classify_task はモジュール関数として呼ばれる
+        self.original_classify = task_processor_module.classify_task
+        task_processor_module.classify_task = self.timed(self.original_classify, 'classification')
+
+    def uninstall(self):
+        if self.original_classify:
+            task_processor_module.classify_task = self.original_classify
+
+    def timed(self, func, stage):
+        def wrapper(*args, **kwargs):
+            record = getattr(self.local, 'record', None)
+            if record is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record[stage] = record.get(stage, 0.0) + time.perf_counter() - start
+        return wrapper
+
+    def stage_samples(self):
+        """完了したメッセージの段階ごとの所要時間（秒）"""
+        samples = {stage: [] for stage in STAGES}
+        for record in self.records.values():
+            if 'finished' not in record:
+                continue
+            respond = record.get('respond', 0.0)
+            values = {
+                'pickup': record['admitted'] - record['written'],
+                'queue_wait': record['started'] - record['admitted'],
+                'classification': record.get('classification', 0.0),
+                # 応答生成のうち判定と git を除いた部分（claude CLI の呼び出し）
+                'model_call': max(0.0, respond - record.get('classification', 0.0) - record.get('git', 0.0)),
+                'git': record.get('git', 0.0),
+                'log_write': record.get('log_write', 0.0),
+                'completion': record.get('completion', 0.0),
+                'end_to_end': record['finished'] - record['written'],
+            }
+            for stage, value in values.items():
+                samples[stage].append(value)
+        return samples
+
+    def report(self):
+        samples = self.stage_samples()
+        stages = {}
+        for stage in STAGES:
+            ordered = sorted(samples[stage])
+            stages[stage] = {
+                'count': len(ordered),
+                'p50': percentile(ordered, 0.50),
+                'p95': percentile(ordered, 0.95),
+                'p99': percentile(ordered, 0.99),
+                'max': ordered[-1] if ordered else None,
+            }
+
+        finished = [record for record in self.records.values() if 'finished' in record]
+        throughput = None
+        if finished:
+            elapsed = (max(record['finished'] for record in finished) -
+                       min(record['written'] for record in self.records.values()))
+            throughput = len(finished) / elapsed if elapsed > 0 else None
+        return {
+            'messages': len(self.records),
+            'completed': len(finished),
+            'throughput_per_second': throughput,
+            'stages': stages,
+        }
+
+
+def create_git_remote(directory):
+    """コミットを1つ持つローカルの bare リポジトリ（clone / pull の対象）"""
+    remote = directory / 'loadgen-remote.git'
+    seed = directory / 'loadgen-seed'
+    git = lambda *args: subprocess.run(['git', *args], check=True, capture_output=True)
+    git('init', '--bare', '-q', str(remote))
+    git('clone', '-q', str(remote), str(seed))
+    (seed / 'README.md').write_text('# loadgen\n', encoding='utf-8')
+    git('-C', str(seed), 'add', 'README.md')
+    git('-C', str(seed), '-c', 'user.name=loadgen', '-c', 'user.email=loadgen@localhost',
+        'commit', '-q', '-m', 'initial commit')
+    git('-C', str(seed), 'push', '-q', 'origin', 'HEAD')
+    return remote
+
+
+def message_title(rng, number, code_ratio):
+    """code_ratio の割合でコード修正（git + ワークスペース内の claude）、残りは通常の質問"""
+    if rng.random() < code_ratio:
+        return f'ログ出力を修正 {number}'
+    return f'負荷試験の質問 {number}'
+
+
+def build_plan(count, append_ratio, code_ratio, seed):
+    """書き込むメッセージの一覧と、事前に tasks.json に登録するタスク"""
+    rng = random.Random(seed)
+    tasks = []
+    for n in range(CONVERSATION_TASKS):
+        task = make_task(n, status='in_progress')
+        task.update(id=f'task-conversation-{n}', projectId=PROJECT_ID)
+        tasks.append(task)
+
+    plan = []
+    for n in range(count):
+        if rng.random() < append_ratio:
+            task_id = rng.choice(tasks[:CONVERSATION_TASKS])['id']
+            message_id = new_id(f'msg-{task_id}-')
+            plan.append((f'{message_id}.json', {
+                'id': message_id,
+                'type': 'task_update',
+                'from': 'web_dashboard',
+                'to': 'producer',
+                'timestamp': datetime.now().isoformat(),
+                'data': {'taskId': task_id, 'message': message_title(rng, n, code_ratio),
+                         'action': 'append_message'}
+            }))
+        else:
+            task = make_task(n)
+            task.update(id=f'task-load-{n}', projectId=PROJECT_ID, title=message_title(rng, n, code_ratio))
+            tasks.append(task)
+            plan.append((f"task-{task['id']}.json", task_request_message(task)))
+    return tasks, plan
+
+
+def write_messages(messages_dir, plan, rate, concurrency, recorder):
+    """rate 件/秒（0 は無制限）で concurrency 本のスレッドからメッセージを書き込む"""
+    start = time.perf_counter()
+    counter = itertools.count()
+
+    def writer():
+        while True:
+            index = next(counter)
+            if index >= len(plan):
+                return
+            if rate:
+                delay = start + index / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            filename, message = plan[index]
+            recorder.written(message['id'])
+            atomic_write_text(messages_dir / filename, json.dumps(message, indent=2, ensure_ascii=False))
+
+    threads = [threading.Thread(target=writer, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_load(args):
+    use_fake_claude()
+    os.environ['FAKE_CLAUDE_DELAY'] = str(args.claude_delay)
+
+    tasks, plan = build_plan(args.count, args.append_ratio, args.code_ratio, args.seed)
+    state = ProcessorState(tasks=tasks, max_concurrency=args.max_concurrency)
+    try:
+        remote = create_git_remote(state.dir)
+        state.write_json('data/projects.json', [{
+            'id': PROJECT_ID, 'name': 'Load Generator', 'repository': str(remote), 'status': 'active'
+        }])
+
+        processor = state.processor
+        recorder = StageRecorder(processor, expected=len(plan))
+        recorder.install()
+
+        # TaskProcessor.run のメッセージ処理を poll_interval ごとに実行
+        stop = threading.Event()
+
+        def drive():
+            while not stop.is_set():
+                processor.process_messages()
+                stop.wait(args.poll_interval)
+
+        with quiet():
+            driver = threading.Thread(target=drive, daemon=True)
+            driver.start()
+            write_messages(processor.messages_dir, plan, args.rate, args.concurrency, recorder)
+            recorder.all_finished.wait(args.timeout)
+            stop.set()
+            driver.join()
+            processor.executor.shutdown(wait=True)
+        recorder.uninstall()
+        return recorder.report()
+    finally:
+        state.cleanup()
+
+
+def print_report(report):
+    print(f"{'stage':16s} {'p50 ms':>10s} {'p95 ms':>10s} {'p99 ms':>10s} {'max ms':>10s}")
+    for stage, values in report['stages'].items():
+        if not values['count']:
+            continue
+        print(f"{stage:16s} " + ' '.join(f"{values[key] * 1000:10.2f}" for key in ('p50', 'p95', 'p99', 'max')))
+    throughput = report['throughput_per_second']
+    print(f"\ncompleted: {report['completed']}/{report['messages']}  "
+          f"throughput: {throughput:.2f} msg/s" if throughput else
+          f"\ncompleted: {report['completed']}/{report['messages']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Yellow Claude Orchestra load generator')
+    parser.add_argument('--count', type=int, default=100, help='number of messages to write')
+    parser.add_argument('--rate', type=float, default=10.0, help='messages per second (0 = as fast as possible)')
+    parser.add_argument('--concurrency', type=int, default=2, help='writer threads')
+    parser.add_argument('--append-ratio', type=float, default=0.5, help='fraction of append_message messages')
+    parser.add_argument('--code-ratio', type=float, default=0.2, help='fraction of code modification requests')
+    parser.add_argument('--claude-delay', type=float, default=0.0, help='seconds the stub claude CLI sleeps')
+    parser.add_argument('--max-concurrency', type=int, default=2, help='task_processing.max_concurrency')
+    parser.add_argument('--poll-interval', type=float, default=0.05, help='seconds between process_messages calls')
+    parser.add_argument('--timeout', type=float, default=600.0, help='seconds to wait for completion')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/loadgen-<timestamp>.json)')
+    args = parser.parse_args()
+
+    report = run_load(args)
+    print_report(report)
+
+    output = Path(args.output or RESULTS_DIR / f"loadgen-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'options': vars(args), 'report': report},
+                  f, indent=2, ensure_ascii=False)
+    print(f"Results saved: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Benchmark Runner
+
+使用方法:
+  python -m benchmarks.run                       # 全ベンチマークを実行して benchmarks/results/ に保存
+  python -m benchmarks.run --quick               # 大きなサイズを省略
+  python -m benchmarks.run --filter message_hub  # 名前に一致するものだけ
+  python -m benchmarks.run --compare benchmarks/results/<以前の結果>.json
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# `python benchmarks/run.py` でも動作させる
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import bench_communication, bench_project_utils, bench_startup, bench_task_processor
+from benchmarks.harness import Suite, compare, environment, save_results
+
+MODULES = (bench_communication, bench_task_processor, bench_project_utils, bench_startup)
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Yellow Claude Orchestra benchmarks')
+    parser.add_argument('--filter', help='run only benchmarks whose name contains this string')
+    parser.add_argument('--quick', action='store_true', help='skip the largest sizes')
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/<timestamp>-<commit>.json)')
+    parser.add_argument('--compare', help='previous result JSON to compare against')
+    args = parser.parse_args()
+
+    suite = Suite(name_filter=args.filter, quick=args.quick)
+    for module in MODULES:
+        module.register(suite)
+
+    output = args.output
+    if not output:
+        commit = environment()['commit'] or 'unknown'
+        output = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    data = save_results(suite, output)
+
+    if args.compare:
+        compare(args.compare, data)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,10 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime
 
+from . import tracing
+from .agent_registry import AgentRegistration
+from .cadence import AdaptiveCadence, create_observer
+from .ids import new_id
 from .message_hub import MessageHub
 
 
@@ -23,6 +27,7 @@ class AgentClient:
         self.agent_type = agent_type
         self.capabilities = capabilities or []
         
+        self.communication_dir = communication_dir
         self.hub = MessageHub(communication_dir)
         self.hub.register_agent(agent_id, agent_type, capabilities)
         
@@ -31,6 +36,10 @@ class AgentClient:
         self.running = False
         self.polling_thread = None
         self.polling_interval = 1.0  # 秒
+        self.cadence = None
+        self.observer = None
+        self.last_inbox_version = None
+        self.registration = None
     
     def register_handler(self, message_type: str, handler: Callable[[Dict], Any]):
         """メッセージタイプに対するハンドラーを登録"""
@@ -64,21 +73,44 @@ class AgentClient:
             self.capabilities = capabilities
         self.hub.update_agent_status(self.agent_id, status, self.capabilities)
     
-    def start_polling(self, interval: float = 1.0):
-        """メッセージポーリングを開始"""
-        self.polling_interval = interval
+    def start_polling(self, interval: float = None):
+        """メッセージポーリングを開始（interval は最短の間隔。メッセージがなければ延ばし、届いたらすぐ読む）"""
+        defaults = {'min_interval_seconds': 0.2, 'max_interval_seconds': 5.0, 'error_interval_seconds': 1.0}
+        if interval is not None:
+            defaults = dict(defaults, min_interval_seconds=interval, error_interval_seconds=interval)
+        self.cadence = AdaptiveCadence.from_config(Path(self.communication_dir).parent, 'agent_client', **defaults)
+        self.polling_interval = self.cadence.min_interval
+        self.observer = create_observer()
+        if self.cadence.watch(self.observer, self.hub.messages_dir, (f"{self.agent_id}_inbox.json",)):
+            self.observer.start()
         self.running = True
+        # ポーリング中はレジストリにハートビートを書き出す（ブリッジのエージェント検出用）
+        self.registration = AgentRegistration(self.communication_dir, self.agent_id, self.agent_type).start()
         self.polling_thread = threading.Thread(target=self._poll_messages, daemon=True)
         self.polling_thread.start()
     
     def stop_polling(self):
         """メッセージポーリングを停止"""
         self.running = False
+        if self.cadence:
+            self.cadence.stop()
         if self.polling_thread:
             self.polling_thread.join()
+        if self.observer is not None and self.observer.is_alive():
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+        if self.registration:
+            self.registration.stop()
+            self.registration = None
     
     def process_messages_once(self):
-        """メッセージを一度だけ処理"""
+        """メッセージを一度だけ処理し、処理した件数を返す"""
+        # インボックスに変更がなければ読み込みを省略
+        inbox_version = self.hub.inbox_version(self.agent_id)
+        if inbox_version and inbox_version == self.last_inbox_version:
+            return 0
+        
         messages = self.hub.get_unread_messages(self.agent_id)
         
         for message in messages:
@@ -87,16 +119,24 @@ class AgentClient:
         # メッセージを既読にマーク
         if messages:
             self.hub.get_messages(self.agent_id, mark_as_read=True)
+            inbox_version += 1
+        
+        # 処理中に別のメッセージが届いていれば次回も読み直す
+        if self.hub.inbox_version(self.agent_id) == inbox_version:
+            self.last_inbox_version = inbox_version
+        else:
+            self.last_inbox_version = None
+        return len(messages)
     
     def _poll_messages(self):
         """メッセージをポーリング（バックグラウンドスレッド）"""
         while self.running:
             try:
-                self.process_messages_once()
-                time.sleep(self.polling_interval)
+                self.cadence.record(self.process_messages_once() > 0)
             except Exception as e:
                 print(f"Error in message polling for {self.agent_id}: {e}")
-                time.sleep(self.polling_interval)
+                self.cadence.failed()
+            self.cadence.wait()
     
     def _process_message(self, message: Dict):
         """個別メッセージを処理"""
@@ -104,15 +144,19 @@ class AgentClient:
         
         if message_type in self.message_handlers:
             try:
-                response = self.message_handlers[message_type](message)
-                
-                # レスポンスがある場合は送信者に返信
-                if response is not None:
-                    self.send_message(
-                        message['from'], 
-                        f"{message_type}_response", 
-                        response
-                    )
+                # 送信側のトレースの子スパンとして処理し、返信にも同じトレースを載せる
+                with tracing.span(f'handle {message_type}', parent=message.get('traceparent'),
+                                  kind=tracing.KIND_CONSUMER,
+                                  attributes={'agent.id': self.agent_id, 'message.id': message.get('id')}):
+                    response = self.message_handlers[message_type](message)
+                    
+                    # レスポンスがある場合は送信者に返信
+                    if response is not None:
+                        self.send_message(
+                            message['from'], 
+                            f"{message_type}_response", 
+                            response
+                        )
             except Exception as e:
                 print(f"Error processing message {message['id']}: {e}")
                 # エラーレスポンスを送信
@@ -130,7 +174,7 @@ class AgentClient:
     
     def request_response(self, to_agent: str, request_type: str, content: Any, timeout: float = 30.0) -> Optional[Any]:
         """リクエスト-レスポンス形式の通信"""
-        request_id = f"{int(time.time() * 1000)}_{self.agent_id}"
+        request_id = new_id(f"{self.agent_id}_")
         
         # リクエストにIDを追加
         request_content = {
@@ -138,8 +182,10 @@ class AgentClient:
             'content': content
         }
         
-        # リクエスト送信
-        self.send_message(to_agent, request_type, request_content, priority="high")
+        # リクエスト送信（現在のトレースがなければリクエストを起点に新しいトレースを始める）
+        with tracing.span(f'request {request_type}', kind=tracing.KIND_PRODUCER,
+                          attributes={'agent.id': self.agent_id, 'request.id': request_id}):
+            self.send_message(to_agent, request_type, request_content, priority="high")
         
         # レスポンスを待機
         start_time = time.time()
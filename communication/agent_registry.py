@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Agent Registry
+エージェントの登録（ハートビートファイル・PIDファイル）と、登録されたPIDだけを確認する検出
+
+  communication/registry/<agent_id>.json   Pythonのプロセスが書き出し、定期的に更新するハートビート
+  agents/<name>/pid                        start-agents-only.sh が書き出す claude-code の PID
+
+PIDの再利用は /proc/<pid>/stat の起動時刻で見分ける。どちらにも登録がないときだけ、
+間隔を空けてプロセス一覧の全走査（psutil）を行い、見つかったPIDを次回以降は個別に確認する。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from . import metrics
+    from .durable import atomic_write_text
+    from .lazy_import import lazy_import
+except ImportError:
+    import metrics
+    from durable import atomic_write_text
+    from lazy_import import lazy_import
+
+psutil = lazy_import('psutil')
+
+PROCESS_SCANS = metrics.counter('orchestra_agent_process_scans', 'Full process table scans for agent discovery')
+
+
+def registry_dir(communication_dir):
+    return Path(communication_dir) / 'registry'
+
+
+def load_discovery_config(base_dir):
+    """orchestra.json の discovery 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('discovery', {})
+    except Exception as e:
+        print(f"Error loading discovery config: {e}")
+    return {}
+
+
+def process_start_ticks(pid):
+    """プロセスの起動時刻（/proc/<pid>/stat の starttime、取得できなければ None）"""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+        # comm に空白や括弧を含む場合があるため、最後の ')' 以降を分割する
+        return int(stat[stat.rindex(b')') + 2:].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def pid_alive(pid, start_ticks=None):
+    """PIDが生きていて、起動時刻が一致する（同じプロセスである）か"""
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    if start_ticks is None:
+        return True
+    current = process_start_ticks(pid)
+    return current is None or current == start_ticks
+
+
+def infer_agent_type(text):
+    """コマンドラインやエージェント名からエージェントタイプを推定"""
+    text = text.lower()
+    if 'producer' in text:
+        return 'producer'
+    if 'director' in text or 'conductor' in text:
+        # conductorはdirectorとして扱う
+        return 'director'
+    return 'actor'
+
+
+class AgentRegistration:
+    """このプロセスをレジストリに登録し、ハートビートを更新する"""
+
+    def __init__(self, communication_dir, agent_id, agent_type, name=None, interval_seconds=10, **extra):
+        self.path = registry_dir(communication_dir) / f'{agent_id}.json'
+        self.entry = {
+            'id': agent_id,
+            'type': agent_type,
+            'name': name or agent_id,
+            'pid': os.getpid(),
+            'startTicks': process_start_ticks(os.getpid()),
+            'startTime': datetime.now().isoformat(),
+            'command': ' '.join(sys.argv),
+            'heartbeatInterval': interval_seconds,
+            **extra
+        }
+        self.interval_seconds = interval_seconds
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def heartbeat(self, **fields):
+        try:
+            self.entry.update(fields)
+            self.entry['heartbeat'] = datetime.now().isoformat()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.path, json.dumps(self.entry, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error writing agent heartbeat: {e}")
+
+    def start(self):
+        self.heartbeat()
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f'heartbeat-{self.entry["id"]}')
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval_seconds):
+            self.heartbeat()
+
+    def stop(self):
+        """ハートビートを止めて登録を削除"""
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error removing agent registration: {e}")
+
+
+class ProcessCache:
+    """全走査で見つけたエージェントのプロセス（次回からはPIDごとに確認する）"""
+
+    def __init__(self, full_scan_interval_seconds=300):
+        self.full_scan_interval_seconds = full_scan_interval_seconds
+        self.entries = {}
+        self.last_scan = None
+        self.scans = 0
+
+    def scan_due(self):
+        return self.last_scan is None or time.monotonic() - self.last_scan >= self.full_scan_interval_seconds
+
+    def full_scan(self):
+        """claude-code と task_processor.py のプロセスを1回の走査で探す"""
+        self.last_scan = time.monotonic()
+        self.scans += 1
+        PROCESS_SCANS.inc()
+        entries = {}
+        found_task_processor = False
+        try:
+            processes = psutil.process_iter(['pid', 'name', 'cmdline', 'create_time'])
+        except ImportError as e:
+            print(f"⚠️ psutil unavailable, process scan skipped: {e}")
+            self.entries = {}
+            return
+        for proc in processes:
+            try:
+                info = proc.info
+                args = info['cmdline'] or []
+                if 'claude-code' in (info['name'] or ''):
+                    agent_type = infer_agent_type(' '.join(args))
+                    entries[info['pid']] = {
+                        'id': f"{agent_type}-{info['pid']}",
+                        'type': agent_type,
+                        'name': agent_type.title(),
+                        'currentTask': f'プロセス {info["pid"]} で実行中',
+                        'startTime': datetime.fromtimestamp(info['create_time']).isoformat()
+                    }
+                elif not found_task_processor and any('task_processor.py' in arg for arg in args):
+                    found_task_processor = True
+                    entries[info['pid']] = {
+                        'id': 'task-processor',
+                        'type': 'system',
+                        'name': 'Task Processor',
+                        'currentTask': 'タスク処理システム稼働中'
+                    }
+                    print(f"Task Processorを検出: PID {info['pid']}")
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        for pid, entry in entries.items():
+            entry['startTicks'] = process_start_ticks(pid)
+        self.entries = entries
+
+    def agents(self, allow_scan=True):
+        """キャッシュ中のプロセスを確認し、必要なら全走査する"""
+        self.entries = {pid: entry for pid, entry in self.entries.items()
+                        if pid_alive(pid, entry.get('startTicks'))}
+        if allow_scan and self.scan_due():
+            self.full_scan()
+        return self.entries
+
+
+class AgentDiscovery:
+    """登録されたエージェントのPIDを確認して一覧を作る（登録がなければキャッシュ付きの全走査）"""
+
+    def __init__(self, orchestra_dir, heartbeat_timeout_seconds=30, full_scan_interval_seconds=300):
+        self.orchestra_dir = Path(orchestra_dir)
+        self.registry_dir = registry_dir(self.orchestra_dir / 'communication')
+        self.agents_dir = self.orchestra_dir / 'agents'
+        self.heartbeat_timeout_seconds = heartbeat_timeout_seconds
+        self.process_cache = ProcessCache(full_scan_interval_seconds)
+
+    def registered_agents(self):
+        """ハートビートが新しく、PIDが生きている登録"""
+        agents = []
+        for path in self.registry_dir.glob('*.json') if self.registry_dir.exists() else ():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                alive = pid_alive(entry.get('pid'), entry.get('startTicks'))
+                if not alive:
+                    # 異常終了したプロセスの登録を片付ける
+                    path.unlink()
+                    continue
+                heartbeat = datetime.fromisoformat(entry['heartbeat'])
+                age = (datetime.now() - heartbeat).total_seconds()
+                timeout = max(self.heartbeat_timeout_seconds, 3 * entry.get('heartbeatInterval', 0))
+                agents.append({
+                    'id': entry['id'],
+                    'type': entry.get('type', 'actor'),
+                    'name': entry.get('name', entry['id']),
+                    'status': 'active' if age <= timeout else 'idle',
+                    'currentTask': entry.get('currentTask', f'プロセス {entry["pid"]} で実行中'),
+                    'lastSeen': entry['heartbeat'],
+                    'pid': entry['pid'],
+                    'startTime': entry.get('startTime')
+                })
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"エージェント登録読み込みエラー ({path.name}): {e}")
+        return agents
+
+    def pidfile_agents(self):
+        """agents/<name>/pid の生きているプロセス"""
+        agents = []
+        for pid_file in self.agents_dir.glob('*/pid') if self.agents_dir.exists() else ():
+            try:
+                pid = int(pid_file.read_text().strip())
+            except (OSError, ValueError):
+                continue
+            if not pid_alive(pid):
+                continue
+            name = pid_file.parent.name
+            agent_type = infer_agent_type(name)
+            agents.append({
+                'id': f'{agent_type}-{pid}',
+                'type': agent_type,
+                'name': name.title(),
+                'status': 'active',
+                'currentTask': f'プロセス {pid} で実行中',
+                'lastSeen': datetime.now().isoformat(),
+                'pid': pid,
+                'startTime': datetime.fromtimestamp(pid_file.stat().st_mtime).isoformat()
+            })
+        return agents
+
+    def discover(self):
+        agents = self.registered_agents() + self.pidfile_agents()
+        known = {agent['pid'] for agent in agents}
+        # 登録があれば全走査はせず、以前の走査で見つけたプロセスの確認だけ行う
+        cached = self.process_cache.agents(allow_scan=not agents)
+        now = datetime.now().isoformat()
+        for pid, entry in cached.items():
+            if pid in known:
+                continue
+            agent = {key: value for key, value in entry.items() if key != 'startTicks'}
+            agent.update(status='active', lastSeen=now, pid=pid)
+            agents.append(agent)
+        return agents
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Adaptive Cadence
+監視ループ（ブリッジの状態監視・タスク処理・エージェントのメッセージ取得）の待ち時間を負荷に合わせて変える
+
+  処理することがあった      → 次の待ち時間を min_interval に戻す
+  何もなかった              → 待ち時間を backoff_factor 倍にする（max_interval まで）
+  ファイルの変更通知を受けた → 待たずにすぐ次の周回を始める
+  エラー                    → error_interval だけ待つ（変更通知では起きない）
+
+変更通知は watchdog の Observer から受け取る。watchdog がなければタイマーだけで動く。
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+try:
+    from . import metrics
+    from .lazy_import import lazy_import
+except ImportError:
+    import metrics
+    from lazy_import import lazy_import
+
+# 起動を速くするため、使われるまで import しない
+watchdog_observers = lazy_import('watchdog.observers')
+
+# 自分の読み込み（opened など）で起きないよう、内容が変わりうるイベントだけを扱う
+WAKE_EVENT_TYPES = ('created', 'modified', 'moved', 'deleted')
+
+LOOP_INTERVAL = metrics.gauge('orchestra_loop_interval_seconds', 'Next wait of a monitoring loop', ('loop',))
+LOOP_WAKEUPS = metrics.counter('orchestra_loop_wakeups', 'Monitoring loop iterations', ('loop', 'reason'))
+
+
+def load_cadence_config(base_dir, loop):
+    """orchestra.json の cadence 設定のうち loop の分を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('cadence', {}).get(loop, {})
+    except Exception as e:
+        print(f"Error loading cadence config: {e}")
+    return {}
+
+
+def create_observer():
+    """ファイル監視用の Observer（watchdog がなければ None）。watch() で登録してから start() する"""
+    try:
+        observer = watchdog_observers.Observer()
+    except ImportError as e:
+        print(f"⚠️ watchdog unavailable, falling back to timers and polling: {e}")
+        return None
+    observer.daemon = True
+    return observer
+
+
+class _WakeHandler:
+    """watchdog のイベントハンドラー（dispatch だけを使うため watchdog のクラスを継承しない）"""
+
+    def __init__(self, cadence, patterns):
+        self.cadence = cadence
+        self.patterns = patterns
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in WAKE_EVENT_TYPES:
+            return
+        for path in (getattr(event, 'dest_path', None), event.src_path):
+            if path and any(Path(path).match(pattern) for pattern in self.patterns):
+                self.cadence.notify()
+                return
+
+
+class AdaptiveCadence:
+    """ループの次の待ち時間を決め、待っている間のファイル変更通知で起こす"""
+
+    def __init__(self, loop, min_interval=1.0, max_interval=30.0, backoff_factor=2.0, error_interval=10.0):
+        self.loop = loop
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff_factor = max(1.0, backoff_factor)
+        self.error_interval = error_interval
+        self.interval = min_interval
+        self.failing = False
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        LOOP_INTERVAL.set(self.interval, loop=loop)
+
+    @classmethod
+    def from_config(cls, base_dir, loop, **defaults):
+        """cadence.<loop> の設定（なければ defaults）から作成"""
+        config = dict(defaults, **load_cadence_config(base_dir, loop))
+        return cls(loop,
+                   min_interval=config.get('min_interval_seconds', 1.0),
+                   max_interval=config.get('max_interval_seconds', 30.0),
+                   backoff_factor=config.get('backoff_factor', 2.0),
+                   error_interval=config.get('error_interval_seconds', 10.0))
+
+    def watch(self, observer, directory, patterns=('*',)):
+        """directory 内の patterns に一致するファイルが変わったらループを起こす"""
+        if observer is None:
+            return False
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        observer.schedule(_WakeHandler(self, tuple(patterns)), str(directory), recursive=False)
+        return True
+
+    def record(self, active):
+        """今回の周回で処理することがあったか"""
+        self.failing = False
+        if active:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff_factor)
+        LOOP_INTERVAL.set(self.interval, loop=self.loop)
+
+    def failed(self):
+        """周回がエラーで終わった"""
+        self.failing = True
+        LOOP_INTERVAL.set(self.error_interval, loop=self.loop)
+
+    def notify(self):
+        """待っているループをすぐに起こす（どのスレッドからでも呼べる）"""
+        self.wake_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def wait(self):
+        """次の周回まで待つ。変更通知で起きたら True（待ち時間は min_interval に戻る）"""
+        if self.failing:
+            self.stop_event.wait(self.error_interval)
+            LOOP_WAKEUPS.inc(loop=self.loop, reason='error')
+            return False
+        start = time.monotonic()
+        woken = self.wake_event.wait(self.interval)
+        self.wake_event.clear()
+        if self.stopped:
+            return False
+        if woken:
+            # 連続した書き込みを1回の周回にまとめるため min_interval より早くは回らない
+            remaining = self.min_interval - (time.monotonic() - start)
+            if remaining > 0:
+                self.stop_event.wait(remaining)
+            self.wake_event.clear()
+            self.interval = self.min_interval
+            LOOP_INTERVAL.set(self.interval, loop=self.loop)
+        LOOP_WAKEUPS.inc(loop=self.loop, reason='event' if woken else 'timer')
+        return woken
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Durable JSON Files
+一時ファイルへの書き込み→fsync→renameによるアトミックな保存と、
+保存ごとに単調増加するバージョンを記録する変更ジャーナル
+
+バージョンを進めるのは atomic_write_json() で保存する Python 側の書き手だけ。
+ダッシュボード（web-dashboard/src/utils/durableFile.ts）の書き込みはジャーナルに
+記録されないため、変更の検出には stat と組み合わせる（src/startup.py の file_signature）。
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# ジャーナルがこのサイズを超えたら直近 MAX_JOURNAL_ENTRIES 件に切り詰める
+MAX_JOURNAL_BYTES = 256 * 1024
+MAX_JOURNAL_ENTRIES = 1000
+
+# 最新バージョンの読み取り時にジャーナル末尾から読むバイト数
+JOURNAL_TAIL_BYTES = 4096
+
+
+def journal_path(path):
+    """対象ファイルの変更ジャーナル（JSON Lines）"""
+    path = Path(path)
+    return path.with_name(path.name + '.journal')
+
+
+def atomic_write_text(path, text):
+    """同じディレクトリの一時ファイルに書き込んでからrenameで置き換える
+
+    読み手は常に置き換え前か置き換え後の完全な内容を読み、
+    切り詰められた途中のファイルを見ることはない。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # rename自体をディスクに反映させる
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+
+def atomic_write_json(path, data, changed=None, indent=2):
+    """JSONをアトミックに保存し、変更ジャーナルに記録して新しいバージョンを返す
+
+    changed: 変更されたキー（タスクIDなど）の一覧。ジャーナルのエントリに記録される。
+    """
+    text = json.dumps(data, indent=indent, ensure_ascii=False)
+    with open(journal_path(path), 'a+', encoding='utf-8') as journal:
+        fcntl.flock(journal.fileno(), fcntl.LOCK_EX)
+        try:
+            atomic_write_text(path, text)
+            return _append_journal(journal, changed)
+        finally:
+            fcntl.flock(journal.fileno(), fcntl.LOCK_UN)
+
+
+def _append_journal(journal, changed):
+    """ロック済みのジャーナルに次のバージョンを追記"""
+    version = _last_version(_read_tail(journal)) + 1
+
+    entry = {'version': version, 'timestamp': datetime.now().isoformat()}
+    if changed is not None:
+        entry['changed'] = list(changed)
+    line = json.dumps(entry) + '\n'
+
+    journal.seek(0, os.SEEK_END)
+    if journal.tell() > MAX_JOURNAL_BYTES:
+        # 同じinodeのまま切り詰めてロックを保ったままにする
+        journal.seek(0)
+        lines = journal.read().splitlines()[-(MAX_JOURNAL_ENTRIES - 1):]
+        journal.seek(0)
+        journal.truncate()
+        journal.write(''.join(kept + '\n' for kept in lines))
+    journal.write(line)
+    journal.flush()
+    os.fsync(journal.fileno())
+    return version
+
+
+def _read_tail(journal):
+    """ジャーナル末尾の行を読む（先頭の不完全な行は _last_version が読み飛ばす）"""
+    journal.seek(0, os.SEEK_END)
+    size = journal.tell()
+    journal.seek(max(0, size - JOURNAL_TAIL_BYTES))
+    return journal.read().splitlines()
+
+
+def _last_version(lines):
+    for line in reversed(lines):
+        try:
+            return json.loads(line)['version']
+        except (ValueError, KeyError, TypeError):
+            continue
+    return 0
+
+
+def current_version(path):
+    """対象ファイルの最新バージョン（ジャーナル末尾のみを読む。Python 以外の書き込みでは変わらない）"""
+    try:
+        with open(journal_path(path), 'r', encoding='utf-8', errors='ignore') as journal:
+            return _last_version(_read_tail(journal))
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Event Delivery
+ダッシュボード（/api/websocket）へのイベント送信キュー
+
+send() はバッファに積むだけで戻り、送信スレッドが keep-alive の接続で複数のイベントを
+1回の POST（`{"type": "batch", "events": [...]}`）にまとめて送る。
+- まとめられるイベント（エージェント状態の差分など）は未送信のものと新しいものを1件にまとめる
+  （coalesce_events: イベント名 → merge(未送信のデータ, 新しいデータ)）
+- バッファが max_buffer_events を超えたら drop_policy に従って捨てる
+- 送信に失敗したバッチはバッファの先頭に戻し、指数バックオフで再送する
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import urlsplit
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+POST_SECONDS = metrics.histogram('orchestra_bridge_post_seconds', 'Dashboard POST latency', ('event',))
+POST_ERRORS = metrics.counter('orchestra_bridge_post_errors', 'Failed dashboard POSTs', ('event',))
+EVENTS_DELIVERED = metrics.counter('orchestra_bridge_events_delivered', 'Events delivered to the dashboard')
+EVENTS_DROPPED = metrics.counter('orchestra_bridge_events_dropped', 'Events dropped because the buffer was full')
+EVENTS_COALESCED = metrics.counter('orchestra_bridge_events_coalesced',
+                                   'Undelivered events merged into a newer one', ('event',))
+BUFFERED_EVENTS = metrics.gauge('orchestra_bridge_buffered_events', 'Events waiting to be delivered')
+
+
+def load_delivery_config(base_dir):
+    """orchestra.json の event_delivery 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('event_delivery', {})
+    except Exception as e:
+        print(f"Error loading event delivery config: {e}")
+    return {}
+
+
+class DeliveryError(Exception):
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class EventDelivery:
+    """バッファ付きの非同期イベント送信"""
+
+    def __init__(self, url, coalesce_events=None, max_buffer_events=1000, max_batch_events=100,
+                 linger_seconds=0.05, drop_policy=DROP_OLDEST, timeout_seconds=5,
+                 initial_backoff_seconds=0.5, max_backoff_seconds=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port
+        self.path = parts.path or '/'
+        self.coalesce_events = dict(coalesce_events or {})
+        self.max_buffer_events = max_buffer_events
+        self.max_batch_events = max_batch_events
+        self.linger_seconds = linger_seconds
+        self.drop_policy = drop_policy
+        self.timeout_seconds = timeout_seconds
+        self.initial_backoff_seconds = initial_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        # [event, data] のリスト。まとめられるイベントは snapshots から同じリストを参照して書き換える
+        self.buffer = deque()
+        self.snapshots = {}
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.in_flight = 0
+        self.connection = None
+        # 古いダッシュボードが batch を受け付けなければ1件ずつ送る
+        self.batch_supported = True
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name='event-delivery')
+        self.thread.start()
+        return self
+
+    def send(self, event, data):
+        """イベントをバッファに積む（HTTPの完了は待たない）。捨てた場合は False"""
+        with self.condition:
+            if event in self.coalesce_events:
+                pending = self.snapshots.get(event)
+                if pending is not None:
+                    pending[1] = self.coalesce_events[event](pending[1], data)
+                    EVENTS_COALESCED.inc(event=event)
+                    return True
+            if len(self.buffer) >= self.max_buffer_events:
+                EVENTS_DROPPED.inc()
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                self._forget(self.buffer.popleft())
+            item = [event, data]
+            self.buffer.append(item)
+            if event in self.coalesce_events:
+                self.snapshots[event] = item
+            BUFFERED_EVENTS.set(len(self.buffer))
+            self.condition.notify()
+        return True
+
+    def _forget(self, item):
+        if self.snapshots.get(item[0]) is item:
+            del self.snapshots[item[0]]
+
+    def _take_batch(self):
+        batch = []
+        while self.buffer and len(batch) < self.max_batch_events:
+            item = self.buffer.popleft()
+            self._forget(item)
+            batch.append(item)
+        self.in_flight = len(batch)
+        BUFFERED_EVENTS.set(len(self.buffer))
+        return batch
+
+    def _requeue(self, batch):
+        """送信に失敗したバッチを先頭に戻す（同じイベントが送信待ちならそちらにまとめる）"""
+        with self.condition:
+            for item in reversed(batch):
+                event = item[0]
+                if event in self.coalesce_events:
+                    pending = self.snapshots.get(event)
+                    if pending is not None:
+                        pending[1] = self.coalesce_events[event](item[1], pending[1])
+                        continue
+                    self.snapshots[event] = item
+                if len(self.buffer) >= self.max_buffer_events:
+                    EVENTS_DROPPED.inc()
+                    continue
+                self.buffer.appendleft(item)
+            self.in_flight = 0
+            BUFFERED_EVENTS.set(len(self.buffer))
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self.condition:
+                while not self.buffer and not self.stopping:
+                    self.condition.wait()
+                if not self.buffer:
+                    break
+            # 短時間待って後続のイベントを同じバッチにまとめる
+            if self.linger_seconds and not self.stopping and len(self.buffer) < self.max_batch_events:
+                time.sleep(self.linger_seconds)
+            with self.condition:
+                batch = self._take_batch()
+            try:
+                try:
+                    self._deliver(batch)
+                except DeliveryError:
+                    raise
+                except Exception as e:
+                    self.close()
+                    raise DeliveryError(f"{type(e).__name__}: {e}")
+                EVENTS_DELIVERED.inc(len(batch))
+                backoff = 0.0
+            except DeliveryError as e:
+                if not e.retryable:
+                    print(f"WebSocket送信失敗（破棄）: {e}")
+                    continue
+                self._requeue(batch)
+                backoff = min(self.max_backoff_seconds, max(self.initial_backoff_seconds, backoff * 2))
+                print(f"WebSocket送信エラー: {e}（{backoff:.1f}秒後に再送）")
+                # 停止要求があれば待たずに最後の送信を試みる
+                with self.condition:
+                    self.condition.wait_for(lambda: self.stopping, backoff * random.uniform(0.8, 1.2))
+                    if self.stopping and backoff >= self.max_backoff_seconds:
+                        break
+            finally:
+                with self.condition:
+                    self.in_flight = 0
+                    self.condition.notify_all()
+        self.close()
+
+    def _deliver(self, batch):
+        batch_rejected = False
+        if len(batch) > 1 and self.batch_supported:
+            payload = {'type': 'batch', 'events': [{'event': event, 'data': data} for event, data in batch]}
+            try:
+                return self._post(payload, 'batch')
+            except DeliveryError as e:
+                if e.retryable:
+                    raise
+                batch_rejected = True
+        for index, (event, data) in enumerate(batch):
+            try:
+                self._post({'type': 'broadcast', 'event': event, 'data': data}, event)
+                if batch_rejected:
+                    # 1件ずつなら受け付けられる（batch に未対応の）ダッシュボード
+                    print("ダッシュボードが batch に未対応のため1件ずつ送信します")
+                    self.batch_supported = batch_rejected = False
+            except DeliveryError as e:
+                if e.retryable:
+                    # 送信済みの分は再送しない
+                    del batch[:index]
+                    raise
+                print(f"WebSocket送信失敗（破棄）: {event}: {e}")
+
+    def _post(self, payload, label):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout_seconds)
+            self.connection.request('POST', self.path, body=body, headers={
+                'Content-Type': 'application/json',
+                'Connection': 'keep-alive'
+            })
+            response = self.connection.getresponse()
+            # 接続を再利用するためにレスポンスを読み切る
+            response.read()
+            if response.will_close:
+                self.close()
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            POST_ERRORS.inc(event=label)
+            raise DeliveryError(str(e) or type(e).__name__)
+        finally:
+            POST_SECONDS.observe(time.perf_counter() - start, event=label)
+        if response.status >= 500 or response.status == 429:
+            POST_ERRORS.inc(event=label)
+            raise DeliveryError(f"HTTP {response.status}")
+        if response.status >= 400:
+            POST_ERRORS.inc(event=label)
+            raise DeliveryError(f"HTTP {response.status}", retryable=False)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def flush(self, timeout=None):
+        """バッファが空になり送信中のバッチがなくなるまで待つ"""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.buffer and not self.in_flight, timeout)
+
+    def stop(self, timeout=5):
+        """残りのイベントを timeout 秒まで送ってから停止（接続は送信スレッドが閉じる）"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Message IDs
+時刻順にソート可能で、プロセス間でも衝突しないメッセージID（ULID形式）
+"""
+
+import bisect
+import os
+import re
+import secrets
+import threading
+import time
+
+# Crockford Base32（辞書順 = 数値順）
+ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+TIME_LENGTH = 10
+RANDOM_LENGTH = 16
+RANDOM_BITS = 80
+
+# ULID 以前の ID（task-<ミリ秒>-<乱数>、msg-<ミリ秒>）に含まれる生成時刻
+LEGACY_TIME_PATTERN = re.compile(r'(?<!\d)(\d{13})(?!\d)')
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(ENCODING[remainder])
+    return ''.join(reversed(chars))
+
+
+def _decode(text):
+    value = 0
+    for char in text:
+        value = value * 32 + ENCODING.index(char)
+    return value
+
+
+class MonotonicIdGenerator:
+    """48bitのミリ秒時刻 + 80bitの乱数からなる26文字のID
+
+    同じミリ秒内では乱数部を1ずつ増やすため、同一プロセス内では
+    生成順に必ず大きくなる。プロセス間の衝突は乱数部で回避する。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.last_ms = 0
+        self.last_random = 0
+
+    def new_id(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                # fork後は親プロセスと同じ乱数列を使わない
+                self.pid = os.getpid()
+                self.last_ms = 0
+
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self.last_ms:
+                self.last_ms = now_ms
+                self.last_random = secrets.randbits(RANDOM_BITS)
+            else:
+                # 同じミリ秒（または時計の巻き戻り）: 直前のIDより大きくする
+                self.last_random += 1
+                if self.last_random >= 1 << RANDOM_BITS:
+                    self.last_ms += 1
+                    self.last_random = 0
+            return _encode(self.last_ms, TIME_LENGTH) + _encode(self.last_random, RANDOM_LENGTH)
+
+
+_generator = MonotonicIdGenerator()
+
+
+def new_id(prefix=''):
+    """新しいメッセージIDを生成"""
+    return prefix + _generator.new_id()
+
+
+def id_timestamp(message_id, prefix=''):
+    """IDに含まれる生成時刻（UNIX秒）。ULID形式でなければ None"""
+    body = message_id[len(prefix):] if prefix and message_id.startswith(prefix) else message_id
+    if len(body) != TIME_LENGTH + RANDOM_LENGTH or any(char not in ENCODING for char in body):
+        return None
+    return _decode(body[:TIME_LENGTH]) / 1000
+
+
+def lower_bound_id(timestamp, prefix=''):
+    """指定時刻以降に生成されたIDはすべてこれ以上になる（範囲検索の開始位置）"""
+    return prefix + _encode(int(timestamp * 1000), TIME_LENGTH) + ENCODING[0] * RANDOM_LENGTH
+
+
+def sort_key(message_id):
+    """時刻順に並べるためのキー (生成時刻のミリ秒, ID)
+
+    末尾26文字が ULID ならその時刻、旧形式の ID なら含まれる13桁のミリ秒を使うので、
+    接頭辞の違う ID や ULID 以前の ID が混在しても生成時刻順に並ぶ（時刻を含まない ID は先頭）。
+    """
+    body = message_id[-(TIME_LENGTH + RANDOM_LENGTH):]
+    if len(body) == TIME_LENGTH + RANDOM_LENGTH and all(char in ENCODING for char in body):
+        return _decode(body[:TIME_LENGTH]), message_id
+    match = LEGACY_TIME_PATTERN.search(message_id)
+    return (int(match.group(1)) if match else 0), message_id
+
+
+def range_bounds(sorted_ids, after=None, until=None):
+    """sort_key 順に並んだID列で after より後、until 以下となる範囲 (start, end) を二分探索で求める"""
+    start = bisect.bisect_right(sorted_ids, sort_key(after), key=sort_key) if after is not None else 0
+    end = (bisect.bisect_right(sorted_ids, sort_key(until), key=sort_key)
+           if until is not None else len(sorted_ids))
+    return start, max(start, end)
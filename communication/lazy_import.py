@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Lazy Import
+重いモジュールの import を最初に使われるときまで遅らせる
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """最初の属性アクセスで import されるモジュールの代理"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    @property
+    def loaded(self):
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
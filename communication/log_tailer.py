@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Log Tailer
+logs/*.log に追記された行だけを読み、ダッシュボード用のログエントリにする
+
+ファイルごとに (inode, 読み込み済みのバイト位置) を保持し、起動時は末尾から読み始める
+（過去の内容は読み直さない）。inode が変わったらローテーション、サイズが位置より
+小さくなったら切り詰めとみなして先頭から読む。書きかけの行は次の読み込みまで持ち越す。
+
+変更の通知は watchdog の Observer から受け取り、watchdog がなければ poll_interval_seconds
+ごとにファイルの状態を確認する。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+# task_processor.save_task_log の形式: [時刻] エージェント: メッセージ [traceparent=...]
+LOG_LINE_PATTERN = re.compile(r'^\[([^\]]+)\] ([^:]+): (.+)$')
+TRACE_SUFFIX_PATTERN = re.compile(r'\s\[traceparent=00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}\]$')
+AGENT_TYPES = ('producer', 'director', 'actor', 'system')
+
+LOG_LINES = metrics.counter('orchestra_bridge_log_lines', 'Log lines streamed to the dashboard')
+LOG_READ_SECONDS = metrics.histogram('orchestra_bridge_log_read_seconds',
+                                     'Time to read and parse newly appended log lines')
+
+
+def load_log_streaming_config(base_dir):
+    """orchestra.json の log_streaming 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('log_streaming', {})
+    except Exception as e:
+        print(f"Error loading log streaming config: {e}")
+    return {}
+
+
+def log_level(message):
+    lowered = message.lower()
+    if 'error' in lowered or 'エラー' in message or '❌' in message:
+        return 'error'
+    if 'warn' in lowered or '⚠️' in message:
+        return 'warn'
+    return 'info'
+
+
+def parse_log_line(line, path, entry_id):
+    """1行をダッシュボードの AgentLog 形式にする"""
+    stem = Path(path).stem
+    entry = {'id': entry_id, 'source': Path(path).name}
+    if stem.startswith('task-'):
+        # タスクID（task-<時刻>-<乱数>）がそのままファイル名になる（logs/{task_id}.log）
+        entry['taskId'] = stem
+    match = LOG_LINE_PATTERN.match(line)
+    if match:
+        timestamp, agent, message = match.group(1), match.group(2).strip(), match.group(3)
+    else:
+        timestamp, agent, message = datetime.now().isoformat(), stem.split('-')[0], line
+    trace = TRACE_SUFFIX_PATTERN.search(message)
+    if trace:
+        message = message[:trace.start()]
+        entry.update(traceId=trace.group(1), spanId=trace.group(2))
+    entry.update(
+        timestamp=timestamp,
+        agentType=agent if agent in AGENT_TYPES else 'system',
+        agentId=agent,
+        message=message,
+        level=log_level(message)
+    )
+    return entry
+
+
+class _FileState:
+    __slots__ = ('inode', 'offset', 'partial')
+
+    def __init__(self, inode, offset):
+        self.inode = inode
+        self.offset = offset
+        self.partial = b''
+
+
+class _ObserverHandler:
+    """watchdog のイベントハンドラー（dispatch だけを使うため watchdog のクラスを継承しない）"""
+
+    def __init__(self, tailer):
+        self.tailer = tailer
+
+    def dispatch(self, event):
+        if event.is_directory:
+            return
+        for path in (getattr(event, 'dest_path', None), event.src_path):
+            if path:
+                self.tailer.notify(path)
+
+
+class LogTailer:
+    """追記された行を batch_window_seconds ごとにまとめて on_entries(entries) に渡す"""
+
+    def __init__(self, logs_dir, on_entries, pattern='*.log', batch_window_seconds=0.02,
+                 poll_interval_seconds=0.5, max_read_bytes=1024 * 1024):
+        self.logs_dir = Path(logs_dir)
+        self.on_entries = on_entries
+        self.pattern = pattern
+        self.batch_window_seconds = batch_window_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_read_bytes = max_read_bytes
+        self.files = {}
+        self.dirty = set()
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.observer = None
+        self.thread = None
+
+    def start(self, observer=None):
+        """既存のファイルは末尾から読み始める。observer があれば logs_dir を監視させる"""
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.logs_dir.glob(self.pattern):
+            try:
+                stat = path.stat()
+                self.files[str(path)] = _FileState(stat.st_ino, stat.st_size)
+            except OSError:
+                continue
+        if observer is not None:
+            observer.schedule(_ObserverHandler(self), str(self.logs_dir), recursive=False)
+            observer.start()
+            self.observer = observer
+        self.thread = threading.Thread(target=self._run, daemon=True, name='log-tailer')
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+        if self.thread:
+            self.thread.join()
+
+    def notify(self, path):
+        """ファイルが変更された（Observer のスレッドから呼ばれる）"""
+        if not Path(path).match(self.pattern):
+            return
+        with self.condition:
+            self.dirty.add(str(path))
+            self.condition.notify()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            with self.condition:
+                if not self.dirty:
+                    self.condition.wait(None if self.observer else self.poll_interval_seconds)
+                if self.stop_event.is_set():
+                    return
+            if self.observer is None:
+                self._poll()
+            # 同時に書き込まれた行を1回の送信にまとめる
+            if self.batch_window_seconds:
+                self.stop_event.wait(self.batch_window_seconds)
+            with self.condition:
+                paths, self.dirty = self.dirty, set()
+            if paths:
+                self.read_paths(sorted(paths))
+
+    def _poll(self):
+        """Observer がないときはサイズ・inode の変化で変更を検出する"""
+        for path in self.logs_dir.glob(self.pattern):
+            key = str(path)
+            state = self.files.get(key)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if state is None or state.inode != stat.st_ino or state.offset != stat.st_size:
+                with self.condition:
+                    self.dirty.add(key)
+
+    def read_paths(self, paths):
+        start = time.perf_counter()
+        entries = []
+        for path in paths:
+            try:
+                entries.extend(self.read_new_lines(path))
+            except Exception as e:
+                print(f"ログ読み込みエラー ({path}): {e}")
+        LOG_READ_SECONDS.observe(time.perf_counter() - start)
+        if entries:
+            LOG_LINES.inc(len(entries))
+            try:
+                self.on_entries(entries)
+            except Exception as e:
+                print(f"ログ送信エラー: {e}")
+        return entries
+
+    def read_new_lines(self, path):
+        """前回の位置から末尾までの完全な行を読む"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.files.pop(path, None)
+            return []
+        state = self.files.get(path)
+        if state is None or state.inode != stat.st_ino or stat.st_size < state.offset:
+            # 新しいファイル・ローテーション・切り詰め
+            state = self.files[path] = _FileState(stat.st_ino, 0)
+        if stat.st_size == state.offset:
+            return []
+
+        with open(path, 'rb') as f:
+            f.seek(state.offset)
+            chunk = f.read(self.max_read_bytes)
+        # 読み残しがあれば次回に続きを読む
+        if state.offset + len(chunk) < stat.st_size:
+            self.notify(path)
+
+        # 各行のIDは「ファイル名-inode-行の開始位置」（同じ行を二重に送っても受信側で判別できる）
+        line_offset = state.offset - len(state.partial)
+        state.offset += len(chunk)
+        lines = (state.partial + chunk).split(b'\n')
+        state.partial = lines.pop()
+
+        stem = Path(path).stem
+        entries = []
+        for raw in lines:
+            line = raw.decode('utf-8', errors='replace').rstrip('\r')
+            if line.strip():
+                entries.append(parse_log_line(line, path, f'{stem}-{state.inode}-{line_offset}'))
+            line_offset += len(raw) + 1
+        return entries
@@ -13,6 +13,24 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 import queue
 import fcntl
+from contextlib import contextmanager
+
+try:
+    from . import metrics, tracing
+    from .durable import atomic_write_json, current_version
+    from .ids import new_id, range_bounds, sort_key
+    from .profiler import install_profiler
+except ImportError:
+    import metrics
+    import tracing
+    from durable import atomic_write_json, current_version
+    from ids import new_id, range_bounds, sort_key
+    from profiler import install_profiler
+
+MESSAGES_SENT = metrics.counter('orchestra_hub_messages_sent', 'Messages appended to agent inboxes')
+INBOX_APPEND_SECONDS = metrics.histogram('orchestra_hub_inbox_append_seconds',
+                                         'Inbox read-modify-write duration (including lock wait)')
+INBOX_SIZE = metrics.gauge('orchestra_hub_inbox_size', 'Messages stored in an agent inbox', ('agent',))
 
 
 class MessageHub:
@@ -51,7 +69,7 @@ class MessageHub:
     def send_message(self, from_agent: str, to_agent: str, message_type: str, content: Any, priority: str = "normal"):
         """メッセージを送信"""
         message = {
-            'id': f"{int(time.time() * 1000)}_{from_agent}_{to_agent}",
+            'id': new_id(),
             'timestamp': datetime.now().isoformat(),
             'from': from_agent,
             'to': to_agent,
@@ -61,6 +79,11 @@ class MessageHub:
             'status': 'pending'
         }
         
+        # 送信側のトレースを受信側に引き継ぐ
+        traceparent = tracing.current_traceparent()
+        if traceparent:
+            message['traceparent'] = traceparent
+        
         # 受信者のinboxに追加
         inbox_file = self.messages_dir / f"{to_agent}_inbox.json"
         self._append_to_inbox(inbox_file, message)
@@ -89,9 +112,12 @@ class MessageHub:
         if not inbox_file.exists():
             return []
         
-        messages = self._read_json_file(inbox_file)
+        if not mark_as_read:
+            return self._read_json_file(inbox_file)
         
-        if mark_as_read:
+        with self._locked(inbox_file):
+            messages = self._read_json_file(inbox_file)
+            
             # 既読マークをつけて更新
             for msg in messages:
                 if msg['status'] == 'pending':
@@ -102,6 +128,16 @@ class MessageHub:
         
         return messages
     
+    def inbox_version(self, agent_id: str) -> int:
+        """インボックスの変更バージョン（変化がなければ読み直す必要はない）"""
+        return current_version(self.messages_dir / f"{agent_id}_inbox.json")
+    
+    def get_messages_after(self, agent_id: str, cursor: Optional[str] = None) -> List[Dict]:
+        """カーソル（最後に受け取ったメッセージID）より後のメッセージを取得"""
+        messages = self.get_messages(agent_id, mark_as_read=False)
+        start, end = range_bounds([msg['id'] for msg in messages], after=cursor)
+        return messages[start:end]
+    
     def get_unread_messages(self, agent_id: str) -> List[Dict]:
         """未読メッセージのみを取得"""
         messages = self.get_messages(agent_id, mark_as_read=False)
@@ -157,34 +193,44 @@ class MessageHub:
         cutoff_time = datetime.now().timestamp() - (hours * 3600)
         
         for inbox_file in self.messages_dir.glob("*_inbox.json"):
-            messages = self._read_json_file(inbox_file)
-            cleaned_messages = []
-            
-            for msg in messages:
-                msg_time = datetime.fromisoformat(msg['timestamp']).timestamp()
-                if msg_time > cutoff_time:
-                    cleaned_messages.append(msg)
-            
-            if len(cleaned_messages) != len(messages):
-                self._write_json_file(inbox_file, cleaned_messages)
+            # 読み込み中に追加されたメッセージを古い内容で上書きしないよう、追加・既読と同じロック下で行う
+            with self._locked(inbox_file):
+                messages = self._read_json_file(inbox_file)
+                cleaned_messages = []
+                
+                for msg in messages:
+                    msg_time = datetime.fromisoformat(msg['timestamp']).timestamp()
+                    if msg_time > cutoff_time:
+                        cleaned_messages.append(msg)
+                
+                if len(cleaned_messages) != len(messages):
+                    self._write_json_file(inbox_file, cleaned_messages)
+    
+    @contextmanager
+    def _locked(self, file_path: Path):
+        """読み込み→更新→書き込みを排他する（本体はrenameで置き換わるため別ファイルをロック）"""
+        with open(file_path.with_name(file_path.name + '.lock'), 'a') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
     
     def _append_to_inbox(self, inbox_file: Path, message: Dict):
         """インボックスファイルにメッセージを追加（ファイルロック付き）"""
-        try:
-            with open(inbox_file, 'r+') as f:
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    messages = json.load(f)
-                except json.JSONDecodeError:
-                    messages = []
-                
-                messages.append(message)
-                
-                f.seek(0)
-                json.dump(messages, f, indent=2)
-                f.truncate()
-        except FileNotFoundError:
-            self._write_json_file(inbox_file, [message])
+        with INBOX_APPEND_SECONDS.time(), self._locked(inbox_file):
+            messages = self._read_json_file(inbox_file)
+            
+            # 生成時刻順（同時刻はID順）に並べておき、カーソルからの範囲検索を二分探索で行えるようにする
+            # （ULID 以前の ID が残っていても文字列比較では並べない）
+            key = sort_key(message['id'])
+            position = len(messages)
+            while position > 0 and sort_key(messages[position - 1]['id']) > key:
+                position -= 1
+            messages.insert(position, message)
+            self._write_json_file(inbox_file, messages)
+        MESSAGES_SENT.inc()
+        INBOX_SIZE.set(len(messages), agent=inbox_file.name[:-len('_inbox.json')])
     
     def _read_json_file(self, file_path: Path) -> Any:
         """JSONファイルを安全に読み込み"""
@@ -195,9 +241,8 @@ class MessageHub:
             return [] if file_path.name.endswith('_inbox.json') else {}
     
     def _write_json_file(self, file_path: Path, data: Any):
-        """JSONファイルを安全に書き込み"""
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        """JSONファイルをアトミックに書き込み（読み手が書きかけの内容を見ることはない）"""
+        atomic_write_json(file_path, data)
     
     def _log_system_event(self, event: str):
         """システムイベントをログに記録"""
@@ -221,6 +266,8 @@ def main():
     
     communication_dir = sys.argv[1]
     hub = MessageHub(communication_dir)
+    exporter = metrics.start_metrics_exporter(Path(communication_dir).resolve().parent, 'message_hub')
+    install_profiler(Path(communication_dir).resolve().parent, 'message_hub')
     
     print(f"Message Hub started in {communication_dir}")
     print("Press Ctrl+C to stop")
@@ -229,6 +276,8 @@ def main():
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        if exporter:
+            exporter.stop()
         print("\nMessage Hub stopped")
 
 
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Metrics
+プロセス内のカウンター・ゲージ・ヒストグラムのレジストリ
+
+計測側は値を更新するだけ（ロック1回と加算のみ）で、テキスト化は
+/metrics へのアクセスかスナップショットの書き出し時にしか行わない。
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    from .durable import atomic_write_text
+except ImportError:
+    from durable import atomic_write_text
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """ラベルの値の組ごとに値を持つメトリクス"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help_text='', labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if not self.labelnames and not labels:
+            return ()
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple([str(labels[name]) for name in self.labelnames])
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+
+    def _labels(self, key, *extra):
+        return tuple(zip(self.labelnames, key)) + extra
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            return [(self.name + '_total', self._labels(key), value) for key, value in self.values.items()]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, self._labels(key), value) for key, value in self.values.items()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text='', labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # [バケットごとの件数..., +Inf の件数], 合計
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """ブロックの実行時間（秒）を記録"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self.lock:
+            states = [(key, list(counts), total) for key, (counts, total) in self.values.items()]
+        samples = []
+        for key, counts, total in states:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', self._labels(key, ('le', _format_value(bound))), cumulative))
+            samples.append((self.name + '_sum', self._labels(key), total))
+            samples.append((self.name + '_count', self._labels(key), cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """メトリクスの登録（同じ名前なら既存のものを返す）と出力"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text='', labelnames=()):
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text='', labelnames=()):
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text='', labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render_prometheus(self):
+        """Prometheus テキスト形式（version 0.0.4）"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """JSONスナップショット用の辞書"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        result = {}
+        for metric in metrics:
+            result[metric.name] = {
+                'type': metric.kind,
+                'help': metric.help,
+                'samples': [{'name': name, 'labels': dict(labels), 'value': value}
+                            for name, labels, value in metric.samples()]
+            }
+        return result
+
+
+# プロセス全体で共有するレジストリ
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, help_text='', labelnames=()):
+    return REGISTRY.counter(name, help_text, labelnames)
+
+
+def gauge(name, help_text='', labelnames=()):
+    return REGISTRY.gauge(name, help_text, labelnames)
+
+
+def histogram(name, help_text='', labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.histogram(name, help_text, labelnames, buckets)
+
+
+def load_metrics_config(base_dir):
+    """orchestra.json の metrics 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('metrics', {})
+    except Exception as e:
+        print(f"Error loading metrics config: {e}")
+    return {}
+
+
+class MetricsExporter:
+    """ローカルの HTTP エンドポイント（/metrics, /metrics.json）と定期的なJSONスナップショット"""
+
+    def __init__(self, component, registry=REGISTRY, host='127.0.0.1', port=None,
+                 snapshot_file=None, snapshot_interval_seconds=15):
+        self.component = component
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.snapshot_file = Path(snapshot_file) if snapshot_file else None
+        self.snapshot_interval_seconds = snapshot_interval_seconds
+        self.server = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        if self.port is not None:
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+                self.server.daemon_threads = True
+                threading.Thread(target=self.server.serve_forever, daemon=True,
+                                 name=f'metrics-http-{self.component}').start()
+                print(f"📈 Metrics endpoint: http://{self.host}:{self.server.server_address[1]}/metrics")
+            except OSError as e:
+                print(f"⚠️ Metrics endpoint unavailable on {self.host}:{self.port}: {e}")
+                self.server = None
+        if self.snapshot_file:
+            threading.Thread(target=self._snapshot_loop, daemon=True,
+                             name=f'metrics-snapshot-{self.component}').start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        self.write_snapshot()
+
+    def snapshot(self):
+        return {
+            'component': self.component,
+            'timestamp': datetime.now().isoformat(),
+            'metrics': self.registry.snapshot()
+        }
+
+    def write_snapshot(self):
+        if not self.snapshot_file:
+            return
+        try:
+            atomic_write_text(self.snapshot_file, json.dumps(self.snapshot(), indent=2, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def _snapshot_loop(self):
+        while not self.stop_event.wait(self.snapshot_interval_seconds):
+            self.write_snapshot()
+
+    def _handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body = exporter.registry.render_prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body = json.dumps(exporter.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # スクレイプごとのアクセスログは出さない
+                pass
+
+        return Handler
+
+
+def start_metrics_exporter(base_dir, component, http=True):
+    """orchestra.json の metrics 設定に従ってエクスポーターを起動（無効なら None）"""
+    config = load_metrics_config(base_dir)
+    if not config.get('enabled', False):
+        return None
+    port = config.get('ports', {}).get(component) if http else None
+    snapshot_dir = config.get('snapshot_dir')
+    snapshot_file = Path(base_dir) / snapshot_dir / f'{component}.json' if snapshot_dir else None
+    return MetricsExporter(
+        component,
+        host=config.get('host', '127.0.0.1'),
+        port=port,
+        snapshot_file=snapshot_file,
+        snapshot_interval_seconds=config.get('snapshot_interval_seconds', 15)
+    ).start()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Profiler
+常駐プロセスをシグナルで外からプロファイルする
+
+  kill -USR1 <pid>   # 計測開始（duration_seconds 経過で自動停止）
+  kill -USR2 <pid>   # 計測停止して結果を書き出す
+
+全スレッドのスタックを sample_rate_hz で採取し、flamegraph.pl / speedscope で読める
+collapsed 形式（`スレッド;関数;関数 件数`）と、同じサンプルから作った pstats 形式（.prof）を出力する。
+cProfile は有効にしたスレッドしか計測しないため使わない（ワークフローやワーカーのスレッドが抜ける）。
+"""
+
+import json
+import marshal
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from .durable import atomic_write_text
+except ImportError:
+    from durable import atomic_write_text
+
+
+def _frame_label(function):
+    filename, line, name = function
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _thread_function(name):
+    """pstats 上でスレッドを表す呼び出し元（組み込み関数と同じく filename は '~'）"""
+    return ('~', 0, f'<thread {name}>')
+
+
+class SamplingProfiler:
+    """全スレッドのスタックを一定間隔で採取する"""
+
+    def __init__(self, sample_rate_hz=100, max_depth=128):
+        self.interval = 1.0 / sample_rate_hz
+        self.max_depth = max_depth
+        # (スレッド名, 根から葉への (ファイル, 行, 関数名) の列) → サンプル数
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started_at = None
+        self.stopped_at = None
+
+    def start(self):
+        self.stop_event.clear()
+        self.started_at = time.monotonic()
+        self.thread = threading.Thread(target=self._run, daemon=True, name='sampling-profiler')
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.stopped_at = time.monotonic()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[names.get(ident, f'thread-{ident}'), tuple(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """flamegraph 互換の collapsed stacks"""
+        return ''.join(f"{';'.join([thread] + [_frame_label(function) for function in stack])} {count}\n"
+                       for (thread, stack), count in self.stacks.most_common())
+
+    def pstats(self):
+        """pstats.Stats で読める統計（呼び出し回数はサンプル数、時間はサンプル数 × 採取間隔）"""
+        stats = {}
+
+        def add(function, caller, count, own, seen):
+            cc, nc, tt, ct, callers = stats.get(function) or (0, 0, 0.0, 0.0, {})
+            elapsed = count * self.interval
+            tt += elapsed if own else 0.0
+            # 再帰していても累積時間は1サンプルにつき1回だけ数える
+            ct += elapsed if function not in seen else 0.0
+            if caller is not None:
+                c_cc, c_nc, c_tt, c_ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (c_cc + count, c_nc + count,
+                                   c_tt + (elapsed if own else 0.0), c_ct + elapsed)
+            stats[function] = (cc + count, nc + count, tt, ct, callers)
+            seen.add(function)
+
+        for (thread, stack), count in self.stacks.items():
+            path = (_thread_function(thread),) + stack
+            seen = set()
+            for depth, function in enumerate(path):
+                add(function, path[depth - 1] if depth else None, count, depth == len(path) - 1, seen)
+        return stats
+
+
+class SignalProfiler:
+    """SIGUSR1 / SIGUSR2 でサンプリングプロファイラを開始・停止する"""
+
+    def __init__(self, component, output_dir, duration_seconds=30, sample_rate_hz=100):
+        self.component = component
+        self.output_dir = Path(output_dir)
+        self.duration_seconds = duration_seconds
+        self.sample_rate_hz = sample_rate_hz
+        self.sampler = None
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def install(self):
+        """シグナルハンドラーを登録（メインスレッドから呼ぶ）"""
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.start())
+        signal.signal(signal.SIGUSR2, lambda signum, frame: self.stop())
+        print(f"🔬 Profiler ready: kill -USR1 {os.getpid()} to start, kill -USR2 {os.getpid()} to stop")
+        return self
+
+    @property
+    def active(self):
+        return self.sampler is not None
+
+    def start(self):
+        with self.lock:
+            if self.sampler:
+                return
+            self.sampler = SamplingProfiler(self.sample_rate_hz)
+            self.sampler.start()
+            if self.duration_seconds:
+                self.timer = threading.Timer(self.duration_seconds, self.stop)
+                self.timer.daemon = True
+                self.timer.start()
+        print(f"🔬 Profiling started ({self.sample_rate_hz} Hz, up to {self.duration_seconds}s)")
+
+    def stop(self):
+        with self.lock:
+            if not self.sampler:
+                return None
+            sampler = self.sampler
+            self.sampler = None
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+        sampler.stop()
+        return self.write(sampler)
+
+    def write(self, sampler):
+        """collapsed stacks・pstats 形式の統計・概要を書き出す"""
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            base = self.output_dir / f"{self.component}-{os.getpid()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            collapsed_file = base.with_suffix('.collapsed')
+            pstats_file = base.with_suffix('.prof')
+            atomic_write_text(collapsed_file, sampler.collapsed())
+            with open(pstats_file, 'wb') as f:
+                marshal.dump(sampler.pstats(), f)
+            atomic_write_text(base.with_suffix('.json'), json.dumps({
+                'component': self.component,
+                'pid': os.getpid(),
+                'duration_seconds': round(sampler.stopped_at - sampler.started_at, 3),
+                'sample_rate_hz': self.sample_rate_hz,
+                'samples': sampler.samples,
+                'collapsed': collapsed_file.name,
+                'pstats': pstats_file.name
+            }, indent=2, ensure_ascii=False))
+            print(f"🔬 Profile written: {collapsed_file} ({sampler.samples} samples), {pstats_file}")
+            return collapsed_file
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            return None
+
+
+def install_profiler(base_dir, component):
+    """orchestra.json の profiling 設定に従ってシグナルハンドラーを登録（無効なら None）"""
+    config = {}
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f).get('profiling', {})
+    except Exception as e:
+        print(f"Error loading profiling config: {e}")
+    if not config.get('enabled', False) or threading.current_thread() is not threading.main_thread():
+        return None
+    return SignalProfiler(
+        component,
+        Path(base_dir) / config.get('output_dir', './logs/profiles'),
+        duration_seconds=config.get('duration_seconds', 30),
+        sample_rate_hz=config.get('sample_rate_hz', 100)
+    ).install()
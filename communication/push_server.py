@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Push Server
+ブラウザが直接接続できる WebSocket サーバー（asyncio、RFC 6455 のテキストフレームのみ）
+
+Next.js の /api/websocket を経由せずにブリッジのイベントをクライアントに送る。
+
+  サーバー → クライアント  {"event": "log", "data": {...}}
+  クライアント → サーバー  {"type": "subscribe", "events": ["log", "agentsDelta"],
+                            "filters": {"taskIds": [...], "agentTypes": [...], "levels": [...], "projects": [...]},
+                            "rateLimit": {"linesPerSecond": 20, "burst": 50}}
+                           {"type": "unsubscribe", "events": ["log"]}
+                           {"type": "requestStatus"}
+
+- 接続直後はすべてのイベントを受け取る（subscribe で絞り込む。?events=log&levels=error のようにも指定できる）
+- ログはクライアントごとの条件とレート制限（subscriptions.py）を通し、省略した行数を定期的に知らせる
+- クライアントごとに送信キュー（queue_size 件）を持ち、満杯になったか send_timeout_seconds 以内に
+  書き込めなかったクライアントは遅い受信者として切断する（未送信のデータは捨てる）
+- publish() は任意のスレッドから呼べる（イベントループのスレッドでシリアライズは1回だけ行う）
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    from . import metrics
+    from .subscriptions import FILTER_FIELDS, Subscription
+except ImportError:
+    import metrics
+    from subscriptions import FILTER_FIELDS, Subscription
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+CLOSE_NORMAL = 1000
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TOO_BIG = 1009
+
+PUSH_CLIENTS = metrics.gauge('orchestra_push_clients', 'Clients connected to the push server')
+PUSH_MESSAGES = metrics.counter('orchestra_push_messages', 'Messages queued for push clients', ('event',))
+PUSH_EVICTIONS = metrics.counter('orchestra_push_evictions', 'Push clients disconnected as slow consumers')
+
+
+def load_push_server_config(base_dir):
+    """orchestra.json の push_server 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('push_server', {})
+    except Exception as e:
+        print(f"Error loading push server config: {e}")
+    return {}
+
+
+def accept_key(key):
+    """Sec-WebSocket-Key に対する Sec-WebSocket-Accept"""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def encode_frame(opcode, payload=b''):
+    """サーバーからのフレーム（マスクなし・分割なし）"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def close_frame(code, reason=''):
+    return encode_frame(OP_CLOSE, struct.pack('!H', code) + reason.encode('utf-8')[:120])
+
+
+class ProtocolError(Exception):
+    def __init__(self, message, code=CLOSE_PROTOCOL_ERROR):
+        super().__init__(message)
+        self.code = code
+
+
+async def read_frame(reader, max_message_bytes):
+    """クライアントからのフレーム1つ（マスク必須）を (fin, opcode, payload) で返す"""
+    first, second = await reader.readexactly(2)
+    if first & 0x70:
+        raise ProtocolError('reserved bits set')
+    if not second & 0x80:
+        raise ProtocolError('client frame is not masked')
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if length > max_message_bytes:
+        raise ProtocolError('message too big', CLOSE_TOO_BIG)
+    mask = await reader.readexactly(4)
+    payload = await reader.readexactly(length)
+    if length:
+        # バイトごとのループを避け、整数のXORでまとめてマスクを外す
+        key = (mask * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+class _Client:
+    def __init__(self, writer, queue_size, subscription):
+        self.writer = writer
+        self.queue = asyncio.Queue(queue_size)
+        self.subscription = subscription
+        self.sender = None
+        self.handler = asyncio.current_task()
+        self.closed = False
+        self.peer = writer.get_extra_info('peername')
+
+
+class PushServer:
+    """ブリッジのイベントを接続中のクライアントに配信する WebSocket サーバー"""
+
+    def __init__(self, host='127.0.0.1', port=8002, queue_size=256, send_timeout_seconds=5,
+                 max_message_bytes=64 * 1024, allowed_origins=None, snapshot=None,
+                 lines_per_second=0, burst=None, summary_interval_seconds=1.0):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.send_timeout_seconds = send_timeout_seconds
+        self.max_message_bytes = max_message_bytes
+        # 空ならOriginを確認しない
+        self.allowed_origins = set(allowed_origins or ())
+        # 接続時と requestStatus に送るイベント [(event, data)] を返す
+        self.snapshot = snapshot
+        # クライアントごとのログのレート制限（クライアントはこれより低い値だけを指定できる）
+        self.lines_per_second = lines_per_second
+        self.burst = burst
+        self.summary_interval_seconds = summary_interval_seconds
+        self.clients = set()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name='push-server')
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self.server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            self.port = self.server.sockets[0].getsockname()[1]
+            print(f"📡 Push server listening on ws://{self.host}:{self.port}")
+        except OSError as e:
+            print(f"⚠️ Push server could not start on {self.host}:{self.port}: {e}")
+            loop.close()
+            self.ready.set()
+            return
+        self.loop = loop
+        self.ready.set()
+        loop.create_task(self._summary_loop())
+        try:
+            loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def stop(self):
+        loop = self.loop
+        if loop is None:
+            return
+        self.loop = None
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        self.thread.join(5)
+
+    async def _shutdown(self):
+        self.server.close()
+        handlers = [client.handler for client in self.clients]
+        for client in list(self.clients):
+            self._disconnect(client, CLOSE_NORMAL, 'server shutdown')
+        # 接続が閉じて受信処理が終わるのを待つ
+        if handlers:
+            await asyncio.wait(handlers, timeout=1)
+        await self.server.wait_closed()
+
+    def publish(self, event, data):
+        """すべての購読中のクライアントに送る（どのスレッドからでも呼べる）"""
+        loop = self.loop
+        if loop is None or not self.clients:
+            return
+        try:
+            loop.call_soon_threadsafe(self._broadcast, event, data)
+        except RuntimeError:
+            # 停止処理中
+            pass
+
+    def _broadcast(self, event, data):
+        # 誰にも送らないイベントはシリアライズしない
+        frame = None
+        for client in list(self.clients):
+            for name, payload in client.subscription.admit(event, data):
+                if payload is data:
+                    if frame is None:
+                        frame = self._message(event, data)
+                    self._enqueue(client, name, frame)
+                else:
+                    self._enqueue(client, name, self._message(name, payload))
+
+    async def _summary_loop(self):
+        """レート制限で省略したログの件数を定期的に知らせる"""
+        while True:
+            await asyncio.sleep(self.summary_interval_seconds)
+            for client in list(self.clients):
+                for name, payload in client.subscription.flush():
+                    self._enqueue(client, name, self._message(name, payload))
+
+    def _rate_limit(self, lines_per_second=None, burst=None):
+        """クライアントが指定したレート制限（サーバーの上限を超えない）"""
+        if not self.lines_per_second:
+            return lines_per_second or 0, burst
+        if not lines_per_second or lines_per_second >= self.lines_per_second:
+            return self.lines_per_second, self.burst
+        return lines_per_second, min(burst or lines_per_second, self.burst or self.lines_per_second)
+
+    def _message(self, event, data):
+        text = json.dumps({'event': event, 'data': data}, ensure_ascii=False, default=str)
+        return encode_frame(OP_TEXT, text.encode('utf-8'))
+
+    def _enqueue(self, client, event, frame):
+        if client.closed:
+            return
+        try:
+            client.queue.put_nowait(frame)
+            PUSH_MESSAGES.inc(event=event)
+        except asyncio.QueueFull:
+            PUSH_EVICTIONS.inc()
+            print(f"⚠️ Push client {client.peer} is too slow, disconnecting ({self.queue_size} messages queued)")
+            self._disconnect(client, CLOSE_POLICY_VIOLATION, 'slow consumer')
+
+    def _send_snapshot(self, client):
+        if not self.snapshot:
+            return
+        try:
+            for event, data in self.snapshot():
+                self._enqueue(client, event, self._message(event, data))
+        except Exception as e:
+            print(f"Push server snapshot error: {e}")
+
+    def _disconnect(self, client, code, reason):
+        """送信を止めて接続を閉じる（遅い受信者は close フレームを待たずに切断する）"""
+        if client.closed:
+            return
+        client.closed = True
+        self.clients.discard(client)
+        PUSH_CLIENTS.set(len(self.clients))
+        if client.sender:
+            client.sender.cancel()
+        try:
+            if code == CLOSE_POLICY_VIOLATION:
+                # 読まれていない送信バッファは捨てる（close では書き込みが終わるまで接続が残る）
+                client.writer.transport.abort()
+            else:
+                client.writer.write(close_frame(code, reason))
+                client.writer.close()
+        except Exception:
+            pass
+
+    async def _send_loop(self, client):
+        writer = client.writer
+        try:
+            while True:
+                frame = await client.queue.get()
+                writer.write(frame)
+                await asyncio.wait_for(writer.drain(), self.send_timeout_seconds)
+        except asyncio.TimeoutError:
+            PUSH_EVICTIONS.inc()
+            print(f"⚠️ Push client {client.peer} did not read for {self.send_timeout_seconds}s, disconnecting")
+            client.sender = None
+            self._disconnect(client, CLOSE_POLICY_VIOLATION, 'slow consumer')
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    async def _handshake(self, reader, writer):
+        """HTTP Upgrade の要求を確認して (Sec-WebSocket-Accept, クエリの購読条件) を返す。拒否したら例外"""
+        request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10)
+        lines = request.decode('latin-1').split('\r\n')
+        method, target, _ = (lines[0].split(' ') + ['', ''])[:3]
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        def reject(status, reason):
+            writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'.encode('ascii'))
+            raise ProtocolError(f'handshake rejected: {status} {reason}')
+
+        if method != 'GET' or headers.get('upgrade', '').lower() != 'websocket' or 'sec-websocket-key' not in headers:
+            reject(400, 'Bad Request')
+        if headers.get('sec-websocket-version') != '13':
+            reject(426, 'Upgrade Required')
+        origin = headers.get('origin')
+        if origin and self.allowed_origins and origin not in self.allowed_origins:
+            reject(403, 'Forbidden')
+
+        query = {key: [name for value in values for name in value.split(',') if name]
+                 for key, values in parse_qs(urlsplit(target).query).items()}
+        return accept_key(headers['sec-websocket-key']), query
+
+    async def _handle(self, reader, writer):
+        try:
+            accept, query = await self._handshake(reader, writer)
+        except (ProtocolError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ConnectionError, UnicodeDecodeError) as e:
+            print(f"Push server handshake failed: {e}")
+            writer.close()
+            return
+
+        # 101 を返す前に登録する（応答を受け取った直後の publish も届く）
+        lines_per_second, burst = self._rate_limit()
+        subscription = Subscription(query.get('events'), {key: query[key] for key in FILTER_FIELDS if key in query},
+                                    lines_per_second, burst)
+        client = _Client(writer, self.queue_size, subscription)
+        self.clients.add(client)
+        PUSH_CLIENTS.set(len(self.clients))
+        writer.write((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n\r\n'
+        ).encode('ascii'))
+        client.sender = asyncio.ensure_future(self._send_loop(client))
+        self._send_snapshot(client)
+        try:
+            await self._receive_loop(reader, client)
+            self._disconnect(client, CLOSE_NORMAL, '')
+        except ProtocolError as e:
+            self._disconnect(client, e.code, str(e))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self._disconnect(client, CLOSE_NORMAL, '')
+
+    async def _receive_loop(self, reader, client):
+        """close を受け取るまでクライアントのメッセージを処理する"""
+        fragments = []
+        while not client.closed:
+            fin, opcode, payload = await read_frame(reader, self.max_message_bytes)
+            if opcode == OP_CLOSE:
+                return
+            if opcode == OP_PING:
+                client.writer.write(encode_frame(OP_PONG, payload))
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode not in (OP_TEXT, OP_BINARY, OP_CONTINUATION):
+                raise ProtocolError(f'unknown opcode {opcode}')
+            fragments.append(payload)
+            if sum(len(fragment) for fragment in fragments) > self.max_message_bytes:
+                raise ProtocolError('message too big', CLOSE_TOO_BIG)
+            if fin:
+                message, fragments = b''.join(fragments), []
+                self._handle_message(client, message)
+
+    def _handle_message(self, client, message):
+        try:
+            request = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(request, dict):
+            return
+        kind = request.get('type')
+        names = request.get('events') or []
+        if kind == 'subscribe':
+            rate = request.get('rateLimit') or {}
+            lines_per_second, burst = self._rate_limit(rate.get('linesPerSecond'), rate.get('burst'))
+            filters = request.get('filters')
+            client.subscription.update(
+                events=names if 'events' in request else None,
+                filters=filters if isinstance(filters, dict) else None,
+                lines_per_second=lines_per_second if rate else None,
+                burst=burst
+            )
+        elif kind == 'unsubscribe':
+            client.subscription.unsubscribe(names)
+        elif kind == 'requestStatus':
+            self._send_snapshot(client)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Status Stream
+エージェント状態の差分配信
+
+前回配信した状態との差分（追加・変更・削除されたエージェント）だけを連番付きで送り、
+keyframe_interval_seconds ごとに全体（キーフレーム）を送る。受信側は連番が飛んだら
+次のキーフレームまで差分を捨てる。lastSeen だけの変化は変更とみなさない。
+送信待ちの間にまとめた差分（merge_updates）は fromSeq から seq までの変化を表す。
+
+  {"seq": 12, "keyframe": false, "added": [...], "changed": [...], "removed": ["id"], "changes": 2}
+  {"seq": 13, "keyframe": true, "agents": [...], "changes": 0}
+  {"seq": 15, "fromSeq": 14, "keyframe": false, "added": [...], "changed": [...], "removed": [], "changes": 3}
+"""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 変化しても差分として送らないフィールド（キーフレームで更新される）
+VOLATILE_FIELDS = frozenset({'lastSeen'})
+
+# ダッシュボードへ送るイベント名
+STATUS_EVENT = 'agents_delta'
+
+
+def load_status_stream_config(base_dir):
+    """orchestra.json の status_stream 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('status_stream', {})
+    except Exception as e:
+        print(f"Error loading status stream config: {e}")
+    return {}
+
+
+def merge_updates(pending, newer):
+    """未送信の更新 pending に newer を続けて適用した1件の更新（送信待ちの差分をまとめる）
+
+    どちらかがキーフレームならキーフレームに、差分どうしなら pending の最初の連番から
+    newer の連番までを表す差分（fromSeq 付き）になるので、受信側の連番は途切れない。
+    """
+    if newer['keyframe']:
+        return newer
+    changes = pending['changes'] + newer['changes']
+    if pending['keyframe']:
+        agents = {agent['id']: agent for agent in pending['agents']}
+        for agent_id in newer['removed']:
+            agents.pop(agent_id, None)
+        for agent in newer['added'] + newer['changed']:
+            agents[agent['id']] = agent
+        return {'seq': newer['seq'], 'keyframe': True, 'changes': changes,
+                'timestamp': newer['timestamp'], 'agents': list(agents.values())}
+
+    added = {agent['id']: agent for agent in pending['added']}
+    changed = {agent['id']: agent for agent in pending['changed']}
+    removed = dict.fromkeys(pending['removed'])
+    for agent_id in newer['removed']:
+        changed.pop(agent_id, None)
+        # 送信待ちの間に追加されて削除されたエージェントは受信側に伝えなくてよい
+        if added.pop(agent_id, None) is None:
+            removed[agent_id] = None
+    for agent in newer['added']:
+        removed.pop(agent['id'], None)
+        added[agent['id']] = agent
+    for agent in newer['changed']:
+        (added if agent['id'] in added else changed)[agent['id']] = agent
+    return {'seq': newer['seq'], 'fromSeq': pending.get('fromSeq', pending['seq']), 'keyframe': False,
+            'changes': changes, 'timestamp': newer['timestamp'],
+            'added': list(added.values()), 'changed': list(changed.values()), 'removed': list(removed)}
+
+
+def agent_fingerprint(agent):
+    """変化の比較用（VOLATILE_FIELDS を除いた内容）"""
+    return json.dumps({key: value for key, value in agent.items() if key not in VOLATILE_FIELDS},
+                      sort_keys=True, ensure_ascii=False, default=str)
+
+
+class StatusDiffer:
+    """最後に配信した状態を保持し、次に送るべき差分またはキーフレームを作る"""
+
+    def __init__(self, keyframe_interval_seconds=60):
+        self.keyframe_interval_seconds = keyframe_interval_seconds
+        self.seq = 0
+        self.published = {}
+        self.last_keyframe = None
+
+    def reset(self):
+        """次回は必ずキーフレームを送る（受信側の再同期用）"""
+        self.last_keyframe = None
+
+    def diff(self, agents):
+        """前回からの差分（変化がなくキーフレームの時期でもなければ None）"""
+        current = {}
+        for agent in agents:
+            current[agent['id']] = (agent, agent_fingerprint(agent))
+
+        added = [agent for agent_id, (agent, _) in current.items() if agent_id not in self.published]
+        changed = [agent for agent_id, (agent, fingerprint) in current.items()
+                   if agent_id in self.published and self.published[agent_id] != fingerprint]
+        removed = [agent_id for agent_id in self.published if agent_id not in current]
+        changes = len(added) + len(changed) + len(removed)
+
+        now = time.monotonic()
+        keyframe_due = (self.last_keyframe is None or
+                        now - self.last_keyframe >= self.keyframe_interval_seconds)
+        if not changes and not keyframe_due:
+            return None
+
+        self.seq += 1
+        self.published = {agent_id: fingerprint for agent_id, (_, fingerprint) in current.items()}
+        message = {'seq': self.seq, 'keyframe': keyframe_due, 'changes': changes,
+                   'timestamp': datetime.now().isoformat()}
+        if keyframe_due:
+            self.last_keyframe = now
+            message['agents'] = list(agents)
+        else:
+            message.update(added=added, changed=changed, removed=removed)
+        return message
+
+    def keyframe(self, agents):
+        """現在の連番での全体（接続時・再同期要求時に送る。連番は進めない）"""
+        return {'seq': self.seq, 'keyframe': True, 'changes': 0,
+                'timestamp': datetime.now().isoformat(), 'agents': list(agents)}
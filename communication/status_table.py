@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Agent Status Table
+エージェント状態を mmap した固定レイアウトのテーブルで共有する
+
+  ヘッダー（64バイト）  magic / レイアウト版 / スロット数 / スロットサイズ
+  スロット              seq(u64) / 所有PID(u32) / 起動時刻(u64) / 長さ(u32) / ID(64バイト) / JSON
+
+各プロセスは自分のエージェントIDのスロットを1つ確保し（確保だけファイルロック下で行う）、
+以降はそのスロットだけをロックなしで書き換える。書き込み中は seq を奇数にし（seqlock）、
+読み手は前後の seq が同じ偶数のときだけ内容を採用するため、ファイルを読まずに一貫した状態が得られる。
+所有プロセスが終了したスロットは読み手からは見えず、次の確保で再利用される。
+
+agent_status.json はダッシュボードなど既存の読み手のためのミラーで、write_mirror() で
+テーブル全体から書き出す（各プロセスが自分のエントリだけを読み書きして他を上書きすることはない）。
+"""
+
+import contextlib
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+try:
+    from . import metrics
+    from .agent_registry import pid_alive, process_start_ticks
+    from .durable import atomic_write_json
+except ImportError:
+    import metrics
+    from agent_registry import pid_alive, process_start_ticks
+    from durable import atomic_write_json
+
+MAGIC = b'YCOSTAT\0'
+LAYOUT_VERSION = 1
+HEADER = struct.Struct('<8sIII')
+HEADER_SIZE = 64
+SEQ = struct.Struct('<Q')
+SLOT_META = struct.Struct('<IQI64s')
+SLOT_HEADER = struct.Struct('<QIQI')
+SLOT_HEADER_SIZE = SEQ.size + SLOT_META.size
+MAX_ID_BYTES = 64
+READ_RETRIES = 100
+
+SLOT_WRITES = metrics.counter('orchestra_status_table_writes', 'Agent status slot updates')
+MIRROR_WRITES = metrics.counter('orchestra_status_mirror_writes', 'agent_status.json mirror rewrites')
+
+
+def load_status_table_config(base_dir):
+    """orchestra.json の status_table 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('status_table', {})
+    except Exception as e:
+        print(f"Error loading status table config: {e}")
+    return {}
+
+
+def open_status_table(base_dir):
+    """communication/agent_status.table を開く（設定はテーブルを作成するときだけ使われる）"""
+    config = load_status_table_config(base_dir)
+    return StatusTable(Path(base_dir) / 'communication' / 'agent_status.table',
+                       slots=config.get('slots', 128), slot_size=config.get('slot_size', 1024))
+
+
+class StatusSlot:
+    """このプロセスが書き込むスロット"""
+
+    def __init__(self, table, agent_id, index):
+        self.table = table
+        self.agent_id = agent_id
+        self.index = index
+        self.lock = threading.Lock()
+
+    def write(self, entry):
+        payload = self.table.encode(entry)
+        with self.lock:
+            self.table._write_slot(self.index, self.table.pid, self.table.start_ticks,
+                                   self.agent_id.encode('utf-8'), payload)
+        SLOT_WRITES.inc()
+
+    def release(self):
+        with self.lock:
+            self.table._write_slot(self.index, 0, 0, b'', b'')
+
+
+class StatusTable:
+    """プロセス間で共有するエージェント状態（書き込みは自分のスロットのみ、読み込みはロックなし）"""
+
+    def __init__(self, path, slots=128, slot_size=1024):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self.pid = os.getpid()
+        self.start_ticks = process_start_ticks(self.pid) or 0
+        self.slots = {}
+        self.decoded = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.locked():
+            self.mm, self.slot_count, self.slot_size = self._open(slots, slot_size)
+        self.payload_size = self.slot_size - SLOT_HEADER_SIZE
+
+    @contextlib.contextmanager
+    def locked(self):
+        """スロットの確保とミラーの書き出しを直列化するファイルロック"""
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _open(self, slots, slot_size):
+        """既存のテーブルがあればそのレイアウトを使い、なければ作成する"""
+        size = HEADER_SIZE + slots * slot_size
+        # 先頭のヘッダーを書き換えられるよう r+b で開く（なければ作成）
+        with os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as f:
+            header = f.read(HEADER.size)
+            if len(header) == HEADER.size:
+                magic, version, existing_slots, existing_size = HEADER.unpack(header)
+                if magic == MAGIC and version == LAYOUT_VERSION:
+                    slots, slot_size = existing_slots, existing_size
+                    size = HEADER_SIZE + slots * slot_size
+                    header = None
+            if header is not None:
+                # 新規作成（または壊れたテーブルの作り直し）
+                f.truncate(0)
+                f.truncate(size)
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, LAYOUT_VERSION, slots, slot_size))
+                f.flush()
+            elif os.fstat(f.fileno()).st_size < size:
+                f.truncate(size)
+            return mmap.mmap(f.fileno(), size), slots, slot_size
+
+    def encode(self, entry):
+        """エントリのJSON（スロットに収まらなければ currentTask を切り詰める）"""
+        payload = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        overflow = len(payload) - self.payload_size
+        if overflow > 0 and isinstance(entry.get('currentTask'), str):
+            task = entry['currentTask'].encode('utf-8')
+            shortened = task[:max(0, len(task) - overflow - 3)].decode('utf-8', errors='ignore') + '…'
+            payload = json.dumps(dict(entry, currentTask=shortened), ensure_ascii=False).encode('utf-8')
+        if len(payload) > self.payload_size:
+            raise ValueError(f"agent status entry is too large for a {self.slot_size}-byte slot")
+        return payload
+
+    def _offset(self, index):
+        return HEADER_SIZE + index * self.slot_size
+
+    def _write_slot(self, index, pid, start_ticks, agent_id, payload):
+        offset = self._offset(index)
+        seq, = SEQ.unpack_from(self.mm, offset)
+        if seq % 2:
+            # 書き込み途中で終了したプロセスの跡
+            seq += 1
+        SEQ.pack_into(self.mm, offset, seq + 1)
+        SLOT_META.pack_into(self.mm, offset + SEQ.size, pid, start_ticks, len(payload), agent_id)
+        start = offset + SLOT_HEADER_SIZE
+        self.mm[start:start + len(payload)] = payload
+        SEQ.pack_into(self.mm, offset, seq + 2)
+
+    def _read_slot(self, index):
+        """(seq, pid, 起動時刻, ID, JSON) を一貫した状態で読む。書き込み中のまま読めなければ None"""
+        offset = self._offset(index)
+        for attempt in range(READ_RETRIES):
+            before, = SEQ.unpack_from(self.mm, offset)
+            if before % 2 == 0:
+                pid, start_ticks, length, agent_id = SLOT_META.unpack_from(self.mm, offset + SEQ.size)
+                start = offset + SLOT_HEADER_SIZE
+                payload = self.mm[start:start + min(length, self.payload_size)]
+                after, = SEQ.unpack_from(self.mm, offset)
+                if before == after:
+                    return before, pid, start_ticks, agent_id.rstrip(b'\0').decode('utf-8', errors='replace'), payload
+            elif attempt > 10:
+                time.sleep(0)
+        return None
+
+    def slot(self, agent_id):
+        """agent_id のスロット（初回はファイルロック下で空きか、所有プロセスが終了したスロットを確保）"""
+        slot = self.slots.get(agent_id)
+        if slot:
+            return slot
+        encoded = agent_id.encode('utf-8')
+        if len(encoded) > MAX_ID_BYTES:
+            raise ValueError(f"agent id is longer than {MAX_ID_BYTES} bytes: {agent_id}")
+        with self.locked():
+            free = None
+            for index in range(self.slot_count):
+                record = self._read_slot(index)
+                if record is None:
+                    continue
+                _, pid, start_ticks, slot_id, _ = record
+                owned = pid and pid_alive(pid, start_ticks or None)
+                if slot_id == agent_id:
+                    if owned and pid != self.pid:
+                        print(f"⚠️ Agent status slot {agent_id} is taken over from PID {pid}")
+                    free = index
+                    break
+                if free is None and not owned:
+                    free = index
+            if free is None:
+                raise RuntimeError(f"agent status table is full ({self.slot_count} slots)")
+            self._write_slot(free, self.pid, self.start_ticks, encoded, b'')
+        slot = self.slots[agent_id] = StatusSlot(self, agent_id, free)
+        return slot
+
+    def release(self, agent_id):
+        """エントリを削除（自分のスロット、または終了したプロセスのスロット）。削除したら True"""
+        slot = self.slots.pop(agent_id, None)
+        if slot:
+            slot.release()
+            return True
+        released = False
+        with self.locked():
+            for index in range(self.slot_count):
+                record = self._read_slot(index)
+                if not record or record[3] != agent_id:
+                    continue
+                _, pid, start_ticks, _, _ = record
+                # 別の生きているプロセスが書き込んでいるスロットは消さない
+                if pid and pid != self.pid and pid_alive(pid, start_ticks or None):
+                    continue
+                self._write_slot(index, 0, 0, b'', b'')
+                released = True
+        return released
+
+    def signature(self):
+        """変化の検出用（いずれかのスロットが書き換えられると変わる）"""
+        return tuple(SEQ.unpack_from(self.mm, self._offset(index))[0] for index in range(self.slot_count))
+
+    def snapshot(self, exclude_pid=None):
+        """所有プロセスが生きているスロットのエントリ一覧（変わっていないスロットはデコードし直さない）"""
+        agents = []
+        mm = self.mm
+        for index in range(self.slot_count):
+            # 空きスロットと前回から変わっていないスロットは本体を読まない
+            seq, pid, start_ticks, length = SLOT_HEADER.unpack_from(mm, HEADER_SIZE + index * self.slot_size)
+            if seq % 2 == 0 and (not pid or not length or pid == exclude_pid):
+                continue
+            cached = self.decoded.get(index)
+            if not (cached and cached[0] == seq):
+                record = self._read_slot(index)
+                if record is None:
+                    continue
+                seq, pid, start_ticks, _, payload = record
+                if not payload or not pid or pid == exclude_pid:
+                    continue
+                cached = None
+            # PID が再利用されていれば起動時刻が違うので、終了したプロセスのスロットとして扱う
+            if pid != self.pid and not pid_alive(pid, start_ticks or None):
+                continue
+            if cached:
+                agents.append(cached[1])
+                continue
+            try:
+                entry = json.loads(payload)
+            except ValueError:
+                continue
+            self.decoded[index] = (seq, entry)
+            agents.append(entry)
+        return agents
+
+    def write_mirror(self, path, changed=None):
+        """テーブル全体を agent_status.json に書き出す（古いスナップショットで上書きしないようロック下で取る）"""
+        with self.locked():
+            agents = self.snapshot()
+            atomic_write_json(path, agents, changed=changed)
+        MIRROR_WRITES.inc()
+        return agents
+
+    def close(self):
+        self.mm.close()
+
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Subscriptions
+ログイベントの購読条件（タスク・エージェントタイプ・レベル・プロジェクト）とレート制限
+
+購読ごとにトークンバケットを持ち、上限を超えたログ行は捨てて件数だけを数える。
+次に送れるようになったとき（または flush() のとき）に「N 行を省略しました」という
+ログを1件送る。エージェント状態など log 以外のイベントは条件・レート制限の対象外。
+
+  {"taskIds": ["task-1700000000000-abc123"], "agentTypes": ["actor"], "levels": ["warn", "error"], "projects": ["p1"]}
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+# 購読条件のキーとログエントリのフィールド
+FILTER_FIELDS = {
+    'taskIds': 'taskId',
+    'agentTypes': 'agentType',
+    'levels': 'level',
+    'projects': 'projectId',
+}
+
+LOG_LINES_SUPPRESSED = metrics.counter('orchestra_log_lines_suppressed',
+                                       'Log lines not sent to a subscriber', ('reason',))
+
+
+def load_subscription_config(base_dir):
+    """orchestra.json の subscriptions 設定を読み込み"""
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('subscriptions', {})
+    except Exception as e:
+        print(f"Error loading subscription config: {e}")
+    return {}
+
+
+class TokenBucket:
+    """rate 件/秒、最大 burst 件のトークンバケット（rate が 0 なら無制限）"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate or 0
+        self.burst = burst or max(1, self.rate)
+        self.tokens = self.burst
+        self.updated = None
+
+    def take(self, now=None):
+        if not self.rate:
+            return True
+        now = time.monotonic() if now is None else now
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Subscription:
+    """1つの購読者（プッシュサーバーのクライアントやダッシュボードへの送信）の条件とレート制限"""
+
+    def __init__(self, events=None, filters=None, lines_per_second=0, burst=None):
+        # events が None ならすべてのイベント（unsubscribe したものを除く）
+        self.events = set(events) if events else None
+        self.excluded = set()
+        self.filters = {}
+        self.bucket = TokenBucket(lines_per_second, burst)
+        self.suppressed = 0
+        self.update(filters=filters)
+
+    def update(self, events=None, filters=None, lines_per_second=None, burst=None):
+        if events is not None:
+            self.events = set(events) if events else None
+            self.excluded -= set(events)
+        if filters is not None:
+            self.filters = {key: {str(value) for value in values}
+                            for key, values in filters.items() if key in FILTER_FIELDS and values}
+        if lines_per_second is not None:
+            self.bucket = TokenBucket(lines_per_second, burst)
+
+    def unsubscribe(self, events):
+        if self.events is None:
+            self.excluded |= set(events)
+        else:
+            self.events -= set(events)
+
+    def wants(self, event):
+        return (self.events is None or event in self.events) and event not in self.excluded
+
+    def matches(self, entry):
+        for key, values in self.filters.items():
+            value = entry.get(FILTER_FIELDS[key])
+            if value is None or str(value) not in values:
+                return False
+        return True
+
+    def admit(self, event, data, now=None):
+        """送るべきイベント [(event, data)] を返す（省略した行があれば先にその件数を送る）"""
+        if not self.wants(event):
+            return []
+        if event != 'log':
+            return [(event, data)]
+        if self.filters and not self.matches(data):
+            LOG_LINES_SUPPRESSED.inc(reason='filter')
+            return []
+        if not self.bucket.take(now):
+            self.suppressed += 1
+            LOG_LINES_SUPPRESSED.inc(reason='rate_limit')
+            return []
+        return self.flush() + [(event, data)]
+
+    def flush(self):
+        """省略した行数のお知らせ（省略がなければ空）"""
+        if not self.suppressed:
+            return []
+        count, self.suppressed = self.suppressed, 0
+        return [('log', {
+            'id': f'suppressed-{time.time_ns()}',
+            'timestamp': datetime.now().isoformat(),
+            'agentType': 'system',
+            'agentId': 'bridge',
+            'message': f'ログ {count} 行を省略しました（レート制限）',
+            'level': 'warn',
+            'suppressed': count
+        })]
+
+
+class TaskProjectIndex:
+    """tasks.json のタスクID → プロジェクトID（ファイルが変わったときだけ読み直す）"""
+
+    def __init__(self, tasks_file):
+        self.tasks_file = Path(tasks_file)
+        self.signature = None
+        self.projects = {}
+
+    def project_of(self, task_id):
+        if task_id is None:
+            return None
+        self.refresh()
+        return self.projects.get(str(task_id))
+
+    def refresh(self):
+        try:
+            stat = os.stat(self.tasks_file)
+        except FileNotFoundError:
+            self.signature, self.projects = None, {}
+            return
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self.signature:
+            return
+        try:
+            with open(self.tasks_file, 'r', encoding='utf-8') as f:
+                tasks = json.load(f).get('tasks', [])
+            self.projects = {str(task.get('id')): task.get('projectId') for task in tasks
+                             if isinstance(task, dict) and task.get('projectId')}
+            self.signature = signature
+        except (OSError, ValueError) as e:
+            print(f"Error loading task projects: {e}")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Tracing
+メッセージの受信から完了までをトレース/スパンIDでつなぎ、OTLP互換のJSONに書き出す
+
+トレースの文脈は W3C の traceparent（00-<trace_id>-<span_id>-01）として
+メッセージ・ログ行・サブプロセスの環境変数 TRACEPARENT に載せて伝播する。
+"""
+
+import contextvars
+import fcntl
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# OTLP の SpanKind
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+KIND_PRODUCER = 4
+KIND_CONSUMER = 5
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+_current_span = contextvars.ContextVar('orchestra_current_span', default=None)
+
+
+def parse_traceparent(value):
+    """traceparent から (trace_id, span_id) を取り出す（不正な値なら None）"""
+    match = TRACEPARENT_PATTERN.match(value.strip()) if isinstance(value, str) else None
+    return (match.group(1), match.group(2)) if match else None
+
+
+class Span:
+    """1つの処理区間"""
+
+    def __init__(self, tracer, name, trace_id, parent_span_id=None, kind=KIND_INTERNAL,
+                 attributes=None, start_ns=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.status = None
+
+    @property
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, **attributes):
+        self.events.append((time.time_ns(), name, attributes))
+
+    def set_error(self, error):
+        self.status = (STATUS_ERROR, str(error))
+
+    def end(self, error=None):
+        if self.end_ns is not None:
+            return
+        if error is not None:
+            self.set_error(error)
+        self.end_ns = time.time_ns()
+        self.tracer.export(self)
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or time.time_ns()),
+            'attributes': _otlp_attributes(self.attributes),
+            'events': [{'timeUnixNano': str(ns), 'name': name, 'attributes': _otlp_attributes(attrs)}
+                       for ns, name, attrs in self.events],
+            'status': {'code': self.status[0], 'message': self.status[1]} if self.status else {'code': STATUS_OK}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class OTLPFileExporter:
+    """終了したスパンをまとめて OTLP/JSON（ExportTraceServiceRequest）の1行として追記する"""
+
+    def __init__(self, path, service_name, max_batch_spans=256, flush_interval_seconds=5):
+        self.path = Path(path)
+        self.service_name = service_name
+        self.max_batch_spans = max_batch_spans
+        self.flush_interval_seconds = flush_interval_seconds
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def export(self, span):
+        with self.lock:
+            self.buffer.append(span.to_otlp())
+            # ルートスパンの終了時にはそのトレースをすぐ読めるように書き出す
+            due = (len(self.buffer) >= self.max_batch_spans or not span.parent_span_id or
+                   time.monotonic() - self.last_flush >= self.flush_interval_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            spans, self.buffer = self.buffer, []
+            self.last_flush = time.monotonic()
+        if not spans:
+            return
+        request = {'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': self.service_name})},
+            'scopeSpans': [{'scope': {'name': 'yellow-claude-orchestra'}, 'spans': spans}]
+        }]}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    f.write(json.dumps(request, ensure_ascii=False) + '\n')
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        except Exception as e:
+            print(f"Error exporting spans: {e}")
+
+
+class Tracer:
+    """スパンの生成と現在のスパンの管理（exporter が None ならIDの伝播のみ行う）"""
+
+    def __init__(self, service_name='orchestra', exporter=None):
+        self.service_name = service_name
+        self.exporter = exporter
+
+    def start_span(self, name, parent=None, kind=KIND_INTERNAL, attributes=None, start_ns=None):
+        """スパンを開始する（現在のスパンにはしない）。parent は Span か traceparent 文字列"""
+        if parent is None:
+            parent = _current_span.get()
+        if isinstance(parent, Span):
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_span_id = parse_traceparent(parent) or (secrets.token_hex(16), None)
+        return Span(self, name, trace_id, parent_span_id, kind, attributes, start_ns)
+
+    @contextmanager
+    def span(self, name, parent=None, kind=KIND_INTERNAL, attributes=None, start_ns=None):
+        """ブロックの間、スパンを現在のスパンにする"""
+        span = self.start_span(name, parent, kind, attributes, start_ns)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def export(self, span):
+        if self.exporter:
+            self.exporter.export(span)
+
+    def flush(self):
+        if self.exporter:
+            self.exporter.flush()
+
+
+_tracer = Tracer()
+
+
+def configure_tracing(base_dir, service_name):
+    """orchestra.json の tracing 設定に従ってプロセスのトレーサーを設定"""
+    global _tracer
+    config = {}
+    try:
+        config_file = Path(base_dir) / 'config' / 'orchestra.json'
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f).get('tracing', {})
+    except Exception as e:
+        print(f"Error loading tracing config: {e}")
+
+    exporter = None
+    if config.get('enabled', False):
+        export_dir = Path(base_dir) / config.get('export_dir', './logs/traces')
+        exporter = OTLPFileExporter(export_dir / f'{service_name}.otlp.jsonl', service_name,
+                                    max_batch_spans=config.get('max_batch_spans', 256),
+                                    flush_interval_seconds=config.get('flush_interval_seconds', 5))
+    _tracer.flush()
+    _tracer = Tracer(service_name, exporter)
+    return _tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def start_span(name, parent=None, kind=KIND_INTERNAL, attributes=None, start_ns=None):
+    return _tracer.start_span(name, parent, kind, attributes, start_ns)
+
+
+def span(name, parent=None, kind=KIND_INTERNAL, attributes=None, start_ns=None):
+    return _tracer.span(name, parent, kind, attributes, start_ns)
+
+
+@contextmanager
+def use_span(span):
+    """別スレッドで開始したスパンをこのブロックの現在のスパンにする（終了はしない）"""
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_traceparent():
+    span = _current_span.get()
+    return span.traceparent if span else None
+
+
+def subprocess_env(base=None):
+    """現在のトレースを TRACEPARENT として渡すサブプロセス用の環境変数"""
+    env = dict(base if base is not None else os.environ)
+    traceparent = current_traceparent()
+    if traceparent:
+        env['TRACEPARENT'] = traceparent
+    return env
+
+
+def log_suffix():
+    """ログ行の末尾に付けるトレース情報（ダッシュボードは [traceparent=...] を取り除いて表示する）"""
+    traceparent = current_traceparent()
+    return f' [traceparent={traceparent}]' if traceparent else ''
@@ -4,17 +4,41 @@ WebSocket Bridge for Yellow Claude Orchestra
 リアルタイムでエージェント状態とログをWebダッシュボードに送信
 """
 
-import json
 import time
 import os
 import sys
-import psutil
 import threading
 from datetime import datetime
 from pathlib import Path
-import requests
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+
+try:
+    from . import metrics
+    from .agent_registry import AgentDiscovery, load_discovery_config
+    from .cadence import AdaptiveCadence, create_observer
+    from .event_delivery import EventDelivery, load_delivery_config
+    from .log_tailer import LogTailer, load_log_streaming_config
+    from .profiler import install_profiler
+    from .push_server import PushServer, load_push_server_config
+    from .status_stream import STATUS_EVENT, StatusDiffer, load_status_stream_config, merge_updates
+    from .status_table import open_status_table
+    from .subscriptions import Subscription, TaskProjectIndex, load_subscription_config
+except ImportError:
+    import metrics
+    from agent_registry import AgentDiscovery, load_discovery_config
+    from cadence import AdaptiveCadence, create_observer
+    from event_delivery import EventDelivery, load_delivery_config
+    from log_tailer import LogTailer, load_log_streaming_config
+    from profiler import install_profiler
+    from push_server import PushServer, load_push_server_config
+    from status_stream import STATUS_EVENT, StatusDiffer, load_status_stream_config, merge_updates
+    from status_table import open_status_table
+    from subscriptions import Subscription, TaskProjectIndex, load_subscription_config
+
+AGENTS_DETECTED = metrics.gauge('orchestra_bridge_agents', 'Agents reported to the dashboard')
+STATUS_UPDATES = metrics.counter('orchestra_bridge_status_updates', 'Agent status updates sent', ('kind',))
+
+# ダッシュボード（Socket.IO）のクライアントが受け取るイベント名
+CLIENT_EVENTS = {STATUS_EVENT: 'agentsDelta'}
 
 class OrchestraWebSocketBridge:
     def __init__(self, orchestra_dir: str = None):
@@ -23,14 +47,65 @@ class OrchestraWebSocketBridge:
         self.communication_dir = self.orchestra_dir / 'communication'
         self.websocket_url = 'http://localhost:3000/api/websocket'
         
-        # エージェント状態ファイル
+        # ダッシュボードへの送信（バッファに積み、別スレッドがまとめて送る）
+        delivery_config = load_delivery_config(self.orchestra_dir)
+        self.delivery = EventDelivery(
+            self.websocket_url,
+            # 送信待ちのエージェント状態の差分は1件にまとめる（連番は途切れない）
+            coalesce_events={STATUS_EVENT: merge_updates},
+            max_buffer_events=delivery_config.get('max_buffer_events', 1000),
+            max_batch_events=delivery_config.get('max_batch_events', 100),
+            linger_seconds=delivery_config.get('linger_seconds', 0.05),
+            drop_policy=delivery_config.get('drop_policy', 'drop_oldest'),
+            timeout_seconds=delivery_config.get('timeout_seconds', 5),
+            max_backoff_seconds=delivery_config.get('max_backoff_seconds', 30)
+        ).start()
+        
+        # ダッシュボード（Next.js）へ送るログの条件とレート制限（超えた分は件数だけを送る）
+        self.subscription_config = load_subscription_config(self.orchestra_dir)
+        dashboard_config = self.subscription_config.get('dashboard', {})
+        self.dashboard_subscription = Subscription(
+            filters=dashboard_config.get('filters'),
+            lines_per_second=dashboard_config.get('lines_per_second', 0),
+            burst=dashboard_config.get('burst')
+        )
+        self.dashboard_lock = threading.Lock()
+        # ログの projectId を付けるためのタスク → プロジェクト
+        self.task_projects = TaskProjectIndex(self.orchestra_dir / 'data' / 'tasks.json')
+        
+        # エージェント状態（共有テーブルと、既存の読み手のための agent_status.json のミラー）
         self.status_file = self.communication_dir / 'agent_status.json'
+        self.status_table = open_status_table(self.orchestra_dir)
+        # ブリッジが検出して書き込んでいるエージェント（自分のスロット）
+        self.owned_agent_ids = set()
         
-        # ファイル監視
-        self.observer = Observer()
+        # ファイル監視（状態監視とログのストリーミングで共有する。watchdog がなければ None）
+        self.observer = create_observer()
+        self.log_tailer = None
+        # 状態監視の間隔（変化がなければ延ばし、agent_status.json が書き換えられたらすぐ確認する）
+        self.status_cadence = AdaptiveCadence.from_config(
+            self.orchestra_dir, 'websocket_bridge',
+            min_interval_seconds=1.0, max_interval_seconds=15.0, error_interval_seconds=10.0
+        )
         
-        # 実行中エージェントの追跡
+        # エージェント状態は前回からの差分だけを送る
+        self.status_differ = StatusDiffer(
+            keyframe_interval_seconds=load_status_stream_config(self.orchestra_dir).get('keyframe_interval_seconds', 60)
+        )
+        self.status_lock = threading.Lock()
+        self.published_agents = []
+        
+        # ブラウザが直接接続する WebSocket サーバー（有効なときに run で起動する）
+        self.push_server = None
+        
+        # 実行中エージェントの追跡（登録・PIDファイルを確認し、全走査はまれなフォールバック）
         self.active_agents = {}
+        discovery_config = load_discovery_config(self.orchestra_dir)
+        self.discovery = AgentDiscovery(
+            self.orchestra_dir,
+            heartbeat_timeout_seconds=discovery_config.get('heartbeat_timeout_seconds', 30),
+            full_scan_interval_seconds=discovery_config.get('full_scan_interval_seconds', 300)
+        )
         
         print(f"WebSocket Bridge 初期化:")
         print(f"  Orchestra Directory: {self.orchestra_dir}")
@@ -42,75 +117,25 @@ class OrchestraWebSocketBridge:
         agents = []
         
         try:
-            # 既存のagent_status.jsonがあるかチェック
-            if self.status_file.exists():
-                try:
-                    with open(self.status_file, 'r', encoding='utf-8') as f:
-                        existing_agents = json.load(f)
+            # 他のプロセスが状態テーブルに書き込んでいるエージェント（ファイルは読まない）
+            try:
+                existing_agents = self.status_table.snapshot(exclude_pid=os.getpid())
+                
+                # Task Processorなど他のシステムが管理しているエージェント（起動したActorワーカーを含む）があれば優先
+                system_agents = [agent for agent in existing_agents
+                                 if agent.get('type') == 'system' or agent.get('workerOf')]
+                if system_agents:
+                    print(f"既存のシステムエージェントを検出: {len(system_agents)}個")
+                    # システムエージェントのみを返す（デモエージェントは追加しない）
+                    return system_agents
                     
-                    # Task Processorなど他のシステムが管理しているエージェントがあれば優先
-                    system_agents = [agent for agent in existing_agents if agent.get('type') == 'system']
-                    if system_agents:
-                        print(f"既存のシステムエージェントを検出: {len(system_agents)}個")
-                        # システムエージェントのみを返す（デモエージェントは追加しない）
-                        return system_agents
-                        
-                except Exception as e:
-                    print(f"既存エージェント状態読み込みエラー: {e}")
-            
-            # claude-codeプロセスを検索
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time']):
-                try:
-                    if 'claude-code' in proc.info['name']:
-                        cmdline = ' '.join(proc.info['cmdline']) if proc.info['cmdline'] else ''
-                        
-                        # エージェントタイプを推定
-                        agent_type = 'actor'  # デフォルト
-                        if 'producer' in cmdline.lower():
-                            agent_type = 'producer'
-                        elif 'director' in cmdline.lower():
-                            agent_type = 'director'
-                        elif 'conductor' in cmdline.lower():
-                            agent_type = 'director'  # conductorはdirectorとして扱う
-                        
-                        agent_id = f"{agent_type}-{proc.info['pid']}"
-                        
-                        agent_status = {
-                            'id': agent_id,
-                            'type': agent_type,
-                            'name': agent_type.title(),
-                            'status': 'active',
-                            'currentTask': f'プロセス {proc.info["pid"]} で実行中',
-                            'lastSeen': datetime.now().isoformat(),
-                            'pid': proc.info['pid'],
-                            'startTime': datetime.fromtimestamp(proc.info['create_time']).isoformat()
-                        }
-                        
-                        agents.append(agent_status)
-                        self.active_agents[agent_id] = agent_status
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            except Exception as e:
+                print(f"既存エージェント状態読み込みエラー: {e}")
             
-            # Task Processorプロセスをチェック
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time']):
-                try:
-                    if proc.info['cmdline'] and any('task_processor.py' in arg for arg in proc.info['cmdline']):
-                        agent_status = {
-                            'id': 'task-processor',
-                            'type': 'system',
-                            'name': 'Task Processor',
-                            'status': 'active',
-                            'currentTask': 'タスク処理システム稼働中',
-                            'lastSeen': datetime.now().isoformat(),
-                            'pid': proc.info['pid']
-                        }
-                        agents.append(agent_status)
-                        print(f"Task Processorを検出: PID {proc.info['pid']}")
-                        break
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            # 登録済みのエージェント（PIDファイル・ハートビート）
+            for agent_status in self.discovery.discover():
+                agents.append(agent_status)
+                self.active_agents[agent_status['id']] = agent_status
                     
             # エージェントプロセスが見つからない場合のデモデータ
             if not agents:
@@ -151,32 +176,54 @@ class OrchestraWebSocketBridge:
         return agents
     
     def save_agent_status(self, agents):
-        """エージェント状態をファイルに保存"""
+        """ブリッジが検出したエージェントを自分のスロットに書き、agent_status.json のミラーを更新"""
         try:
-            self.communication_dir.mkdir(exist_ok=True)
-            with open(self.status_file, 'w', encoding='utf-8') as f:
-                json.dump(agents, f, ensure_ascii=False, indent=2)
+            others = {agent['id'] for agent in self.status_table.snapshot(exclude_pid=os.getpid())}
+            owned = {agent['id']: agent for agent in agents if agent['id'] not in others}
+            for agent_id in self.owned_agent_ids - set(owned):
+                self.status_table.release(agent_id)
+            for agent_id, agent in owned.items():
+                self.status_table.slot(agent_id).write(agent)
+            self.owned_agent_ids = set(owned)
+            self.status_table.write_mirror(self.status_file, changed=sorted(owned))
             print(f"エージェント状態を保存しました: {len(agents)}個のエージェント")
         except Exception as e:
             print(f"エージェント状態保存エラー: {e}")
     
     def send_to_websocket(self, event_type: str, data: dict):
-        """WebSocketサーバーにデータを送信"""
-        try:
-            payload = {
-                'type': 'broadcast',
-                'event': event_type,
-                'data': data
-            }
-            
-            response = requests.post(self.websocket_url, json=payload, timeout=5)
-            if response.status_code == 200:
-                print(f"WebSocketに送信成功: {event_type}")
-            else:
-                print(f"WebSocket送信失敗: {response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
-            print(f"WebSocket送信エラー: {e}")
+        """WebSocketサーバーにデータを送信（送信キューに積むだけで、HTTPの完了は待たない）"""
+        with self.dashboard_lock:
+            events = self.dashboard_subscription.admit(event_type, data)
+        for event, payload in events:
+            if not self.delivery.send(event, payload):
+                print(f"WebSocket送信バッファが満杯のため破棄: {event}")
+        if self.push_server:
+            self.push_server.publish(CLIENT_EVENTS.get(event_type, event_type), data)
+    
+    def start_push_server(self):
+        """push_server が有効ならブラウザ向けの WebSocket サーバーを起動"""
+        config = load_push_server_config(self.orchestra_dir)
+        if not config.get('enabled', False):
+            return
+        client_config = self.subscription_config.get('push_clients', {})
+        self.push_server = PushServer(
+            host=config.get('host', '127.0.0.1'),
+            port=config.get('port', 8002),
+            queue_size=config.get('queue_size', 256),
+            send_timeout_seconds=config.get('send_timeout_seconds', 5),
+            allowed_origins=config.get('allowed_origins', []),
+            snapshot=self.status_snapshot,
+            lines_per_second=client_config.get('lines_per_second', 0),
+            burst=client_config.get('burst'),
+            summary_interval_seconds=self.subscription_config.get('summary_interval_seconds', 1)
+        ).start()
+        if not self.push_server.loop:
+            self.push_server = None
+    
+    def status_snapshot(self):
+        """接続したクライアントに送る現在の状態（最後に配信した連番のキーフレーム）"""
+        with self.status_lock:
+            return [('agentsDelta', self.status_differ.keyframe(self.published_agents))]
     
     def generate_demo_log(self):
         """デモ用のログを生成"""
@@ -207,30 +254,76 @@ class OrchestraWebSocketBridge:
         
         return log_entry
     
+    def start_log_streaming(self):
+        """logs/*.log に追記された行をダッシュボードに送る（watchdog がなければポーリング）"""
+        config = load_log_streaming_config(self.orchestra_dir)
+        self.log_tailer = LogTailer(
+            self.logs_dir,
+            self.send_logs,
+            batch_window_seconds=config.get('batch_window_seconds', 0.02),
+            poll_interval_seconds=config.get('poll_interval_seconds', 0.5)
+        ).start(self.observer)
+        print(f"ログのストリーミングを開始しました: {self.logs_dir}")
+    
+    def send_logs(self, entries):
+        """新しいログ行を送信キューに積む（まとめて送信される）"""
+        for entry in entries:
+            project_id = self.task_projects.project_of(entry.get('taskId'))
+            if project_id:
+                entry['projectId'] = project_id
+            self.send_to_websocket('log', entry)
+    
+    def flush_suppressed_logs(self):
+        """レート制限で省略したログの件数をダッシュボードに知らせる"""
+        with self.dashboard_lock:
+            events = self.dashboard_subscription.flush()
+        for event, payload in events:
+            self.delivery.send(event, payload)
+    
+    def publish_agent_status(self, agents):
+        """変化があったときだけファイルに保存し、差分（定期的にキーフレーム）を送信"""
+        with self.status_lock:
+            update = self.status_differ.diff(agents)
+            if update:
+                self.published_agents = agents
+        if update:
+            if update['changes']:
+                self.save_agent_status(agents)
+            STATUS_UPDATES.inc(kind='keyframe' if update['keyframe'] else 'delta')
+            self.send_to_websocket(STATUS_EVENT, update)
+        return update
+    
+    def monitor_status_once(self):
+        """状態監視の1周（検出・送信を行い、次の待ち時間を決める）"""
+        try:
+            # エージェント状態を検出
+            agents = self.detect_active_agents()
+            AGENTS_DETECTED.set(len(agents))
+            
+            update = self.publish_agent_status(agents)
+            
+            self.flush_suppressed_logs()
+            
+            # デモログを生成（実際のログがない場合）
+            if not self.logs_dir.exists() or not list(self.logs_dir.glob('*.log')):
+                demo_log = self.generate_demo_log()
+                self.send_to_websocket('log', demo_log)
+            
+            # 状態が変わっていれば短い間隔で、変わらなければ間隔を延ばして確認する
+            self.status_cadence.record(bool(update and update['changes']))
+            
+        except Exception as e:
+            print(f"監視ループエラー: {e}")
+            self.status_cadence.failed()
+    
     def start_status_monitor(self):
         """エージェント状態の定期監視を開始"""
+        self.status_cadence.watch(self.observer, self.communication_dir, (self.status_file.name,))
+        
         def monitor_loop():
-            while True:
-                try:
-                    # エージェント状態を検出
-                    agents = self.detect_active_agents()
-                    
-                    # ファイルに保存
-                    self.save_agent_status(agents)
-                    
-                    # WebSocketに送信
-                    self.send_to_websocket('agents', agents)
-                    
-                    # デモログを生成（実際のログがない場合）
-                    if not self.logs_dir.exists() or not list(self.logs_dir.glob('*.log')):
-                        demo_log = self.generate_demo_log()
-                        self.send_to_websocket('log', demo_log)
-                    
-                    time.sleep(5)  # 5秒間隔で更新
-                    
-                except Exception as e:
-                    print(f"監視ループエラー: {e}")
-                    time.sleep(10)
+            while not self.status_cadence.stopped:
+                self.monitor_status_once()
+                self.status_cadence.wait()
         
         monitor_thread = threading.Thread(target=monitor_loop, daemon=True)
         monitor_thread.start()
@@ -239,9 +332,13 @@ class OrchestraWebSocketBridge:
     def run(self):
         """WebSocket Bridgeを開始"""
         print("Yellow Claude Orchestra WebSocket Bridge を開始します...")
+        self.metrics_exporter = metrics.start_metrics_exporter(self.orchestra_dir, 'websocket_bridge')
+        install_profiler(self.orchestra_dir, 'websocket_bridge')
         
-        # 状態監視を開始
+        # 状態監視とログのストリーミングを開始
+        self.start_push_server()
         self.start_status_monitor()
+        self.start_log_streaming()
         
         # メインループ
         try:
@@ -249,8 +346,15 @@ class OrchestraWebSocketBridge:
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\nWebSocket Bridge を停止します...")
-            self.observer.stop()
-            self.observer.join()
+            self.status_cadence.stop()
+            if self.log_tailer:
+                # Observer も合わせて停止する
+                self.log_tailer.stop()
+            self.delivery.stop()
+            if self.push_server:
+                self.push_server.stop()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
 
 def main():
     # 引数からOrchestra ディレクトリを取得
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Admission Control
+タスクリクエストの受付制御（有界キュー・同時実行数制限・バックプレッシャー）
+"""
+
+import threading
+import time
+from collections import deque
+
+from communication import metrics
+from src.scheduler import FairScheduler
+
+# 受付判定の結果
+ADMITTED = 'admitted'
+DEFERRED = 'deferred'
+REJECTED = 'rejected'
+
+QUEUE_WAIT_SECONDS = metrics.histogram('orchestra_queue_wait_seconds',
+                                       'Time from enqueue to start of processing', ('queue',))
+
+
+class AdmissionController:
+    """有界キューと同時実行数の上限でタスクの受付を制御する"""
+
+    def __init__(self, max_queue_depth=50, max_concurrency=2, max_defer_seconds=300,
+                 overflow_policy='defer', scheduler=None):
+        self.max_queue_depth = max_queue_depth
+        self.max_concurrency = max_concurrency
+        self.max_defer_seconds = max_defer_seconds
+        self.overflow_policy = overflow_policy
+
+        # キューの並び順はスケジューラ（プロジェクト間の公平性）に委ねる
+        self.scheduler = scheduler or FairScheduler()
+        self.running_keys = {}
+        self.deferred_since = {}
+        self.lock = threading.Lock()
+
+        # メトリクス
+        self.admitted_total = 0
+        self.deferred_total = 0
+        self.rejected_total = 0
+        self.completed_total = 0
+        self.wait_times = deque(maxlen=500)
+
+    def is_tracked(self, key):
+        """キュー待ちまたは実行中かどうか"""
+        with self.lock:
+            return key in self.running_keys or self.scheduler.contains(key)
+
+    def offer(self, key, item, project_id=None, priority='medium'):
+        """リクエストを受付キューに投入し、受付判定を返す"""
+        now = time.monotonic()
+        with self.lock:
+            if key in self.running_keys or self.scheduler.contains(key):
+                return ADMITTED
+
+            if self.scheduler.depth() < self.max_queue_depth:
+                self.scheduler.enqueue(project_id, key, (item, now), priority)
+                self.deferred_since.pop(key, None)
+                self.admitted_total += 1
+                return ADMITTED
+
+            # キューが満杯: 保留または拒否
+            if self.overflow_policy == 'reject':
+                self.rejected_total += 1
+                return REJECTED
+
+            if key not in self.deferred_since:
+                self.deferred_since[key] = now
+                self.deferred_total += 1
+            elif now - self.deferred_since[key] >= self.max_defer_seconds:
+                del self.deferred_since[key]
+                self.rejected_total += 1
+                return REJECTED
+
+            return DEFERRED
+
+    def prune_deferred(self, present_keys):
+        """今回の走査で見つからなかった（削除・別経路で処理された）リクエストの保留記録を捨てる"""
+        with self.lock:
+            for key in [key for key in self.deferred_since if key not in present_keys]:
+                del self.deferred_since[key]
+
+    def acquire(self):
+        """空きスロットがあればスケジューラが選んだ次のリクエストを取り出す"""
+        with self.lock:
+            if len(self.running_keys) >= self.max_concurrency:
+                return None
+
+            entry = self.scheduler.dequeue()
+            if entry is None:
+                return None
+
+            project_id, key, (item, enqueued_at) = entry
+            self.running_keys[key] = project_id
+            wait = time.monotonic() - enqueued_at
+            self.wait_times.append(wait)
+            QUEUE_WAIT_SECONDS.observe(wait, queue='admission')
+            return key, item
+
+    def release(self, key):
+        """実行完了したリクエストのスロットを解放"""
+        with self.lock:
+            if key in self.running_keys:
+                self.scheduler.release(self.running_keys.pop(key))
+                self.completed_total += 1
+
+    def metrics(self):
+        """キュー深さと待ち時間のメトリクスを取得"""
+        with self.lock:
+            waits = sorted(self.wait_times)
+            projects = self.scheduler.stats()
+            oldest_wait = max((p['latency_seconds']['oldest_queued'] for p in projects.values()), default=0.0)
+
+            return {
+                'queue_depth': self.scheduler.depth(),
+                'max_queue_depth': self.max_queue_depth,
+                'running': len(self.running_keys),
+                'max_concurrency': self.max_concurrency,
+                'deferred': len(self.deferred_since),
+                'admitted_total': self.admitted_total,
+                'deferred_total': self.deferred_total,
+                'rejected_total': self.rejected_total,
+                'completed_total': self.completed_total,
+                'wait_seconds': {
+                    'avg': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                    'max': round(waits[-1], 3) if waits else 0.0,
+                    'oldest_queued': oldest_wait
+                },
+                'projects': projects
+            }
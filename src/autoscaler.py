@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Actor Autoscaler
+保留タスク数と待ち時間に応じてActorワーカープロセスを起動・停止する
+"""
+
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+class ActorAutoscaler:
+    """キュー深さに応じて min_actors〜max_actors の範囲でワーカーを増減する
+
+    スケールアウトは「保留タスク数がワーカー数×tasks_per_actor を超える」か
+    「平均待ち時間が scale_up_wait_seconds を超える」とき。
+    スケールインは保留タスク数がワーカー1台分少ない容量の半分以下の状態が
+    scale_down_idle_seconds 続いたとき。どちらも cooldown_seconds 以内には
+    繰り返さない（ヒステリシス）。
+    """
+
+    def __init__(self, base_dir, min_actors=1, max_actors=7, tasks_per_actor=2,
+                 scale_up_wait_seconds=30, scale_down_idle_seconds=120,
+                 cooldown_seconds=15, heartbeat_timeout_seconds=60, stop_timeout_seconds=60):
+        self.base_dir = Path(base_dir)
+        self.min_actors = min_actors
+        self.max_actors = max(max_actors, min_actors)
+        self.tasks_per_actor = tasks_per_actor
+        self.scale_up_wait_seconds = scale_up_wait_seconds
+        self.scale_down_idle_seconds = scale_down_idle_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.heartbeat_timeout_seconds = heartbeat_timeout_seconds
+        self.stop_timeout_seconds = stop_timeout_seconds
+
+        self.workers = {}
+        self.stopping = {}
+        self.next_worker_number = 1
+        self.last_scale_at = 0.0
+        self.low_load_since = None
+
+    @property
+    def size(self):
+        return len(self.workers)
+
+    def evaluate(self, pending_depth, avg_wait_seconds):
+        """負荷を評価してワーカー数を調整し、実施したアクションを返す"""
+        now = time.monotonic()
+
+        # 最小台数は常に確保
+        while self.size < self.min_actors:
+            self.start_worker()
+            self.last_scale_at = now
+
+        if now - self.last_scale_at < self.cooldown_seconds:
+            return None
+
+        overloaded = (pending_depth > self.size * self.tasks_per_actor or
+                      (pending_depth > 0 and avg_wait_seconds > self.scale_up_wait_seconds))
+        if overloaded and self.size < self.max_actors:
+            self.low_load_since = None
+            worker_id = self.start_worker()
+            self.last_scale_at = now
+            return ('scale_up', worker_id)
+
+        underloaded = pending_depth <= (self.size - 1) * self.tasks_per_actor / 2
+        if not underloaded or self.size <= self.min_actors:
+            self.low_load_since = None
+            return None
+
+        if self.low_load_since is None:
+            self.low_load_since = now
+        elif now - self.low_load_since >= self.scale_down_idle_seconds:
+            self.low_load_since = None
+            worker_id = self.stop_worker()
+            self.last_scale_at = now
+            return ('scale_down', worker_id)
+        return None
+
+    def start_worker(self):
+        """Actorワーカープロセスを起動"""
+        worker_id = f'actor-{self.next_worker_number}'
+        self.next_worker_number += 1
+        script = Path(__file__).resolve().parent / 'task_processor.py'
+        process = subprocess.Popen([sys.executable, str(script), str(self.base_dir), '--actor', worker_id])
+        self.workers[worker_id] = process
+        print(f"📈 Actor worker started: {worker_id} (PID: {process.pid})")
+        return worker_id
+
+    def stop_worker(self, worker_id=None):
+        """ワーカーにSIGTERMを送り、実行中のタスク完了後に終了させる"""
+        if worker_id is None:
+            # 最後に起動したワーカーから停止
+            worker_id = list(self.workers)[-1]
+        process = self.workers.pop(worker_id)
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+        self.stopping[worker_id] = (process, time.monotonic())
+        print(f"📉 Actor worker stopping: {worker_id} (PID: {process.pid})")
+        return worker_id
+
+    def reap(self, heartbeats):
+        """終了したワーカー・応答のないワーカーを整理し、終了済みのIDの一覧を返す
+
+        heartbeats: {worker_id: 最終ハートビートからの経過秒数}
+        """
+        removed = []
+        now = time.monotonic()
+
+        for worker_id, process in list(self.workers.items()):
+            if process.poll() is not None:
+                print(f"⚠️ Actor worker exited unexpectedly: {worker_id} (code: {process.returncode})")
+                del self.workers[worker_id]
+                removed.append(worker_id)
+            elif heartbeats.get(worker_id, 0) > self.heartbeat_timeout_seconds:
+                print(f"⚠️ Actor worker heartbeat timed out: {worker_id}")
+                self.stop_worker(worker_id)
+
+        for worker_id, (process, stop_requested_at) in list(self.stopping.items()):
+            if process.poll() is not None:
+                del self.stopping[worker_id]
+                removed.append(worker_id)
+            elif now - stop_requested_at > self.stop_timeout_seconds:
+                process.kill()
+
+        return removed
+
+    def stop_all(self, timeout=None):
+        """全ワーカーを停止して終了を待つ"""
+        for worker_id in list(self.workers):
+            self.stop_worker(worker_id)
+        deadline = time.monotonic() + (timeout or self.stop_timeout_seconds)
+        for worker_id, (process, _) in list(self.stopping.items()):
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.stopping.clear()
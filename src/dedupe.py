@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Processed Message Index
+処理済みメッセージの永続インデックス（メッセージIDによる重複排除と、同じタスクの再送の内容による検出）
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+from communication.durable import atomic_write_json
+
+# メッセージの処理段階
+RESULT_RECORDED = 'result_recorded'
+COMMITTED = 'committed'
+
+
+# 内容が同じなら重複とみなすメッセージの種類（data にタスクIDを含むので同じタスクの再送だけが一致する）
+# チャットなどは同じ文面（「OK」など）でも送信ごとに別のメッセージ
+CONTENT_DEDUPE_TYPES = ('task_request',)
+
+
+def message_fingerprint(message):
+    """メッセージのハッシュ
+
+    task_request は ID・タイムスタンプを除いた type と data から計算し、同じタスクの再送を検出する。
+    それ以外は ID・タイムスタンプも含めるので、同じメッセージの再処理以外では一致しない。
+    """
+    content = {'type': message.get('type'), 'data': message.get('data')}
+    if message.get('type') not in CONTENT_DEDUPE_TYPES:
+        content.update(id=message.get('id'), timestamp=message.get('timestamp'))
+    content = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ProcessedMessageIndex:
+    """メッセージごとの処理結果と確定状態を記録する
+
+    Claude呼び出しなど高コストな処理の結果はタスク状態の更新より前に
+    RESULT_RECORDED として保存する。クラッシュ後の再処理ではその結果を
+    再利用し、COMMITTED になったメッセージは二度と処理しない。
+    同じタスクの task_request の再送（fingerprint が一致）は content_window_seconds 以内なら重複とみなす。
+    """
+
+    def __init__(self, index_file, content_window_seconds=600, max_entries=2000):
+        self.index_file = index_file
+        self.content_window_seconds = content_window_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.entries = self._load()
+        self.by_fingerprint = {entry['fingerprint']: message_id
+                               for message_id, entry in self.entries.items()}
+
+    def _load(self):
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('messages', {})
+        except Exception as e:
+            print(f"Error loading processed message index: {e}")
+        return {}
+
+    def _save(self, changed):
+        atomic_write_json(self.index_file, {'messages': self.entries}, changed=changed)
+
+    def lookup(self, message_id, fingerprint):
+        """メッセージIDまたは（期間内の）同じ fingerprint で記録済みのエントリを返す"""
+        with self.lock:
+            entry = self.entries.get(message_id)
+            if entry:
+                return entry
+
+            other_id = self.by_fingerprint.get(fingerprint)
+            other = self.entries.get(other_id)
+            if (other and other['status'] == COMMITTED and
+                    time.time() - other['committedAt'] <= self.content_window_seconds):
+                return other
+            return None
+
+    def claim(self, message_id, fingerprint):
+        """同じ内容のメッセージが処理中でなければ処理権を得る"""
+        with self.lock:
+            return self.in_flight.setdefault(fingerprint, message_id) == message_id
+
+    def release(self, message_id, fingerprint):
+        with self.lock:
+            if self.in_flight.get(fingerprint) == message_id:
+                del self.in_flight[fingerprint]
+
+    def record_result(self, message_id, fingerprint, result):
+        """高コストな処理の結果を状態更新の前に保存"""
+        with self.lock:
+            self.entries[message_id] = {
+                'fingerprint': fingerprint,
+                'status': RESULT_RECORDED,
+                'result': result,
+                'recordedAt': datetime.now().isoformat()
+            }
+            self.by_fingerprint[fingerprint] = message_id
+            self._save([message_id])
+
+    def mark_committed(self, message_id, fingerprint):
+        """メッセージの処理完了を確定（結果本体は不要になるので破棄）"""
+        with self.lock:
+            entry = self.entries.get(message_id, {})
+            entry.update({
+                'fingerprint': fingerprint,
+                'status': COMMITTED,
+                'committedAt': time.time()
+            })
+            entry.pop('result', None)
+            self.entries[message_id] = entry
+            self.by_fingerprint[fingerprint] = message_id
+            self._prune()
+            self._save([message_id])
+
+    def _prune(self):
+        """確定済みのエントリを古いものから削除（結果を保持中のものは残す）"""
+        committed = [message_id for message_id, entry in self.entries.items()
+                     if entry['status'] == COMMITTED]
+        excess = len(self.entries) - self.max_entries
+        if excess <= 0:
+            return
+        committed.sort(key=lambda message_id: self.entries[message_id]['committedAt'])
+        for message_id in committed[:excess]:
+            entry = self.entries.pop(message_id)
+            if self.by_fingerprint.get(entry['fingerprint']) == message_id:
+                del self.by_fingerprint[entry['fingerprint']]
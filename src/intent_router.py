@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Intent Router
+タスクのタイトル・説明から処理の種類（インテント）を判定する
+
+ルート表のキーワードは1つの正規表現（キーワードのトライ）にまとめて
+コンパイルされ、テキストを1回走査するだけで全ルートを判定する。
+判定にかかる時間はテキスト長に比例し、ルート数にはほぼ依存しない。
+"""
+
+import re
+import sys
+import time
+from functools import lru_cache
+
+# インテント
+DATETIME = 'datetime'
+GITHUB = 'github'
+CODE_MODIFICATION = 'code_modification'
+HELLO_WORLD = 'hello_world'
+GENERAL = 'general'
+
+# ルート表（上にあるものほど優先）
+#   fields: 判定に使うフィールド
+#   any: いずれかのキーワードを含めば一致 / all: すべてのキーワードを含めば一致
+# キーワードは小文字で書く（テキストは小文字化して照合する）
+ROUTES = (
+    {'intent': DATETIME, 'fields': ('title',), 'any': ('時刻', '日時')},
+    {'intent': GITHUB, 'fields': ('title',), 'any': ('github', 'イシュー', 'status')},
+    {'intent': CODE_MODIFICATION, 'fields': ('title', 'description'), 'any': (
+        '修正', 'fix', 'bug', 'バグ', 'エラー', 'error',
+        '実装', 'implement', '追加', 'add', '機能', 'feature',
+        '改善', 'improve', 'リファクタ', 'refactor', 'コード', 'code'
+    )},
+    {'intent': HELLO_WORLD, 'fields': ('title',), 'all': ('hello', 'world')},
+)
+
+
+def _trie_pattern(keywords):
+    """キーワード群を共通接頭辞でまとめた正規表現（各位置での試行回数がキーワード数に比例しない）"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    return build(trie)
+
+
+class IntentRouter:
+    """ルート表をコンパイルした単一パスの判定器"""
+
+    def __init__(self, routes=ROUTES):
+        self.routes = tuple(routes)
+        keywords = {keyword for route in self.routes
+                    for keyword in route.get('any', ()) + route.get('all', ())}
+
+        # 先読みで全位置を走査するので、他のキーワードの途中に現れるキーワードも拾える
+        self.pattern = re.compile('(?=(' + _trie_pattern(keywords) + '))')
+
+        # 長いキーワードに一致した位置では、その接頭辞になっているキーワードも一致している
+        self.implied = {keyword: tuple(other for other in keywords if keyword.startswith(other))
+                        for keyword in keywords}
+
+        # (フィールド, キーワード) -> そのキーワードを使うルートの番号
+        self.index = {}
+        for number, route in enumerate(self.routes):
+            for field in route['fields']:
+                for keyword in route.get('any', ()) + route.get('all', ()):
+                    self.index.setdefault((field, keyword), []).append(number)
+
+    def scan(self, title, description=''):
+        """タイトル・説明に含まれるキーワードを1回の走査で (フィールド, キーワード) の集合として返す"""
+        # 小文字化で長さが変わる文字（'İ' など）があるので、境界は小文字化したタイトルの長さ
+        title = title.lower()
+        text = f"{title}\n{description.lower()}"
+        boundary = len(title)
+        found = set()
+        for match in self.pattern.finditer(text):
+            field = 'title' if match.start() < boundary else 'description'
+            for keyword in self.implied[match.group(1)]:
+                found.add((field, keyword))
+        return found
+
+    def route(self, title, description=''):
+        """最初に一致したルートのインテント（どれにも一致しなければ GENERAL）"""
+        # 見つかったキーワードに関係するルートだけを優先順に確認する
+        hits = {}
+        for key in self.scan(title or '', description or ''):
+            for number in self.index.get(key, ()):
+                hits.setdefault(number, set()).add(key[1])
+
+        for number in sorted(hits):
+            route = self.routes[number]
+            if 'all' in route and not hits[number].issuperset(route['all']):
+                continue
+            if 'any' in route and not hits[number].intersection(route['any']):
+                continue
+            return route['intent']
+        return GENERAL
+
+
+_router = IntentRouter()
+
+
+@lru_cache(maxsize=1024)
+def classify(title, description=''):
+    """タスクのインテントを判定（同じ入力の判定結果はキャッシュする）"""
+    return _router.route(title, description)
+
+
+def classify_task(task):
+    return classify(task.get('title') or '', task.get('description') or '')
+
+
+def benchmark(iterations=20000, extra_routes=200):
+    """連鎖した部分文字列チェックとの比較（ルートを増やしたときの伸び方を見る）"""
+    code_keywords = ROUTES[2]['any']
+    samples = [
+        ('現在の時刻を教えて', ''),
+        ('GitHub のイシュー一覧', ''),
+        ('ログイン画面のバグを修正', 'エラーメッセージが表示されない'),
+        ('hello world', ''),
+        ('プロジェクトの概要を説明してください', 'Next.js と Python で構成されたオーケストレーションシステム'),
+    ]
+
+    def chained(title, description, keywords):
+        if '時刻' in title or '日時' in title:
+            return DATETIME
+        if 'github' in title.lower() or 'イシュー' in title or 'status' in title.lower():
+            return GITHUB
+        text = f"{title} {description}".lower()
+        if any(keyword in text for keyword in keywords):
+            return CODE_MODIFICATION
+        if 'hello' in title.lower() and 'world' in title.lower():
+            return HELLO_WORLD
+        return GENERAL
+
+    def measure(func):
+        start = time.perf_counter()
+        for i in range(iterations):
+            title, description = samples[i % len(samples)]
+            func(title, description)
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    results = {}
+    for label, routes in (('default', ROUTES),
+                          (f'+{extra_routes} routes', ROUTES + tuple(
+                              {'intent': f'route_{i}', 'fields': ('title', 'description'), 'any': (f'kw{i}x',)}
+                              for i in range(extra_routes)))):
+        keywords = code_keywords + tuple(kw for route in routes[len(ROUTES):] for kw in route['any'])
+        router = IntentRouter(routes)
+        results[label] = {
+            'chained_us': round(measure(lambda t, d: chained(t, d, keywords)), 3),
+            'compiled_us': round(measure(router.route), 3),
+        }
+    classify.cache_clear()
+    results['cached_us'] = round(measure(classify), 3)
+    return results
+
+
+if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        for label, result in benchmark().items():
+            print(f"{label}: {result}")
+    else:
+        print(classify(' '.join(sys.argv[1:])))
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Fair Scheduler
+プロジェクト単位のキューと重み付きDeficit Round Robinによる公平なタスク配分
+（プロジェクト内は優先度順、待ち時間によるエージングあり）
+"""
+
+import heapq
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+# 重みの下限（1ラウンドあたりの加算量がこれ未満だと選出まで時間がかかりすぎる）
+MIN_WEIGHT = 0.1
+
+# 優先度の序列（Task.priority: 'low' | 'medium' | 'high'）
+PRIORITY_RANKS = {'low': 0, 'medium': 1, 'high': 2}
+DEFAULT_PRIORITY = 'medium'
+
+
+def task_priority(task):
+    """タスクの優先度を取得（hotfixタグ付きは high 扱い）"""
+    if 'hotfix' in (task.get('tags') or []):
+        return 'high'
+    priority = task.get('priority')
+    return priority if priority in PRIORITY_RANKS else DEFAULT_PRIORITY
+
+
+class AgingPriorityQueue:
+    """優先度付きヒープ。優先度を「待ち時間の前借り」に換算してエージングを実現する
+
+    並び順のキーは (投入時刻 - 優先度ランク × aging_seconds)。
+    低優先度のアイテムも待ち時間が aging_seconds を超えるたびに1ランク分
+    前に進むため、後から来る高優先度アイテムに無期限に追い越されることはない。
+    """
+
+    def __init__(self, aging_seconds=300):
+        self.aging_seconds = aging_seconds
+        self.heap = []
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, key, item, priority=DEFAULT_PRIORITY, enqueued_at=None):
+        enqueued_at = time.monotonic() if enqueued_at is None else enqueued_at
+        rank = PRIORITY_RANKS.get(priority, PRIORITY_RANKS[DEFAULT_PRIORITY])
+        sort_key = enqueued_at - rank * self.aging_seconds
+        heapq.heappush(self.heap, (sort_key, next(self.counter), key, item, priority, enqueued_at))
+
+    def pop(self):
+        _, _, key, item, priority, enqueued_at = heapq.heappop(self.heap)
+        return key, item, priority, enqueued_at
+
+    def oldest_enqueued_at(self):
+        return min((entry[5] for entry in self.heap), default=None)
+
+    def highest_rank(self):
+        return max((PRIORITY_RANKS.get(entry[4], 0) for entry in self.heap), default=-1)
+
+    def count_above(self, rank):
+        """rank より高い優先度のアイテム数"""
+        return sum(1 for entry in self.heap if PRIORITY_RANKS.get(entry[4], 0) > rank)
+
+
+class FairScheduler:
+    """プロジェクトごとのキューを重み付きDRRで巡回し、1件ずつ取り出す"""
+
+    def __init__(self, default_weight=1.0, default_max_concurrency=None, aging_seconds=300):
+        self.default_weight = default_weight
+        self.aging_seconds = aging_seconds
+        self.default_max_concurrency = default_max_concurrency
+        self.policies = {}
+
+        self.queues = {}
+        self.active = deque()
+        self.deficit = {}
+        self.running = {}
+        self.keys = set()
+        self.fresh_turn = True
+        self.lock = threading.Lock()
+        # 中断を譲った実行中アイテムの優先度ランク（高優先度アイテムが取り出されるまで保持）
+        self.preemption_claims = []
+
+        # プロジェクト別メトリクス
+        self.latencies = {}
+        self.dispatched = {}
+
+    def set_policies(self, policies):
+        """プロジェクト別の重みと同時実行数上限を設定 {project_id: {'weight', 'max_concurrency'}}"""
+        with self.lock:
+            self.policies = dict(policies)
+
+    def weight(self, project_id):
+        weight = self.policies.get(project_id, {}).get('weight') or self.default_weight
+        return max(float(weight), MIN_WEIGHT)
+
+    def max_concurrency(self, project_id):
+        limit = self.policies.get(project_id, {}).get('max_concurrency')
+        return limit if limit else self.default_max_concurrency
+
+    def contains(self, key):
+        with self.lock:
+            return key in self.keys
+
+    def depth(self):
+        """全プロジェクトのキュー待ち件数"""
+        with self.lock:
+            return sum(len(q) for q in self.queues.values())
+
+    def enqueue(self, project_id, key, item, priority=DEFAULT_PRIORITY, enqueued_at=None):
+        """プロジェクトのキューにアイテムを追加（enqueued_at を渡すと待ち時間を引き継ぐ）"""
+        project_id = project_id or 'default'
+        with self.lock:
+            if key in self.keys:
+                return False
+            queue = self.queues.setdefault(project_id, AgingPriorityQueue(self.aging_seconds))
+            if not queue and project_id not in self.active:
+                self.active.append(project_id)
+                self.deficit[project_id] = 0.0
+            queue.push(key, item, priority, enqueued_at)
+            self.keys.add(key)
+            return True
+
+    def claim_preemption(self, priority):
+        """指定優先度の実行中アイテムが中断して枠を譲るべきかを判定し、譲るならその権利を1つ確保する
+
+        待っている高優先度アイテム1件につき中断するのは1件だけ（既に譲られた分は差し引く）。
+        確保した権利は高優先度アイテムが取り出されたときに解放される。
+        """
+        rank = PRIORITY_RANKS.get(priority, PRIORITY_RANKS[DEFAULT_PRIORITY])
+        with self.lock:
+            waiting = 0
+            for project_id, queue in self.queues.items():
+                limit = self.max_concurrency(project_id)
+                if limit and self.running.get(project_id, 0) >= limit:
+                    continue
+                waiting += queue.count_above(rank)
+            claimed = sum(1 for claim in self.preemption_claims if claim <= rank)
+            if waiting <= claimed:
+                return False
+            self.preemption_claims.append(rank)
+            return True
+
+    def dequeue(self):
+        """DRRで次のアイテムを選出（上限に達したプロジェクトは飛ばす）"""
+        with self.lock:
+            attempts = 0
+            max_attempts = len(self.active) * (int(1 / MIN_WEIGHT) + 2)
+
+            while self.active and attempts <= max_attempts:
+                project_id = self.active[0]
+                queue = self.queues.get(project_id)
+
+                if not queue:
+                    self.active.popleft()
+                    self.deficit.pop(project_id, None)
+                    self.fresh_turn = True
+                    continue
+
+                limit = self.max_concurrency(project_id)
+                if limit and self.running.get(project_id, 0) >= limit:
+                    self.active.rotate(-1)
+                    self.fresh_turn = True
+                    attempts += 1
+                    continue
+
+                if self.fresh_turn:
+                    self.deficit[project_id] += self.weight(project_id)
+                    self.fresh_turn = False
+
+                if self.deficit[project_id] >= 1:
+                    self.deficit[project_id] -= 1
+                    return self._take(project_id, queue.pop())
+
+                self.active.rotate(-1)
+                self.fresh_turn = True
+                attempts += 1
+
+            return None
+
+    def _take(self, project_id, entry):
+        key, item, priority, enqueued_at = entry
+        self.keys.discard(key)
+        # このアイテムのために枠を譲った中断があれば、その権利を解放
+        rank = PRIORITY_RANKS.get(priority, PRIORITY_RANKS[DEFAULT_PRIORITY])
+        lower = [claim for claim in self.preemption_claims if claim < rank]
+        if lower:
+            self.preemption_claims.remove(max(lower))
+        self.running[project_id] = self.running.get(project_id, 0) + 1
+        self.dispatched[project_id] = self.dispatched.get(project_id, 0) + 1
+        self.latencies.setdefault(project_id, deque(maxlen=200)).append(time.monotonic() - enqueued_at)
+
+        if not self.queues[project_id]:
+            self.active.remove(project_id)
+            self.deficit.pop(project_id, None)
+            self.fresh_turn = True
+
+        return project_id, key, item
+
+    def release(self, project_id):
+        """実行完了したアイテムの実行枠を解放"""
+        project_id = project_id or 'default'
+        with self.lock:
+            if self.running.get(project_id):
+                self.running[project_id] -= 1
+
+    def stats(self):
+        """プロジェクト別のキュー深さ・実行数・待ち時間"""
+        now = time.monotonic()
+        with self.lock:
+            project_ids = set(self.queues) | set(self.running) | set(self.dispatched)
+            stats = {}
+            for project_id in sorted(project_ids):
+                queue = self.queues.get(project_id) or ()
+                oldest = queue.oldest_enqueued_at() if queue else None
+                waits = sorted(self.latencies.get(project_id, ()))
+                stats[project_id] = {
+                    'queue_depth': len(queue),
+                    'running': self.running.get(project_id, 0),
+                    'weight': self.weight(project_id),
+                    'max_concurrency': self.max_concurrency(project_id),
+                    'dispatched_total': self.dispatched.get(project_id, 0),
+                    'latency_seconds': {
+                        'avg': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                        'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                        'max': round(waits[-1], 3) if waits else 0.0,
+                        'oldest_queued': round(now - oldest, 3) if oldest is not None else 0.0
+                    }
+                }
+            return stats
+
+
+def load_project_policies(projects_file):
+    """projects.json からプロジェクト別のスケジューリング設定を読み込み"""
+    policies = {}
+    try:
+        if projects_file.exists():
+            with open(projects_file, 'r', encoding='utf-8') as f:
+                for project in json.load(f):
+                    if project.get('id'):
+                        policies[project['id']] = {
+                            'weight': project.get('weight'),
+                            'max_concurrency': project.get('maxConcurrency')
+                        }
+    except Exception as e:
+        print(f"Error loading project policies: {e}")
+    return policies
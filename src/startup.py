@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Startup Snapshot
+再起動時にメッセージディレクトリの走査と tasks.json の解析をやり直さないための索引のスナップショット
+
+スナップショットの各項目は元ファイルの署名と一緒に保存し、署名が一致するものだけを復元する
+（一致しなければ通常どおり読み直すので、古いスナップショットでも動作は変わらない）。
+"""
+
+import json
+import os
+
+from communication.durable import atomic_write_text, current_version
+
+SNAPSHOT_VERSION = 1
+
+
+def file_signature(path):
+    """ファイルの変更検出用の署名 [ジャーナルのバージョン, inode, mtime_ns, size]（存在しなければ None）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [current_version(path), stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def stat_signature(path):
+    """ジャーナルを持たないファイル・ディレクトリの署名 [inode, mtime_ns, size]"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+class StartupSnapshot:
+    """data/startup_snapshot.json の読み書き（内容が変わったときだけ書き込む）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.last_written = None
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if isinstance(state, dict) and state.get('version') == SNAPSHOT_VERSION:
+                return state
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading startup snapshot: {e}")
+        return {}
+
+    def save(self, state):
+        try:
+            text = json.dumps(dict(state, version=SNAPSHOT_VERSION), ensure_ascii=False)
+            if text == self.last_written:
+                return False
+            atomic_write_text(self.path, text)
+            self.last_written = text
+            return True
+        except Exception as e:
+            print(f"Error saving startup snapshot: {e}")
+            return False
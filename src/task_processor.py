@@ -8,13 +8,53 @@ import json
 import time
 import os
 import sys
+import signal
 import subprocess
 import threading
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+# `python src/task_processor.py` と `python -m src.task_processor` の両方で動作させる
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from communication import metrics, tracing
+from communication.agent_registry import AgentRegistration, load_discovery_config
+from communication.cadence import AdaptiveCadence, create_observer
+from communication.durable import atomic_write_json, atomic_write_text
+from communication.ids import new_id
+from communication.metrics import start_metrics_exporter
+from communication.profiler import install_profiler
+from communication.status_stream import agent_fingerprint, load_status_stream_config
+from communication.status_table import open_status_table
+from src.admission import AdmissionController, ADMITTED, DEFERRED, REJECTED, QUEUE_WAIT_SECONDS
+from src.autoscaler import ActorAutoscaler
+from src.intent_router import CODE_MODIFICATION, DATETIME, GENERAL, GITHUB, HELLO_WORLD, classify_task
+from src.dedupe import COMMITTED, RESULT_RECORDED, ProcessedMessageIndex, message_fingerprint
+from src.scheduler import FairScheduler, load_project_policies, task_priority
+from src.startup import StartupSnapshot, file_signature, stat_signature
+from src.workflow import StepPreempted, WorkflowEngine, compile_workflow, load_workflows
+
+CLAUDE_CALL_SECONDS = metrics.histogram('orchestra_claude_call_seconds',
+                                        'Claude Code CLI subprocess duration', ('call',))
+GIT_SECONDS = metrics.histogram('orchestra_git_seconds', 'git clone/pull duration', ('operation',))
+TASKS_SAVE_SECONDS = metrics.histogram('orchestra_tasks_save_seconds', 'tasks.json write duration')
+MESSAGES_PROCESSED = metrics.counter('orchestra_messages_processed',
+                                     'Task messages handled by the task processor', ('type',))
+DUPLICATE_MESSAGES = metrics.counter('orchestra_duplicate_messages', 'Duplicate task messages skipped')
+WORKFLOWS_FINISHED = metrics.counter('orchestra_workflows_finished', 'Finished task workflows', ('status',))
+QUEUE_DEPTH = metrics.gauge('orchestra_queue_depth', 'Queued requests and pending tasks', ('queue',))
+RUNNING_REQUESTS = metrics.gauge('orchestra_running_requests', 'Requests being processed by workers')
+
+# メインループを起こすメッセージファイル（process_messages の処理対象）
+REQUEST_MESSAGE_PATTERNS = ('task-*.json', 'msg-*.json', 'agent-msg-*.json')
+# チェックポイントから再開しうるタスクの状態（これ以外はチェックポイントを削除する）
+RESUMABLE_STATUSES = ('pending', 'deferred', 'in_progress')
+
 class TaskProcessor:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, worker_id=None):
         self.base_dir = Path(base_dir)
         self.tasks_file = self.base_dir / 'data' / 'tasks.json'
         self.messages_dir = self.base_dir / 'communication' / 'messages'
@@ -22,16 +62,219 @@ class TaskProcessor:
         self.status_file = self.base_dir / 'communication' / 'agent_status.json'
         self.running = True
         
+        # worker_id 指定時はオートスケーラーが起動したActorワーカーとして動作する
+        self.worker_id = worker_id
+        self.agent_id = worker_id or 'task-processor'
+        
+        # tasks.json はワーカープロセス間でも共有されるためファイルロックも併用する
+        self.tasks_lock = threading.RLock()
+        self.tasks_lock_file = self.base_dir / 'data' / 'tasks.json.lock'
+        self.tasks_lock_depth = 0
+        self.tasks_lock_handle = None
+        # エージェント状態は共有テーブルの自分のスロットに書き、agent_status.json はそのミラー
+        self.status_table = open_status_table(self.base_dir)
+        # 状態が変わらなければ heartbeat_seconds ごとにしか agent_status.json を書き換えない
+        self.status_heartbeat_seconds = load_status_stream_config(self.base_dir).get('heartbeat_seconds', 30)
+        self.published_status = None
+        
         # ディレクトリ作成
         self.tasks_file.parent.mkdir(parents=True, exist_ok=True)
         self.messages_dir.mkdir(parents=True, exist_ok=True)
         self.archive_dir.mkdir(parents=True, exist_ok=True)
         self.status_file.parent.mkdir(parents=True, exist_ok=True)
         
-        print(f"Task Processor initialized: {self.base_dir}")
+        # 受付制御（有界キュー + 同時実行数制限）
+        self.processing_config = self.load_processing_config()
+        self.projects_file = self.base_dir / 'data' / 'projects.json'
+        self.admission = AdmissionController(
+            max_queue_depth=self.processing_config.get('max_queue_depth', 50),
+            max_concurrency=self.processing_config.get('max_concurrency', 2),
+            max_defer_seconds=self.processing_config.get('max_defer_seconds', 300),
+            overflow_policy=self.processing_config.get('overflow_policy', 'defer'),
+            scheduler=self.create_scheduler()
+        )
+        # tasks.json 上の保留タスク用（プロジェクト間で公平に処理順を決める）
+        self.task_scheduler = self.create_scheduler()
+        
+        # ワークフロー（orchestra.json の workflows をDAGとして実行）
+        self.workflows = load_workflows(self.base_dir / 'config' / 'orchestra.json')
+        self.workflow_engine = WorkflowEngine(
+            max_workers=self.processing_config.get('workflow_workers', 4),
+            checkpoint_dir=self.base_dir / 'data' / 'workflow_checkpoints'
+        )
+        self.max_active_workflows = self.processing_config.get(
+            'max_active_workflows', self.workflow_engine.max_workers
+        )
+        
+        # Actorワーカーのオートスケール（コーディネーターのみ）
+        self.autoscaling_config = self.load_autoscaling_config()
+        self.autoscaler = None
+        if self.worker_id:
+            self.max_active_workflows = self.autoscaling_config.get('tasks_per_actor', 2)
+        elif self.autoscaling_config.get('enabled'):
+            self.autoscaler = ActorAutoscaler(
+                self.base_dir,
+                min_actors=self.autoscaling_config.get('min_actors', 1),
+                max_actors=self.autoscaling_config['max_actors'],
+                tasks_per_actor=self.autoscaling_config.get('tasks_per_actor', 2),
+                scale_up_wait_seconds=self.autoscaling_config.get('scale_up_wait_seconds', 30),
+                scale_down_idle_seconds=self.autoscaling_config.get('scale_down_idle_seconds', 120),
+                cooldown_seconds=self.autoscaling_config.get('cooldown_seconds', 15),
+                heartbeat_timeout_seconds=self.autoscaling_config.get('heartbeat_timeout_seconds', 60)
+            )
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.admission.max_concurrency,
+            thread_name_prefix='task-worker'
+        )
+        self.queue_metrics_file = self.base_dir / self.processing_config.get(
+            'metrics_file', './communication/queue_metrics.json'
+        )
+        # リポジトリのクローン先（相対パスは base_dir 基準）
+        self.workspace_dir = self.base_dir / self.processing_config.get('workspace_dir', '/app/workspace')
+        
+        # 処理済みメッセージの索引（クラッシュ後・重複投入時にClaude呼び出しを繰り返さない）
+        self.processed_messages = ProcessedMessageIndex(
+            self.base_dir / 'data' / 'processed_messages.json',
+            content_window_seconds=self.processing_config.get('dedupe_window_seconds', 600)
+        )
+        
+        self.metrics_exporter = None
+        self.registration = None
+        
+        # トレース（受信から完了までのスパンを logs/traces/ に書き出す）
+        tracing.configure_tracing(self.base_dir, self.agent_id)
+        self.ingested_at = {}
+        
+        # ループの間隔（処理が進めば短く、なければ延ばす。メッセージや tasks.json が変わればすぐ起きる）
+        self.cadence = AdaptiveCadence.from_config(
+            self.base_dir, 'actor_worker' if self.worker_id else 'task_processor',
+            min_interval_seconds=0.5, max_interval_seconds=15.0, error_interval_seconds=10.0
+        )
+        self.activity = threading.Event()
+        self.observer = None
+        
+        # 高速起動（変更のないファイルは読み直さず、再起動時は索引をスナップショットから復元する）
+        self.fast_start = self.processing_config.get('fast_start', False)
+        self.inert_messages = {}
+        self.projects_signature = None
+        self.project_policies = {}
+        self.pending_signature = None
+        self.pending_tasks = []
+        self.startup_snapshot = None
+        if self.fast_start and not self.worker_id:
+            self.startup_snapshot = StartupSnapshot(self.base_dir / 'data' / 'startup_snapshot.json')
+        
+        print(f"Task Processor initialized: {self.base_dir} ({self.agent_id})")
         
+    def load_processing_config(self):
+        """orchestra.json からタスク処理設定を読み込み"""
+        try:
+            config_file = self.base_dir / 'config' / 'orchestra.json'
+            if config_file.exists():
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('task_processing', {})
+        except Exception as e:
+            print(f"Error loading processing config: {e}")
+        return {}
+    
+    def load_autoscaling_config(self):
+        """orchestra.json からオートスケール設定を読み込み（上限は actor.max_instances / system.max_actors）"""
+        try:
+            config_file = self.base_dir / 'config' / 'orchestra.json'
+            if config_file.exists():
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                autoscaling = dict(config.get('autoscaling', {}))
+                limits = [limit for limit in (
+                    autoscaling.get('max_actors'),
+                    config.get('roles', {}).get('actor', {}).get('max_instances'),
+                    config.get('system', {}).get('max_actors')
+                ) if limit]
+                autoscaling['max_actors'] = min(limits) if limits else 1
+                return autoscaling
+        except Exception as e:
+            print(f"Error loading autoscaling config: {e}")
+        return {'max_actors': 1}
+    
+    def create_scheduler(self):
+        """プロジェクト単位の公平スケジューラを作成"""
+        return FairScheduler(
+            default_weight=self.processing_config.get('default_project_weight', 1.0),
+            default_max_concurrency=self.processing_config.get('default_project_max_concurrency'),
+            aging_seconds=self.processing_config.get('priority_aging_seconds', 300)
+        )
+    
+    def refresh_project_policies(self):
+        """projects.json の重み・同時実行数上限をスケジューラに反映"""
+        signature = file_signature(self.projects_file)
+        if self.fast_start and signature is not None and signature == self.projects_signature:
+            return
+        policies = load_project_policies(self.projects_file)
+        self.apply_project_policies(policies, signature)
+    
+    def apply_project_policies(self, policies, signature=None):
+        self.project_policies = policies
+        self.projects_signature = signature
+        self.admission.scheduler.set_policies(policies)
+        self.task_scheduler.set_policies(policies)
+    
+    def restore_startup_snapshot(self):
+        """前回のスナップショットのうち、元ファイルが変わっていない索引だけを復元"""
+        state = self.startup_snapshot.load()
+        if not state:
+            return
+        restored = []
+        
+        # 処理対象外のメッセージ（ファイルごとの署名は process_messages で照合される）
+        inert_messages = state.get('inert_messages') or {}
+        if inert_messages:
+            self.inert_messages = inert_messages
+            restored.append(f"{len(inert_messages)} inert messages")
+        
+        projects = state.get('projects') or {}
+        signature = file_signature(self.projects_file)
+        if signature is not None and projects.get('signature') == signature:
+            self.apply_project_policies(projects.get('policies') or {}, signature)
+            restored.append(f"{len(self.project_policies)} project policies")
+        
+        pending = state.get('pending_tasks') or {}
+        if pending.get('signature') is not None and pending.get('signature') == self.pending_tasks_signature():
+            self.enqueue_tasks(pending.get('tasks') or [])
+            self.pending_signature = pending['signature']
+            restored.append(f"{len(self.pending_tasks)} pending tasks")
+        
+        if restored:
+            print(f"⚡ Startup snapshot restored: {', '.join(restored)}")
+    
+    def save_startup_snapshot(self):
+        """現在の索引をスナップショットに保存（変化がなければ書き込まない）"""
+        if not self.startup_snapshot:
+            return
+        self.startup_snapshot.save({
+            'inert_messages': self.inert_messages,
+            'projects': {'signature': self.projects_signature, 'policies': self.project_policies},
+            'pending_tasks': {'signature': self.pending_signature, 'tasks': self.pending_tasks}
+        })
+    
+    @contextmanager
+    def locked_tasks(self):
+        """tasks.json の読み書きをスレッド間・プロセス間で排他する（再入可能）"""
+        with self.tasks_lock:
+            if self.tasks_lock_depth == 0:
+                self.tasks_lock_handle = open(self.tasks_lock_file, 'a')
+                fcntl.flock(self.tasks_lock_handle.fileno(), fcntl.LOCK_EX)
+            self.tasks_lock_depth += 1
+            try:
+                yield
+            finally:
+                self.tasks_lock_depth -= 1
+                if self.tasks_lock_depth == 0:
+                    fcntl.flock(self.tasks_lock_handle.fileno(), fcntl.LOCK_UN)
+                    self.tasks_lock_handle.close()
+                    self.tasks_lock_handle = None
+    
     def load_tasks(self):
-        """タスクファイルを読み込み"""
+        """タスクファイルを読み込み（書き込みはアトミックなのでロック不要）"""
         try:
             if self.tasks_file.exists():
                 with open(self.tasks_file, 'r', encoding='utf-8') as f:
@@ -42,31 +285,82 @@ class TaskProcessor:
             print(f"Error loading tasks: {e}")
             return []
     
-    def save_tasks(self, tasks):
+    def save_tasks(self, tasks, changed=None):
         """タスクファイルを保存"""
         try:
-            with open(self.tasks_file, 'w', encoding='utf-8') as f:
-                json.dump({'tasks': tasks}, f, indent=2, ensure_ascii=False)
+            with TASKS_SAVE_SECONDS.time():
+                atomic_write_json(self.tasks_file, {'tasks': tasks}, changed=changed)
         except Exception as e:
             print(f"Error saving tasks: {e}")
     
+    def update_task(self, task_id, expected_status=None, **fields):
+        """最新のtasks.jsonに対して単一タスクを更新"""
+        with self.locked_tasks():
+            tasks = self.load_tasks()
+            for task in tasks:
+                if task.get('id') == task_id:
+                    if expected_status and task.get('status') not in expected_status:
+                        return None
+                    task.update(fields)
+                    self.save_tasks(tasks, changed=[task_id])
+                    return task
+        return None
+    
+    def agent_status_entry(self, status, current_task):
+        """このプロセスのエージェント状態エントリ"""
+        if self.worker_id:
+            return {
+                'id': self.worker_id,
+                'type': 'actor',
+                'name': self.worker_id.replace('actor-', 'Actor '),
+                'status': status,
+                'currentTask': current_task,
+                'lastSeen': datetime.now().isoformat(),
+                'pid': os.getpid(),
+                'workerOf': 'task-processor'
+            }
+        entry = {
+            'id': 'task-processor',
+            'type': 'system',
+            'name': 'Task Processor',
+            'status': status,
+            'currentTask': current_task,
+            'lastSeen': datetime.now().isoformat(),
+            'pid': os.getpid()
+        }
+        if self.autoscaler:
+            entry['actors'] = self.autoscaler.size
+        return entry
+    
+    def write_agent_status(self, entry=None, remove_ids=()):
+        """状態テーブルの自分のスロットを更新し、agent_status.json のミラーを書き出す"""
+        if entry:
+            self.status_table.slot(entry['id']).write(entry)
+        for agent_id in remove_ids:
+            self.status_table.release(agent_id)
+        changed = ([entry['id']] if entry else []) + list(remove_ids)
+        self.status_table.write_mirror(self.status_file, changed=sorted(set(changed)))
+        if entry:
+            self.published_status = (agent_fingerprint(entry), time.monotonic())
+    
+    def publish_agent_status(self, entry):
+        """内容が変わったか、前回の書き込みから heartbeat_seconds 経ったときだけ書き込む（lastSeen のみの変化は無視）"""
+        if self.published_status:
+            published_fingerprint, published_at = self.published_status
+            if (agent_fingerprint(entry) == published_fingerprint and
+                    time.monotonic() - published_at < self.status_heartbeat_seconds):
+                return False
+        self.write_agent_status(entry)
+        return True
+    
     def update_agent_status(self):
         """エージェント状態を更新"""
         try:
-            status = [
-                {
-                    'id': 'task-processor',
-                    'type': 'system',
-                    'name': 'Task Processor',
-                    'status': 'active',
-                    'currentTask': 'タスク処理システム稼働中',
-                    'lastSeen': datetime.now().isoformat(),
-                    'pid': os.getpid()
-                }
-            ]
-            
-            with open(self.status_file, 'w', encoding='utf-8') as f:
-                json.dump(status, f, indent=2, ensure_ascii=False)
+            if self.worker_id:
+                current_task = '待機中'
+            else:
+                current_task = 'タスク処理システム稼働中'
+            self.publish_agent_status(self.agent_status_entry('active', current_task))
         except Exception as e:
             print(f"Error updating agent status: {e}")
     
@@ -84,13 +378,10 @@ class TaskProcessor:
         task_title = task_data.get('title', 'Unknown')
         task_description = task_data.get('description', '')
         
-        # GitHub関連のコマンドを検出
-        if 'github' in task_title.lower() or 'イシュー' in task_title or 'status' in task_title.lower():
-            return self.handle_github_request(task_title, task_data)
-        
-        # コード修正タスクを検出
-        if self.is_code_modification_task(task_title, task_description):
-            return self.handle_code_modification_task(task_title, task_description, task_data)
+        # ルート表でインテントを判定（execute_task と同じ判定）
+        intent = self.classify(task_data)
+        if intent != GENERAL:
+            return self.handle_intent(intent, task_data)
         
         # Claude Code CLIコマンドを構築
         claude_cmd = ['claude', f"「{task_title}」について教えてください。"]
@@ -99,7 +390,10 @@ class TaskProcessor:
         
         try:
             # Claude Code CLIを実行
-            result = subprocess.check_output(claude_cmd, text=True, timeout=15, stderr=subprocess.STDOUT)
+            with CLAUDE_CALL_SECONDS.time(call='respond'), \
+                    tracing.span('claude', kind=tracing.KIND_CLIENT, attributes={'claude.call': 'respond'}):
+                result = subprocess.check_output(claude_cmd, text=True, timeout=15, stderr=subprocess.STDOUT,
+                                                 env=tracing.subprocess_env())
             result = result.strip()
         except subprocess.TimeoutExpired:
             # タイムアウト時はより自然な応答を生成
@@ -117,16 +411,30 @@ class TaskProcessor:
         
         return result
 
-    def is_code_modification_task(self, task_title, task_description=None):
-        """タスクがコード修正に関するものかを判定"""
-        code_keywords = [
-            '修正', 'fix', 'bug', 'バグ', 'エラー', 'error', 
-            '実装', 'implement', '追加', 'add', '機能', 'feature',
-            '改善', 'improve', 'リファクタ', 'refactor', 'コード', 'code'
-        ]
-        
-        text_to_check = f"{task_title} {task_description or ''}".lower()
-        return any(keyword in text_to_check for keyword in code_keywords)
+    def classify(self, task):
+        """インテント判定（判定結果をスパンに記録）"""
+        with tracing.span('classify') as span:
+            intent = classify_task(task)
+            span.set_attribute('intent', intent)
+            return intent
+
+    def handle_intent(self, intent, task):
+        """ルート表で判定したインテントごとの処理（Claude CLIに渡すもの以外）"""
+        task_title = task.get('title', '')
+        if intent == DATETIME:
+            try:
+                # 日本語の日付フォーマットで取得
+                result = subprocess.check_output(['date', '+%Y年%m月%d日 %H:%M:%S'], text=True).strip()
+                return f"現在時刻: {result}"
+            except Exception:
+                return f"現在時刻: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}"
+        if intent == GITHUB:
+            return self.handle_github_request(task_title, task)
+        if intent == CODE_MODIFICATION:
+            return self.handle_code_modification_task(task_title, task.get('description'), task)
+        if intent == HELLO_WORLD:
+            return "Hello, World!"
+        return None
 
     def handle_code_modification_task(self, task_title, task_description=None, task_data=None):
         """コード修正タスクを処理"""
@@ -182,7 +490,8 @@ class TaskProcessor:
         
         try:
             # ワークスペースディレクトリ
-            workspace_dir = Path('/app/workspace')
+            workspace_dir = self.workspace_dir
+            workspace_dir.mkdir(parents=True, exist_ok=True)
             
             # リポジトリ名を抽出
             repo_name = repo_url.split('/')[-1].replace('.git', '')
@@ -190,14 +499,19 @@ class TaskProcessor:
             
             if repo_path.exists():
                 # 既存のリポジトリを更新
-                result = subprocess.run(['git', 'pull'], cwd=repo_path, capture_output=True, text=True)
+                with GIT_SECONDS.time(operation='pull'), \
+                        tracing.span('git.pull', kind=tracing.KIND_CLIENT, attributes={'git.repository': repo_url}):
+                    result = subprocess.run(['git', 'pull'], cwd=repo_path, capture_output=True, text=True,
+                                            env=tracing.subprocess_env())
                 if result.returncode == 0:
                     print(f"Updated repository: {repo_path}")
                     return str(repo_path)
             else:
                 # リポジトリをクローン
-                result = subprocess.run(['git', 'clone', repo_url, str(repo_path)], 
-                                      capture_output=True, text=True)
+                with GIT_SECONDS.time(operation='clone'), \
+                        tracing.span('git.clone', kind=tracing.KIND_CLIENT, attributes={'git.repository': repo_url}):
+                    result = subprocess.run(['git', 'clone', repo_url, str(repo_path)], 
+                                          capture_output=True, text=True, env=tracing.subprocess_env())
                 if result.returncode == 0:
                     print(f"Cloned repository: {repo_path}")
                     return str(repo_path)
@@ -221,14 +535,16 @@ class TaskProcessor:
             claude_cmd = ['claude', prompt]
             
             # ワークスペース内でClaude Code CLIを実行
-            result = subprocess.check_output(
-                claude_cmd, 
-                cwd=workspace_path,
-                text=True, 
-                timeout=30, 
-                stderr=subprocess.STDOUT,
-                env={**os.environ, 'PATH': '/root/.local/bin:' + os.environ.get('PATH', '')}
-            )
+            with CLAUDE_CALL_SECONDS.time(call='workspace'), \
+                    tracing.span('claude', kind=tracing.KIND_CLIENT, attributes={'claude.call': 'workspace'}):
+                result = subprocess.check_output(
+                    claude_cmd, 
+                    cwd=workspace_path,
+                    text=True, 
+                    timeout=30, 
+                    stderr=subprocess.STDOUT,
+                    env=tracing.subprocess_env({**os.environ, 'PATH': '/root/.local/bin:' + os.environ.get('PATH', '')})
+                )
             
             return f"コード修正を実行しました:\n{result.strip()}"
             
@@ -272,24 +588,27 @@ class TaskProcessor:
             req = urllib.request.Request(api_url)
             req.add_header('User-Agent', 'Yellow-Claude-Orchestra/1.0')
             
-            with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode())
-                
-                if not data:
-                    return f"リポジトリ {repo_path} にイシューはありません。"
-                
-                # 最新の5件のイシューを表示
-                result = f"GitHubリポジトリ {repo_path} のイシュー:\n\n"
-                for i, issue in enumerate(data[:5]):
-                    title = issue.get('title', 'No title')
-                    number = issue.get('number', 'N/A')
-                    state = issue.get('state', 'unknown')
-                    url = issue.get('html_url', '')
-                    
-                    result += f"{i+1}. #{number} - {title} ({state})\n"
-                    result += f"   {url}\n\n"
+            with tracing.span('github.issues', kind=tracing.KIND_CLIENT,
+                              attributes={'github.repository': repo_path}) as span:
+                req.add_header('traceparent', span.traceparent)
+                with urllib.request.urlopen(req, timeout=10) as response:
+                    data = json.loads(response.read().decode())
+            
+            if not data:
+                return f"リポジトリ {repo_path} にイシューはありません。"
+            
+            # 最新の5件のイシューを表示
+            result = f"GitHubリポジトリ {repo_path} のイシュー:\n\n"
+            for i, issue in enumerate(data[:5]):
+                title = issue.get('title', 'No title')
+                number = issue.get('number', 'N/A')
+                state = issue.get('state', 'unknown')
+                url = issue.get('html_url', '')
                 
-                return result
+                result += f"{i+1}. #{number} - {title} ({state})\n"
+                result += f"   {url}\n\n"
+            
+            return result
                 
         except urllib.error.HTTPError as e:
             if e.code == 404:
@@ -310,12 +629,23 @@ class TaskProcessor:
             
             files = list(self.messages_dir.glob('*.json'))
             print(f"[DEBUG] Found {len(files)} JSON files in messages directory")
+            inert_messages = {}
             
             for message_file in files:
+                # 前回の走査で処理対象外だったファイルは、変更がなければ読み直さない
+                signature = stat_signature(message_file) if self.fast_start else None
+                if signature is not None and self.inert_messages.get(message_file.name) == signature:
+                    inert_messages[message_file.name] = signature
+                    continue
+                
                 print(f"[DEBUG] Checking file: {message_file.name}")
                 if not (message_file.name.startswith('task-') or message_file.name.startswith('msg-') or message_file.name.startswith('agent-msg-')):
                     print(f"[DEBUG] Skipping file: {message_file.name}")
                     continue
+                
+                # 受付済み（キュー待ち・実行中）のメッセージは再投入しない
+                if self.admission.is_tracked(message_file.name):
+                    continue
                     
                 try:
                     with open(message_file, 'r', encoding='utf-8') as f:
@@ -323,96 +653,13 @@ class TaskProcessor:
                     
                     print(f"[DEBUG] Message type: {message.get('type')}")
                     
-                    if message.get('type') == 'task_request':
-                        task_data = message.get('data', {})
-                        task_id = task_data.get('id')
-                        task_title = task_data.get('title', 'Unknown')
-                        
-                        print(f"Processing task request: {task_title}")
-                        
-                        # Producer-Director-Actor フローのログを記録
-                        self.save_task_log(task_id, f"Task received: {task_title}", 'producer')
-                        self.save_task_log(task_id, f"User: {task_title}", 'user')
-                        self.save_task_log(task_id, f"Analyzing task and generating response", 'director')
-                        
-                        # AI応答を生成
-                        ai_response = self.generate_ai_response_for_task(task_data)
-                        
-                        # AI応答をログに記録
-                        self.save_task_log(task_id, f"AI: {ai_response}", 'ai')
-                        self.save_task_log(task_id, f"Response generated and sent to user", 'actor')
-                        
-                        # タスクを進行中状態に更新
-                        tasks = self.load_tasks()
-                        for task in tasks:
-                            if task.get('id') == task_id and task.get('status') == 'pending':
-                                task['status'] = 'in_progress'
-                                task['updatedAt'] = datetime.now().isoformat()
-                                task['assignedAgent'] = 'task-processor'
-                                print(f"🔄 Task started: {task.get('title')}")
-                                break
-                        
-                        self.save_tasks(tasks)
-                        
-                        # 処理済みメッセージをアーカイブに移動
-                        self.archive_message(message_file)
-                        
-                    elif message.get('type') == 'task_update' and message.get('data', {}).get('action') == 'append_message':
-                        # メッセージ追加処理
-                        data = message.get('data', {})
-                        task_id = data.get('taskId')
-                        user_message = data.get('message')
-                        
-                        print(f"Processing message append for task: {task_id}")
-                        
-                        # Producer-Director-Actor フローのログを記録
-                        self.save_task_log(task_id, f"Message received: {user_message}", 'producer')
-                        self.save_task_log(task_id, f"User: {user_message}", 'user')
-                        self.save_task_log(task_id, f"Analyzing message and generating response", 'director')
-                        
-                        # 現在のタスク情報を取得してprojectIdを含める
-                        tasks = self.load_tasks()
-                        current_task = None
-                        for task in tasks:
-                            if task.get('id') == task_id:
-                                current_task = task
-                                break
-                        
-                        # AI応答を生成（projectId付きで）
-                        task_context = {
-                            'title': user_message, 
-                            'description': '',
-                            'projectId': current_task.get('projectId') if current_task else None
-                        }
-                        response = self.execute_task(task_context)
-                        
-                        # Actor実行ログ
-                        self.save_task_log(task_id, f"Executing task: {user_message}", 'actor')
-                        self.save_task_log(task_id, f"Task result: {response}", 'actor')
-                        self.save_task_log(task_id, f"AI: {response}", 'ai')
-                        
-                        # Director完了ログ
-                        self.save_task_log(task_id, f"Response completed: {response}", 'director')
-                        
-                        # エージェントメッセージを保存
-                        self.save_agent_message(task_id, 'producer', 'director', 'message_received', {
-                            'message': user_message
-                        })
-                        self.save_agent_message(task_id, 'director', 'actor', 'task_execution', {
-                            'task': user_message
-                        })
-                        self.save_agent_message(task_id, 'actor', 'director', 'task_result', {
-                            'result': response
-                        })
-                        self.save_agent_message(task_id, 'director', 'producer', 'task_completion', {
-                            'result': response,
-                            'message': response
-                        })
-                        
-                        print(f"✅ Processed message for task: {task_id}")
-                        
-                        # 処理済みメッセージをアーカイブに移動
+                    if self.requires_admission(message) and self.is_duplicate_message(message):
+                        print(f"♻️ Duplicate message skipped: {message_file.name}")
+                        DUPLICATE_MESSAGES.inc()
                         self.archive_message(message_file)
+                    
+                    elif self.requires_admission(message):
+                        self.admit_message(message_file, message)
                         
                     elif message.get('type') == 'task_completion':
                         # これは既に処理済みのメッセージなので、アーカイブに移動
@@ -424,12 +671,290 @@ class TaskProcessor:
                         print(f"[DEBUG] Archiving agent message: {message_file.name}")
                         self.archive_message(message_file)
                         
+                    elif signature is not None:
+                        inert_messages[message_file.name] = signature
+                        
                 except Exception as e:
                     print(f"Error processing message {message_file}: {e}")
+            
+            # 削除されたファイルの分はここで消える
+            self.inert_messages = inert_messages
+            self.admission.prune_deferred({message_file.name for message_file in files})
+            
+            # 空きスロットの分だけ受付済みメッセージを実行
+            self.dispatch_admitted_messages()
                     
         except Exception as e:
             print(f"Error processing messages: {e}")
     
+    def requires_admission(self, message):
+        """Claude呼び出しを伴うメッセージかどうか"""
+        if message.get('type') == 'task_request':
+            return True
+        return (message.get('type') == 'task_update' and
+                message.get('data', {}).get('action') == 'append_message')
+    
+    def admit_message(self, message_file, message):
+        """メッセージを受付キューに投入し、保留・拒否をタスク状態に反映"""
+        data = message.get('data', {})
+        if message.get('type') == 'task_request':
+            task_id = data.get('id')
+            task = data
+        else:
+            task_id = data.get('taskId')
+            task = self.get_task(task_id) or {}
+        
+        # 同じメッセージ（同じタスクの task_request の再送を含む）が処理中なら、その結果が確定するまで待つ
+        message_id = self.message_id(message)
+        fingerprint = message_fingerprint(message)
+        if not self.processed_messages.claim(message_id, fingerprint):
+            return
+        
+        # 最初に受け付けた時刻をトレースの開始時刻にする（保留からの再投入では更新しない）
+        self.ingested_at.setdefault(message_file.name, time.time_ns())
+        decision = self.admission.offer(message_file.name, (message_file, message),
+                                        task.get('projectId'), task_priority(task))
+        if decision != ADMITTED:
+            self.processed_messages.release(message_id, fingerprint)
+        
+        if decision == ADMITTED:
+            self.activity.set()
+            # 保留されていたタスクはキュー待ちに戻す
+            if message.get('type') == 'task_request':
+                self.update_task(task_id, expected_status=('deferred',),
+                                 status='pending', updatedAt=datetime.now().isoformat())
+                
+        elif decision == DEFERRED:
+            print(f"⏸️ Queue full, deferred: {message_file.name}")
+            if message.get('type') == 'task_request':
+                self.update_task(task_id, expected_status=('pending',),
+                                 status='deferred', updatedAt=datetime.now().isoformat())
+                
+        elif decision == REJECTED:
+            print(f"⛔ Queue full, rejected: {message_file.name}")
+            self.ingested_at.pop(message_file.name, None)
+            if task_id:
+                self.save_task_log(task_id, "Task rejected: processing queue is full", 'system')
+            if message.get('type') == 'task_request':
+                rejected = self.update_task(task_id, expected_status=('pending', 'deferred'),
+                                            status='rejected', updatedAt=datetime.now().isoformat(),
+                                            rejectedReason='queue_full')
+                # 中断から再開待ちだったタスクは、もう再開しないのでチェックポイントを削除
+                if rejected:
+                    self.workflow_engine.clear_checkpoint(task_id)
+            self.archive_message(message_file)
+    
+    def message_task_id(self, message):
+        """メッセージの対象タスクID"""
+        data = message.get('data', {})
+        return data.get('id') if message.get('type') == 'task_request' else data.get('taskId')
+    
+    def message_id(self, message):
+        return message.get('id') or message_fingerprint(message)
+    
+    def is_duplicate_message(self, message):
+        """処理が確定済みのメッセージ（または期間内の同じタスクの task_request の再送）か"""
+        message_id = self.message_id(message)
+        fingerprint = message_fingerprint(message)
+        entry = self.processed_messages.lookup(message_id, fingerprint)
+        if entry and entry['status'] == COMMITTED:
+            return True
+        
+        # タスク側にだけ確定が記録されている（索引の更新前に停止した）場合
+        task = self.get_task(self.message_task_id(message)) or {}
+        if message_id in task.get('processedMessages', []):
+            self.processed_messages.mark_committed(message_id, fingerprint)
+            return True
+        return False
+    
+    def recorded_result(self, message):
+        """前回の処理で保存済みの結果（なければ None）"""
+        entry = self.processed_messages.lookup(self.message_id(message), message_fingerprint(message))
+        if entry and entry['status'] == RESULT_RECORDED:
+            return entry['result']
+        return None
+    
+    def commit_message(self, message, expected_status=None, **fields):
+        """メッセージの処理済み記録をタスク状態の更新と同じ書き込みで確定"""
+        task_id = self.message_task_id(message)
+        message_id = self.message_id(message)
+        updated = None
+        with self.locked_tasks():
+            task = self.get_task(task_id)
+            if task is not None:
+                processed = (task.get('processedMessages', []) + [message_id])[-50:]
+                if fields and (not expected_status or task.get('status') in expected_status):
+                    updated = self.update_task(task_id, processedMessages=processed, **fields)
+                else:
+                    self.update_task(task_id, processedMessages=processed)
+        self.processed_messages.mark_committed(message_id, message_fingerprint(message))
+        return updated
+    
+    def get_task(self, task_id):
+        """タスクIDからタスクを取得"""
+        for task in self.load_tasks():
+            if task.get('id') == task_id:
+                return task
+        return None
+    
+    def dispatch_admitted_messages(self):
+        """同時実行数の上限までワーカーに受付済みメッセージを割り当て"""
+        while True:
+            entry = self.admission.acquire()
+            if entry is None:
+                break
+            key, (message_file, message) = entry
+            self.activity.set()
+            self.executor.submit(self.run_admitted_message, key, message_file, message)
+    
+    def run_admitted_message(self, key, message_file, message):
+        """受付済みメッセージをワーカースレッドで処理"""
+        ingested_ns = self.ingested_at.pop(key, None)
+        try:
+            if not message_file.exists():
+                return
+            with tracing.span('message.process', parent=message.get('traceparent'),
+                              kind=tracing.KIND_CONSUMER, start_ns=ingested_ns,
+                              attributes={'message.id': self.message_id(message),
+                                          'message.type': message.get('type'),
+                                          'task.id': self.message_task_id(message)}) as span:
+                if ingested_ns:
+                    span.add_event('dequeued', wait_ms=round((time.time_ns() - ingested_ns) / 1e6, 3))
+                try:
+                    if message.get('type') == 'task_request':
+                        self.handle_task_request(message_file, message)
+                    else:
+                        self.handle_append_message(message_file, message)
+                except Exception as e:
+                    span.set_error(e)
+                    raise
+            MESSAGES_PROCESSED.inc(type=message.get('type'))
+        except Exception as e:
+            print(f"Error processing message {message_file}: {e}")
+        finally:
+            self.processed_messages.release(self.message_id(message), message_fingerprint(message))
+            self.admission.release(key)
+            self.activity.set()
+            # 空いたスロットに次のリクエストをすぐ割り当てる
+            self.cadence.notify()
+    
+    def handle_task_request(self, message_file, message):
+        """タスクリクエストを処理"""
+        task_data = message.get('data', {})
+        task_id = task_data.get('id')
+        task_title = task_data.get('title', 'Unknown')
+        
+        # 前回の処理で応答生成まで済んでいれば結果を再利用
+        ai_response = self.recorded_result(message)
+        if ai_response is None:
+            print(f"Processing task request: {task_title}")
+            
+            # Producer-Director-Actor フローのログを記録
+            self.save_task_log(task_id, f"Task received: {task_title}", 'producer')
+            self.save_task_log(task_id, f"User: {task_title}", 'user')
+            self.save_task_log(task_id, f"Analyzing task and generating response", 'director')
+            
+            # AI応答を生成し、状態更新の前に保存
+            ai_response = self.generate_ai_response_for_task(task_data)
+            self.processed_messages.record_result(self.message_id(message), message_fingerprint(message),
+                                                  ai_response)
+        else:
+            print(f"♻️ Resuming task request with recorded response: {task_title}")
+        
+        # AI応答をログに記録
+        self.save_task_log(task_id, f"AI: {ai_response}", 'ai')
+        self.save_task_log(task_id, f"Response generated and sent to user", 'actor')
+        
+        # タスクを進行中状態に更新（処理済みの記録も同時に確定）
+        task = self.commit_message(message, expected_status=('pending', 'deferred'),
+                                   status='in_progress',
+                                   updatedAt=datetime.now().isoformat(),
+                                   assignedAgent=self.agent_id)
+        if task:
+            print(f"🔄 Task started: {task.get('title')}")
+        
+        # 処理済みメッセージをアーカイブに移動
+        self.archive_message(message_file)
+    
+    def handle_append_message(self, message_file, message):
+        """タスクへのメッセージ追加を処理"""
+        data = message.get('data', {})
+        task_id = data.get('taskId')
+        user_message = data.get('message')
+        
+        # 前回の処理で応答生成まで済んでいれば結果を再利用
+        response = self.recorded_result(message)
+        if response is None:
+            print(f"Processing message append for task: {task_id}")
+            
+            # Producer-Director-Actor フローのログを記録
+            self.save_task_log(task_id, f"Message received: {user_message}", 'producer')
+            self.save_task_log(task_id, f"User: {user_message}", 'user')
+            self.save_task_log(task_id, f"Analyzing message and generating response", 'director')
+            
+            # 現在のタスク情報を取得してprojectIdを含める
+            tasks = self.load_tasks()
+            current_task = None
+            for task in tasks:
+                if task.get('id') == task_id:
+                    current_task = task
+                    break
+            
+            # AI応答を生成（projectId付きで）し、後続の処理より前に保存
+            task_context = {
+                'title': user_message, 
+                'description': '',
+                'projectId': current_task.get('projectId') if current_task else None
+            }
+            response = self.execute_task(task_context)
+            self.processed_messages.record_result(self.message_id(message), message_fingerprint(message),
+                                                  response)
+        else:
+            print(f"♻️ Resuming message append with recorded response: {task_id}")
+        
+        # Actor実行ログ
+        self.save_task_log(task_id, f"Executing task: {user_message}", 'actor')
+        self.save_task_log(task_id, f"Task result: {response}", 'actor')
+        self.save_task_log(task_id, f"AI: {response}", 'ai')
+        
+        # Director完了ログ
+        self.save_task_log(task_id, f"Response completed: {response}", 'director')
+        
+        # エージェントメッセージを保存
+        self.save_agent_message(task_id, 'producer', 'director', 'message_received', {
+            'message': user_message
+        })
+        self.save_agent_message(task_id, 'director', 'actor', 'task_execution', {
+            'task': user_message
+        })
+        self.save_agent_message(task_id, 'actor', 'director', 'task_result', {
+            'result': response
+        })
+        self.save_agent_message(task_id, 'director', 'producer', 'task_completion', {
+            'result': response,
+            'message': response
+        })
+        
+        self.commit_message(message)
+        print(f"✅ Processed message for task: {task_id}")
+        
+        # 処理済みメッセージをアーカイブに移動
+        self.archive_message(message_file)
+    
+    def publish_queue_metrics(self):
+        """受付キューのメトリクスをファイルに出力"""
+        try:
+            queue_metrics = self.admission.metrics()
+            queue_metrics['pending_tasks'] = self.task_scheduler.stats()
+            queue_metrics['timestamp'] = datetime.now().isoformat()
+            atomic_write_text(self.queue_metrics_file, json.dumps(queue_metrics, indent=2, ensure_ascii=False))
+            
+            QUEUE_DEPTH.set(queue_metrics['queue_depth'], queue='admission')
+            QUEUE_DEPTH.set(self.task_scheduler.depth(), queue='pending_tasks')
+            RUNNING_REQUESTS.set(queue_metrics['running'])
+        except Exception as e:
+            print(f"Error publishing queue metrics: {e}")
+    
     def execute_task(self, task):
         """タスクを実際に実行"""
         task_title = task.get('title', '')
@@ -438,56 +963,9 @@ class TaskProcessor:
         # タスクの内容に応じてコマンドを実行
         result = ""
         
-        if '時刻' in task_title or '日時' in task_title:
-            import subprocess
-            try:
-                # 日本語の日付フォーマットで取得
-                result = subprocess.check_output(['date', '+%Y年%m月%d日 %H:%M:%S'], text=True).strip()
-                result = f"現在時刻: {result}"
-            except:
-                result = f"現在時刻: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}"
-                
-        elif 'github' in task_title.lower():
-            import subprocess
-            try:
-                # タスクのプロジェクトIDから対応するプロジェクトを取得
-                task_project_id = task.get('projectId')
-                projects_file = self.base_dir / 'data' / 'projects.json'
-                repo_url = None
-                
-                if projects_file.exists():
-                    with open(projects_file, 'r', encoding='utf-8') as f:
-                        projects = json.load(f)
-                        for project in projects:
-                            if project.get('id') == task_project_id:
-                                repo_url = project.get('repository')
-                                break
-                
-                if repo_url and 'github.com' in repo_url:
-                    # GitHub URLからリポジトリパスを抽出
-                    repo_path = repo_url.replace('https://github.com/', '').replace('.git', '')
-                    
-                    # GitHub APIから情報を取得
-                    api_result = subprocess.check_output(['curl', '-s', f'https://api.github.com/repos/{repo_path}/issues'], text=True)
-                    issues_data = json.loads(api_result)
-                    
-                    if isinstance(issues_data, list):
-                        if len(issues_data) > 0:
-                            issues_summary = []
-                            for issue in issues_data[:10]:
-                                issues_summary.append(f"#{issue.get('number')}: {issue.get('title')} ({issue.get('state')})")
-                            result = f"GitHubイシューの一覧:\n\n" + "\n".join(issues_summary)
-                        else:
-                            result = "このリポジトリにはイシューがありません"
-                    else:
-                        result = f"GitHub API応答エラー: {issues_data.get('message', 'Unknown error')}"
-                else:
-                    result = "プロジェクトのGitHubリポジトリが見つかりません"
-            except Exception as e:
-                result = f"GitHubアクセスに失敗しました: {str(e)}"
-                
-        elif 'hello' in task_title.lower() and 'world' in task_title.lower():
-            result = "Hello, World!"
+        intent = self.classify(task)
+        if intent != GENERAL:
+            result = self.handle_intent(intent, task)
             
         else:
             # Claude Code CLIで処理
@@ -499,7 +977,10 @@ class TaskProcessor:
                 
                 try:
                     # Claude Code CLIを実行（タイムアウトを短縮）
-                    result = subprocess.check_output(claude_cmd, text=True, timeout=5, stderr=subprocess.STDOUT)
+                    with CLAUDE_CALL_SECONDS.time(call='execute'), \
+                            tracing.span('claude', kind=tracing.KIND_CLIENT, attributes={'claude.call': 'execute'}):
+                        result = subprocess.check_output(claude_cmd, text=True, timeout=5, stderr=subprocess.STDOUT,
+                                                         env=tracing.subprocess_env())
                     result = result.strip()
                     
                 except subprocess.CalledProcessError as e:
@@ -540,7 +1021,7 @@ class TaskProcessor:
                 
             with open(log_file, 'a', encoding='utf-8') as f:
                 timestamp = datetime.now().isoformat()
-                f.write(f"[{timestamp}] {agent_type}: {message}\n")
+                f.write(f"[{timestamp}] {agent_type}: {message}{tracing.log_suffix()}\n")
                 
         except Exception as e:
             print(f"Error saving task log: {e}")
@@ -549,121 +1030,394 @@ class TaskProcessor:
         """エージェントメッセージを保存"""
         try:
             message = {
-                'id': f'msg-{int(time.time() * 1000)}',
+                'id': new_id('msg-'),
                 'from': from_agent,
                 'to': to_agent,
                 'type': message_type,
                 'data': data,
                 'timestamp': datetime.now().isoformat()
             }
+            traceparent = tracing.current_traceparent()
+            if traceparent:
+                message['traceparent'] = traceparent
             
             message_file = self.messages_dir / f'agent-msg-{task_id}-{message["id"]}.json'
-            with open(message_file, 'w', encoding='utf-8') as f:
-                json.dump(message, f, indent=2, ensure_ascii=False)
+            atomic_write_text(message_file, json.dumps(message, indent=2, ensure_ascii=False))
                 
         except Exception as e:
             print(f"Error saving agent message: {e}")
 
+    def has_pending_request_message(self, task_id):
+        """タスクリクエストのメッセージが未処理で残っているか（受付制御側で処理される）"""
+        return (self.messages_dir / f'task-{task_id}.json').exists()
+
     def process_pending_tasks(self):
-        """保留中のタスクを処理"""
+        """保留中のタスクをプロジェクト間で公平な順序でワークフローに投入"""
         try:
-            tasks = self.load_tasks()
-            updated = False
-            
-            for task in tasks:
-                if task.get('status') == 'pending':
-                    task_title = task.get('title', 'Unknown')
-                    task_id = task.get('id')
-                    print(f"🔄 Processing task: {task_title}")
-                    
-                    # タスクを進行中状態に変更
-                    task['status'] = 'in_progress'
-                    task['updatedAt'] = datetime.now().isoformat()
-                    task['startedBy'] = 'task-processor'
-                    self.save_tasks(tasks)
-                    
-                    # エージェント状態を進行中に更新
-                    self.update_agent_status_with_task(task_title)
-                    
-                    print(f"⏳ Task in progress: {task_title}")
-                    
-                    # リアルな処理時間をシミュレート（10-30秒）
-                    import random
-                    processing_time = random.randint(10, 30)
-                    
-                    for i in range(processing_time):
-                        time.sleep(1)
-                        if i % 5 == 0:  # 5秒ごとに進捗表示
-                            progress = int((i / processing_time) * 100)
-                            print(f"📊 Progress: {progress}% - {task_title}")
-                            
-                            # 進捗をタスクに保存
-                            task['progress'] = progress
-                            self.save_tasks(tasks)
-                    
-                    # 実際にタスクを実行
-                    print(f"🚀 Executing task: {task_title}")
-                    result = self.execute_task(task)
-                    
-                    # ログとメッセージを保存
-                    self.save_task_log(task_id, f"Task started: {task_title}", 'producer')
-                    self.save_task_log(task_id, f"Task result: {result}", 'actor')
-                    
-                    # エージェントメッセージを保存
-                    self.save_agent_message(task_id, 'producer', 'director', 'task_assignment', task)
-                    self.save_agent_message(task_id, 'director', 'actor', 'task_execution', task)
-                    self.save_agent_message(task_id, 'actor', 'director', 'task_result', {'result': result})
-                    self.save_agent_message(task_id, 'director', 'producer', 'task_completion', {'result': result})
-                    
-                    # タスク完了
-                    task['status'] = 'completed'
-                    task['progress'] = 100
-                    task['updatedAt'] = datetime.now().isoformat()
-                    task['completedBy'] = 'task-processor'
-                    task['result'] = result
-                    updated = True
-                    
-                    print(f"✅ Completed task: {task_title}")
-                    
-                    # 完了後、エージェント状態をリセット
-                    self.update_agent_status()
+            self.enqueue_pending_tasks()
             
-            if updated:
-                self.save_tasks(tasks)
+            while self.workflow_engine.active_runs() < self.max_active_workflows:
+                entry = self.task_scheduler.dequeue()
+                if entry is None:
+                    break
+                project_id, task_id, (task, enqueued_at) = entry
+                started = False
+                try:
+                    started = self.start_task_workflow(task, project_id, enqueued_at)
+                    if started:
+                        self.activity.set()
+                finally:
+                    if not started:
+                        self.task_scheduler.release(project_id)
+                        # 投入し直せるように次回は tasks.json を読み直す
+                        self.pending_signature = None
                 
         except Exception as e:
             print(f"Error processing pending tasks: {e}")
     
+    def pending_tasks_signature(self):
+        """保留タスクの一覧が変わりうる変更（tasks.json とリクエストメッセージの増減）の署名"""
+        tasks_signature = file_signature(self.tasks_file)
+        if tasks_signature is None:
+            return None
+        return [tasks_signature, stat_signature(self.messages_dir)]
+    
+    def enqueue_pending_tasks(self):
+        """tasks.json の保留タスクをスケジューラに投入（投入済みのものは無視される）"""
+        # 読み込み中の変更を取りこぼさないよう、署名は読み込む前に取る
+        signature = self.pending_tasks_signature() if self.fast_start else None
+        if signature is not None and signature == self.pending_signature:
+            return
+        pending = []
+        for task in self.load_tasks():
+            if task.get('status') == 'pending':
+                # リクエストメッセージ経由のタスクは受付キューに任せる
+                if self.has_pending_request_message(task.get('id')):
+                    continue
+                pending.append(task)
+        self.enqueue_tasks(pending)
+        self.pending_signature = signature
+    
+    def enqueue_tasks(self, tasks):
+        self.pending_tasks = tasks
+        for task in tasks:
+            self.task_scheduler.enqueue(task.get('projectId'), task.get('id'),
+                                        (task, time.monotonic()), task_priority(task))
+    
+    def should_preempt(self, task):
+        """実行枠が埋まっていて、より高い優先度のタスクが待っていれば実行中のタスクを譲る"""
+        if not self.processing_config.get('preemption_enabled', True):
+            return False
+        if task.get('preemptedCount', 0) >= self.processing_config.get('max_preemptions', 3):
+            return False
+        if self.workflow_engine.active_runs() < self.max_active_workflows:
+            return False
+        # 実行中に到着したタスクはメインループ（process_pending_tasks）がスケジューラに投入している。
+        # ここで tasks.json を読み直すと、実行中の全ステップが毎秒読むことになる
+        # 高優先度タスク1件につき中断するのは1件だけ（全ステップが同時に譲らないよう権利を確保する）
+        return self.task_scheduler.claim_preemption(task_priority(task))
+    
+    def requeue_preempted_task(self, task, progress, enqueued_at):
+        """中断したタスクを待ち時間を引き継いでキューに戻す"""
+        task_id = task.get('id')
+        requeued = self.update_task(task_id,
+                                    status='pending',
+                                    progress=progress,
+                                    updatedAt=datetime.now().isoformat(),
+                                    preemptedCount=task.get('preemptedCount', 0) + 1)
+        print(f"⏪ Task preempted by higher priority work: {task.get('title')}")
+        self.save_task_log(task_id, "Task preempted by higher priority task, re-queued", 'director')
+        if requeued:
+            self.task_scheduler.enqueue(requeued.get('projectId'), task_id,
+                                        (requeued, enqueued_at), task_priority(requeued),
+                                        enqueued_at=enqueued_at)
+    
+    def select_workflow(self, task):
+        """タスクに適用するワークフローを選択"""
+        name = task.get('workflow')
+        if not isinstance(name, str) or name not in self.workflows:
+            name = 'hotfix' if 'hotfix' in (task.get('tags') or []) else 'standard_development'
+        return self.workflows.get(name) or compile_workflow('default', {'steps': ['implementation']})
+    
+    def recover_interrupted_workflows(self):
+        """前回の実行中に中断されたワークフローをチェックポイントから再開できるようにする"""
+        checkpoints = self.workflow_engine.list_checkpoints()
+        if not checkpoints:
+            return
+        tasks = {task.get('id'): task for task in self.load_tasks()}
+        for task_id in checkpoints:
+            task = tasks.get(task_id)
+            if task and task.get('status') == 'in_progress':
+                self.update_task(task_id, status='pending', updatedAt=datetime.now().isoformat())
+                print(f"♻️ Resuming interrupted workflow: {task.get('title')}")
+            elif not task or task.get('status') not in RESUMABLE_STATUSES:
+                # 完了・拒否済みのタスクは再開しない
+                self.workflow_engine.clear_checkpoint(task_id)
+    
+    def start_task_workflow(self, task, project_id, enqueued_at):
+        """保留タスクを進行中にしてワークフローを開始"""
+        task_title = task.get('title', 'Unknown')
+        task_id = task.get('id')
+        dag = self.select_workflow(task)
+        
+        # タスクを進行中状態に変更
+        claimed = self.update_task(task_id, expected_status=('pending',),
+                                   status='in_progress',
+                                   updatedAt=datetime.now().isoformat(),
+                                   startedBy=self.agent_id,
+                                   workflowState={'name': dag.name, 'completedSteps': [], 'runningSteps': []})
+        if not claimed:
+            return False
+        QUEUE_WAIT_SECONDS.observe(time.monotonic() - enqueued_at, queue='pending_tasks')
+        print(f"🔄 Processing task: {task_title} (workflow: {dag.name})")
+        
+        # ワークフロー全体のスパン（ステップは別スレッドで実行されるため明示的に親を渡す）
+        workflow_span = tracing.start_span('task.workflow', parent=claimed.get('traceparent'),
+                                           attributes={'task.id': task_id, 'workflow': dag.name})
+        with tracing.use_span(workflow_span):
+            # エージェント状態を進行中に更新
+            self.update_agent_status_with_task(task_title)
+            
+            self.save_task_log(task_id, f"Task started: {task_title}", 'producer')
+            self.save_agent_message(task_id, 'producer', 'director', 'task_assignment', claimed)
+        
+        self.workflow_engine.submit(
+            task_id, dag,
+            {'task': claimed, 'project_id': project_id, 'enqueued_at': enqueued_at, 'trace_span': workflow_span},
+            self.run_workflow_step, self.finish_task_workflow, self.on_workflow_step
+        )
+        return True
+    
+    def on_workflow_step(self, run, step, event):
+        """ステップの開始・完了をタスクの進捗に反映"""
+        completed = [name for name in run.dag.steps if name in run.results]
+        running = sorted(run.running) if event == 'completed' else sorted(run.running | {step.name})
+        self.update_task(run.run_id,
+                         progress=int(len(completed) / len(run.dag.steps) * 100),
+                         updatedAt=datetime.now().isoformat(),
+                         workflowState={'name': run.dag.name, 'completedSteps': completed, 'runningSteps': running})
+    
+    def run_workflow_step(self, step, run):
+        """ワークフローの1ステップを実行"""
+        task_id = run.run_id
+        with tracing.span('workflow.step', parent=run.context.get('trace_span'),
+                          attributes={'step.name': step.name, 'step.role': step.role}):
+            self.save_task_log(task_id, f"Step started: {step.name}", step.role)
+            
+            if step.role == 'actor':
+                result = self.run_implementation_step(step, run)
+            else:
+                result = f"{step.name} completed"
+            
+            self.save_task_log(task_id, f"Step completed: {step.name}", step.role)
+            return result
+    
+    def run_implementation_step(self, step, run):
+        """実装ステップ（Actor）: タスクを実行して結果を返す"""
+        task = run.context['task']
+        task_title = task.get('title', 'Unknown')
+        task_id = task.get('id')
+        self.save_agent_message(task_id, 'director', 'actor', 'task_execution', task)
+        
+        print(f"⏳ Task in progress: {task_title}")
+        
+        # リアルな処理時間をシミュレート（既定は10-30秒、simulated_work_seconds: null で無効）
+        import random
+        min_seconds, max_seconds = self.processing_config.get('simulated_work_seconds', [10, 30]) or (0, 0)
+        processing_time = random.randint(min_seconds, max_seconds)
+        total_steps = len(run.dag.steps)
+        
+        for i in range(processing_time):
+            time.sleep(1)
+            # 実行枠が埋まっていれば高優先度タスクの到着で中断してキューに戻す
+            if self.should_preempt(task):
+                raise StepPreempted()
+            if i % 5 == 0:  # 5秒ごとに進捗表示
+                progress = int((len(run.results) + i / processing_time) / total_steps * 100)
+                print(f"📊 Progress: {progress}% - {task_title}")
+                
+                # 進捗をタスクに保存
+                self.update_task(task_id, progress=progress)
+        
+        # 実際にタスクを実行
+        print(f"🚀 Executing task: {task_title}")
+        result = self.execute_task(task)
+        
+        self.save_task_log(task_id, f"Task result: {result}", 'actor')
+        self.save_agent_message(task_id, 'actor', 'director', 'task_result', {'result': result})
+        return result
+    
+    def finish_task_workflow(self, run):
+        """ワークフロー終了時にタスク状態を確定"""
+        workflow_span = run.context.get('trace_span')
+        if not workflow_span:
+            return self.complete_task_workflow(run)
+        workflow_span.set_attribute('workflow.status', run.status)
+        with tracing.use_span(workflow_span):
+            self.complete_task_workflow(run)
+        workflow_span.end(error=run.error if run.status == 'failed' else None)
+    
+    def complete_task_workflow(self, run):
+        """ワークフローの結果をタスク状態に反映"""
+        task = run.context['task']
+        task_title = task.get('title', 'Unknown')
+        task_id = run.run_id
+        self.task_scheduler.release(run.context['project_id'])
+        WORKFLOWS_FINISHED.inc(status=run.status)
+        
+        if run.status == 'completed':
+            # 実装ステップの結果をタスクの結果とする
+            actor_steps = [name for name, step in run.dag.steps.items() if step.role == 'actor']
+            result = run.results.get(actor_steps[-1]) if actor_steps else None
+            
+            self.save_agent_message(task_id, 'director', 'producer', 'task_completion', {'result': result})
+            self.update_task(task_id,
+                             status='completed',
+                             progress=100,
+                             updatedAt=datetime.now().isoformat(),
+                             completedBy=self.agent_id,
+                             result=result)
+            print(f"✅ Completed task: {task_title}")
+            
+        elif run.status == 'preempted':
+            progress = int(len(run.results) / len(run.dag.steps) * 100)
+            self.requeue_preempted_task(task, progress, run.context['enqueued_at'])
+            
+        else:
+            self.save_task_log(task_id, f"Workflow failed: {run.error}", 'director')
+            self.update_task(task_id,
+                             status='rejected',
+                             updatedAt=datetime.now().isoformat(),
+                             rejectedReason='workflow_failed',
+                             error=run.error)
+            # 失敗したワークフローは再開しないのでチェックポイントを残さない
+            self.workflow_engine.clear_checkpoint(task_id)
+            print(f"❌ Workflow failed: {task_title} ({run.error})")
+        
+        # 完了後、エージェント状態をリセット
+        if self.workflow_engine.active_runs() == 0:
+            self.update_agent_status()
+        self.activity.set()
+        # 空いた枠に次の保留タスクをすぐ投入する
+        self.cadence.notify()
+    
     def update_agent_status_with_task(self, task_title):
         """タスク実行中のエージェント状態を更新"""
         try:
-            status = [
-                {
-                    'id': 'task-processor',
-                    'type': 'system',
-                    'name': 'Task Processor',
-                    'status': 'working',
-                    'currentTask': f'実行中: {task_title}',
-                    'lastSeen': datetime.now().isoformat(),
-                    'pid': os.getpid()
-                }
-            ]
-            
-            with open(self.status_file, 'w', encoding='utf-8') as f:
-                json.dump(status, f, indent=2, ensure_ascii=False)
+            self.write_agent_status(self.agent_status_entry('working', f'実行中: {task_title}'))
         except Exception as e:
             print(f"Error updating agent status with task: {e}")
     
+    def collect_pending_load(self):
+        """オートスケール判断用に保留タスク数と平均待ち時間を集計"""
+        now = datetime.now()
+        waits = []
+        for task in self.load_tasks():
+            if task.get('status') != 'pending' or self.has_pending_request_message(task.get('id')):
+                continue
+            try:
+                created_at = datetime.fromisoformat(task.get('createdAt', '').replace('Z', '+00:00'))
+                if created_at.tzinfo:
+                    created_at = created_at.astimezone().replace(tzinfo=None)
+                waits.append(max(0.0, (now - created_at).total_seconds()))
+            except ValueError:
+                waits.append(0.0)
+        return len(waits), (sum(waits) / len(waits) if waits else 0.0)
+    
+    def worker_heartbeats(self):
+        """Actorワーカーの最終ハートビートからの経過秒数"""
+        heartbeats = {}
+        try:
+            # ファイルを読まずに共有テーブルから取得
+            for agent in self.status_table.snapshot():
+                if agent.get('workerOf') == 'task-processor':
+                    last_seen = datetime.fromisoformat(agent['lastSeen'])
+                    heartbeats[agent['id']] = (datetime.now() - last_seen).total_seconds()
+        except Exception:
+            pass
+        return heartbeats
+    
+    def run_autoscaler(self):
+        """負荷に応じてActorワーカーを増減し、終了したワーカーの状態を削除"""
+        try:
+            removed = self.autoscaler.reap(self.worker_heartbeats())
+            if removed:
+                self.write_agent_status(remove_ids=removed)
+            
+            depth, avg_wait = self.collect_pending_load()
+            action = self.autoscaler.evaluate(depth, avg_wait)
+            if action:
+                print(f"⚖️ Autoscaler {action[0]}: {action[1]} "
+                      f"(pending: {depth}, avg wait: {avg_wait:.1f}s, actors: {self.autoscaler.size})")
+        except Exception as e:
+            print(f"Error in autoscaler: {e}")
+    
+    def handle_stop_signal(self, signum, frame):
+        """SIGTERMで実行中のタスクを終えてから停止する"""
+        print(f"\n🛑 {self.agent_id} received signal {signum}, finishing current work...")
+        self.running = False
+        self.cadence.stop()
+    
+    def take_activity(self):
+        """前回の確認以降にリクエストの受付・割り当て、ワークフローの開始・完了があったか
+        
+        実行中のワークフローやキュー待ちがあるだけでは進捗とみなさない（待っている間は間隔を延ばす）
+        """
+        active = self.activity.is_set()
+        self.activity.clear()
+        return active
+    
+    def start_file_watch(self):
+        """メッセージの到着と tasks.json の変更でループを起こす（watchdog がなければタイマーのみ）"""
+        self.observer = create_observer()
+        if not self.worker_id:
+            self.cadence.watch(self.observer, self.messages_dir, REQUEST_MESSAGE_PATTERNS)
+        if self.cadence.watch(self.observer, self.tasks_file.parent, (self.tasks_file.name,)):
+            self.observer.start()
+    
+    def stop_file_watch(self):
+        if self.observer is not None and self.observer.is_alive():
+            self.observer.stop()
+            self.observer.join()
+    
     def run(self):
         """メインループ"""
+        signal.signal(signal.SIGTERM, self.handle_stop_signal)
+        # ワーカーはHTTPエンドポイントを持たず、スナップショットのみ書き出す
+        self.metrics_exporter = start_metrics_exporter(self.base_dir, self.worker_id or 'task_processor',
+                                                       http=not self.worker_id)
+        # SIGUSR1/SIGUSR2 でプロファイルの開始・停止
+        install_profiler(self.base_dir, self.worker_id or 'task_processor')
+        # ブリッジがプロセスを走査せずに見つけられるようにレジストリへ登録
+        entry = self.agent_status_entry('active', '')
+        self.registration = AgentRegistration(
+            self.base_dir / 'communication', entry['id'], entry['type'], entry['name'],
+            interval_seconds=load_discovery_config(self.base_dir).get('heartbeat_interval_seconds', 10),
+            currentTask='タスク処理システム稼働中' if not self.worker_id else 'Actorワーカー稼働中'
+        ).start()
+        self.start_file_watch()
+        if self.worker_id:
+            return self.run_worker()
+        
         print("🎼 Task Processor starting...")
+        self.recover_interrupted_workflows()
+        if self.startup_snapshot:
+            self.restore_startup_snapshot()
         
         while self.running:
             try:
                 self.update_agent_status()
+                self.refresh_project_policies()
                 self.process_messages()
-                self.process_pending_tasks()
-                time.sleep(5)  # 5秒ごとにチェック
+                if self.autoscaler:
+                    # 保留タスクの実行はActorワーカーに任せる
+                    self.run_autoscaler()
+                else:
+                    self.process_pending_tasks()
+                self.publish_queue_metrics()
+                self.save_startup_snapshot()
+                self.cadence.record(self.take_activity())
+                self.cadence.wait()
                 
             except KeyboardInterrupt:
                 print("\n🛑 Task Processor stopping...")
@@ -671,18 +1425,75 @@ class TaskProcessor:
                 break
             except Exception as e:
                 print(f"❌ Error in main loop: {e}")
-                time.sleep(10)
+                self.cadence.failed()
+                self.cadence.wait()
         
+        # 実行中のリクエストとワークフローの完了を待つ
+        self.stop_file_watch()
+        if self.autoscaler:
+            self.autoscaler.stop_all()
+        self.executor.shutdown(wait=True)
+        self.workflow_engine.shutdown(wait=True)
+        self.save_startup_snapshot()
+        self.registration.stop()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
         print("👋 Task Processor stopped")
+    
+    def run_worker(self):
+        """Actorワーカーのメインループ（保留タスクの実行のみ）"""
+        print(f"🎭 Actor worker starting: {self.worker_id}")
+        
+        while self.running:
+            try:
+                if self.workflow_engine.active_runs() == 0:
+                    self.update_agent_status()
+                else:
+                    self.publish_agent_status(self.agent_status_entry(
+                        'working', f'実行中: {self.workflow_engine.active_runs()}件'))
+                self.refresh_project_policies()
+                self.process_pending_tasks()
+                self.cadence.record(self.take_activity())
+                self.cadence.wait()
+                
+            except KeyboardInterrupt:
+                self.running = False
+                break
+            except Exception as e:
+                print(f"❌ Error in worker loop ({self.worker_id}): {e}")
+                self.cadence.failed()
+                self.cadence.wait()
+
+        self.stop_file_watch()
+        # 実行中のワークフローが後続ステップまで終わるのを待つ
+        while self.workflow_engine.active_runs() > 0:
+            time.sleep(1)
+        self.workflow_engine.shutdown(wait=True)
+        self.executor.shutdown(wait=True)
+        try:
+            self.write_agent_status(remove_ids=(self.worker_id,))
+        except Exception as e:
+            print(f"Error removing agent status: {e}")
+        self.registration.stop()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        print(f"👋 Actor worker stopped: {self.worker_id}")
 
 def main():
-    if len(sys.argv) > 1:
-        base_dir = sys.argv[1]
+    args = sys.argv[1:]
+    worker_id = None
+    if '--actor' in args:
+        index = args.index('--actor')
+        worker_id = args[index + 1]
+        del args[index:index + 2]
+    
+    if args:
+        base_dir = args[0]
     else:
         base_dir = os.getcwd()
     
-    processor = TaskProcessor(base_dir)
+    processor = TaskProcessor(base_dir, worker_id=worker_id)
     processor.run()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Yellow Claude Orchestra - Workflow Engine
+orchestra.json の workflows をタスクごとの依存グラフ(DAG)に変換し、
+共有ワーカープール上でステップ単位に実行する
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from communication.durable import atomic_write_text
+
+# ステップ名から担当ロールへの既定の対応
+STEP_ROLES = {
+    'requirement_gathering': 'producer',
+    'issue_creation': 'producer',
+    'issue_analysis': 'producer',
+    'task_assignment': 'director',
+    'implementation': 'actor',
+    'urgent_implementation': 'actor',
+    'review': 'director',
+    'quick_review': 'director',
+    'integration': 'director',
+    'deployment': 'director'
+}
+
+
+class StepPreempted(Exception):
+    """ステップが高優先度タスクに実行枠を譲るために中断された"""
+
+
+class WorkflowStep:
+    def __init__(self, name, role, depends_on=()):
+        self.name = name
+        self.role = role
+        self.depends_on = tuple(depends_on)
+
+    def __repr__(self):
+        return f"WorkflowStep({self.name!r}, role={self.role!r}, depends_on={self.depends_on!r})"
+
+
+class WorkflowDAG:
+    """ワークフローの依存グラフ"""
+
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = {step.name: step for step in steps}
+        self._validate()
+
+    def _validate(self):
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Workflow {self.name}: unknown dependency {dependency!r} in {step.name!r}")
+
+        # 循環検出（トポロジカルソート）
+        remaining = {name: set(step.depends_on) for name, step in self.steps.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Workflow {self.name}: dependency cycle among {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def ready_steps(self, done, running=()):
+        """依存ステップがすべて完了していて、未実行のステップ"""
+        return [step for name, step in self.steps.items()
+                if name not in done and name not in running
+                and all(dependency in done for dependency in step.depends_on)]
+
+
+def compile_workflow(name, definition):
+    """ワークフロー定義をDAGに変換
+
+    steps の各要素は以下のいずれか:
+      - "step_name": 直前のステップ（群）に依存する
+      - ["step_a", "step_b"]: 並列グループ。いずれも直前のステップ（群）に依存する
+      - {"name": ..., "role": ..., "depends_on": [...]}: 依存関係を明示する
+    """
+    steps = []
+    previous = []
+
+    for entry in definition.get('steps', []):
+        group = entry if isinstance(entry, list) else [entry]
+        current = []
+        for item in group:
+            if isinstance(item, dict):
+                step_name = item.get('name') or item.get('action')
+                role = item.get('role') or item.get('agent') or STEP_ROLES.get(step_name, 'actor')
+                depends_on = item['depends_on'] if 'depends_on' in item else previous
+            else:
+                step_name = item
+                role = STEP_ROLES.get(step_name, 'actor')
+                depends_on = previous
+            steps.append(WorkflowStep(step_name, role, depends_on))
+            current.append(step_name)
+        previous = current
+
+    return WorkflowDAG(name, steps)
+
+
+def load_workflows(config_file):
+    """orchestra.json から全ワークフローを読み込んでコンパイル"""
+    workflows = {}
+    try:
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                definitions = json.load(f).get('workflows', {})
+            for name, definition in definitions.items():
+                workflows[name] = compile_workflow(name, definition)
+    except Exception as e:
+        print(f"Error loading workflows: {e}")
+    return workflows
+
+
+class WorkflowRun:
+    """1タスク分のワークフロー実行状態"""
+
+    def __init__(self, run_id, dag, context, step_handler, on_finish, on_step=None):
+        self.run_id = run_id
+        self.dag = dag
+        self.context = context
+        self.step_handler = step_handler
+        self.on_finish = on_finish
+        self.on_step = on_step
+        self.results = {}
+        self.running = set()
+        self.status = 'running'
+        self.error = None
+        self.started_at = time.monotonic()
+
+
+class WorkflowEngine:
+    """ワークフローのステップを共有ワーカープールで実行する
+
+    ステップはタスク単位ではなくステップ単位でプールに投入されるため、
+    あるタスクがレビュー中の間に別のタスクの実装を進める、といった
+    タスク間のパイプライン実行になる。完了したステップの結果は
+    チェックポイントに保存され、再起動後はそこから再開する。
+    """
+
+    def __init__(self, max_workers=4, checkpoint_dir=None):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='workflow')
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        if self.checkpoint_dir:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.runs = {}
+        self.lock = threading.RLock()
+
+    def active_runs(self):
+        with self.lock:
+            return len(self.runs)
+
+    def is_running(self, run_id):
+        with self.lock:
+            return run_id in self.runs
+
+    def submit(self, run_id, dag, context, step_handler, on_finish, on_step=None):
+        """ワークフローの実行を開始（チェックポイントがあれば完了済みステップを飛ばす）"""
+        run = WorkflowRun(run_id, dag, context, step_handler, on_finish, on_step)
+        checkpoint = self.load_checkpoint(run_id)
+        if checkpoint and checkpoint.get('workflow') == dag.name:
+            run.results = {name: result for name, result in checkpoint.get('results', {}).items()
+                           if name in dag.steps}
+
+        with self.lock:
+            self.runs[run_id] = run
+            finished = self._schedule_ready(run)
+        if finished:
+            self._finish(run)
+        return run
+
+    def _schedule_ready(self, run):
+        """実行可能になったステップを投入し、ワークフローが終了したら True を返す"""
+        if run.status != 'running':
+            return not run.running
+
+        ready = run.dag.ready_steps(run.results, run.running)
+        if not ready and not run.running:
+            run.status = 'completed'
+            return True
+
+        for step in ready:
+            run.running.add(step.name)
+            self.executor.submit(self._run_step, run, step)
+        return False
+
+    def _run_step(self, run, step):
+        result = None
+        status = 'completed'
+        try:
+            if run.on_step:
+                run.on_step(run, step, 'started')
+            result = run.step_handler(step, run)
+        except StepPreempted:
+            status = 'preempted'
+        except Exception as e:
+            status = 'failed'
+            run.error = f"{step.name}: {e}"
+            print(f"Workflow step failed ({run.run_id}/{step.name}): {e}")
+
+        with self.lock:
+            run.running.discard(step.name)
+            if status == 'completed':
+                run.results[step.name] = result
+                self.save_checkpoint(run)
+            elif run.status == 'running':
+                run.status = status
+                self.save_checkpoint(run)
+            finished = self._schedule_ready(run)
+
+        if status == 'completed' and run.on_step:
+            run.on_step(run, step, 'completed')
+        if finished:
+            self._finish(run)
+
+    def _finish(self, run):
+        with self.lock:
+            self.runs.pop(run.run_id, None)
+        if run.status == 'completed':
+            self.clear_checkpoint(run.run_id)
+        try:
+            run.on_finish(run)
+        except Exception as e:
+            print(f"Error finishing workflow {run.run_id}: {e}")
+
+    def checkpoint_file(self, run_id):
+        return self.checkpoint_dir / f'{run_id}.json' if self.checkpoint_dir else None
+
+    def load_checkpoint(self, run_id):
+        checkpoint_file = self.checkpoint_file(run_id)
+        try:
+            if checkpoint_file and checkpoint_file.exists():
+                with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error loading workflow checkpoint {run_id}: {e}")
+        return None
+
+    def save_checkpoint(self, run):
+        checkpoint_file = self.checkpoint_file(run.run_id)
+        if not checkpoint_file:
+            return
+        try:
+            atomic_write_text(checkpoint_file, json.dumps({
+                'run_id': run.run_id,
+                'workflow': run.dag.name,
+                'status': run.status,
+                'results': run.results,
+                'updatedAt': datetime.now().isoformat()
+            }, indent=2, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error saving workflow checkpoint {run.run_id}: {e}")
+
+    def clear_checkpoint(self, run_id):
+        checkpoint_file = self.checkpoint_file(run_id)
+        if checkpoint_file:
+            checkpoint_file.unlink(missing_ok=True)
+
+    def list_checkpoints(self):
+        """中断されたまま残っているチェックポイントのrun_id一覧"""
+        if not self.checkpoint_dir:
+            return []
+        return [path.stem for path in self.checkpoint_dir.glob('*.json') if not path.name.startswith('.')]
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
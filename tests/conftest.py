@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# src/ のモジュールは communication パッケージを、communication のモジュールは相対・絶対の両方で import する
+# agents/actor のモジュールはエージェントと同じく単体のモジュールとして import する
+for path in (REPO_DIR, REPO_DIR / 'communication', REPO_DIR / 'agents' / 'actor'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture
+def task_processor(tmp_path):
+    """tmp_path を base_dir にした TaskProcessor（設定ファイルなし＝既定値）"""
+    from src.task_processor import TaskProcessor
+
+    processor = TaskProcessor(tmp_path)
+    yield processor
+    processor.workflow_engine.shutdown(wait=True)
+    processor.executor.shutdown(wait=True)
+    processor.status_table.close()
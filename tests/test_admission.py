@@ -0,0 +1,33 @@
+import json
+
+from src.admission import ADMITTED, DEFERRED, AdmissionController
+
+
+def test_deferred_entries_of_vanished_requests_are_dropped():
+    admission = AdmissionController(max_queue_depth=1)
+    assert admission.offer('task-a.json', 'a') == ADMITTED
+    assert admission.offer('task-b.json', 'b') == DEFERRED
+    assert admission.offer('task-c.json', 'c') == DEFERRED
+    assert admission.metrics()['deferred'] == 2
+
+    # task-b.json は削除された
+    admission.prune_deferred({'task-a.json', 'task-c.json'})
+
+    assert admission.metrics()['deferred'] == 1
+    assert admission.offer('task-c.json', 'c') == DEFERRED
+
+
+def test_loop_backs_off_while_an_admitted_request_is_still_running(task_processor, monkeypatch):
+    # ワーカーで処理を走らせず、実行枠を握ったままにする
+    monkeypatch.setattr(task_processor, 'run_admitted_message', lambda key, message_file, message: None)
+    task_processor.messages_dir.mkdir(parents=True, exist_ok=True)
+    (task_processor.messages_dir / 'task-1.json').write_text(json.dumps({
+        'id': 'msg-1', 'type': 'task_request', 'data': {'id': 'task-1', 'title': 'build'}}))
+
+    task_processor.process_messages()
+    assert task_processor.take_activity()
+
+    # 実行中のリクエストが残っているだけの周は進捗とみなさない
+    task_processor.process_messages()
+    assert task_processor.admission.is_tracked('task-1.json')
+    assert not task_processor.take_activity()
@@ -0,0 +1,45 @@
+from src.dedupe import ProcessedMessageIndex, message_fingerprint
+
+TASK_ID = 'task-1700000000000-abc123'
+
+
+def chat_message(message_id, text='OK'):
+    return {'id': message_id, 'type': 'task_update', 'timestamp': '2024-01-01T00:00:00Z',
+            'data': {'taskId': TASK_ID, 'message': text, 'action': 'append_message'}}
+
+
+def task_request(message_id, task_id=TASK_ID):
+    return {'id': message_id, 'type': 'task_request', 'timestamp': '2024-01-01T00:00:00Z',
+            'data': {'id': task_id, 'title': 'build', 'projectId': 'p'}}
+
+
+def process(processor, message):
+    """重複でなければ処理して確定する"""
+    if processor.is_duplicate_message(message):
+        return False
+    processor.commit_message(message)
+    return True
+
+
+def test_identical_chat_messages_are_both_processed(task_processor):
+    task_processor.save_tasks([{'id': TASK_ID, 'status': 'completed'}])
+
+    assert process(task_processor, chat_message('msg-1'))
+    assert process(task_processor, chat_message('msg-2'))
+    # 同じメッセージの再処理は重複
+    assert not process(task_processor, chat_message('msg-1'))
+    assert task_processor.get_task(TASK_ID)['processedMessages'] == ['msg-1', 'msg-2']
+
+
+def test_retried_task_request_for_the_same_task_is_duplicate(task_processor):
+    assert process(task_processor, task_request('task-a'))
+    assert not process(task_processor, task_request('task-b'))
+    assert process(task_processor, task_request('task-c', task_id='task-1700000000001-def456'))
+
+
+def test_identical_chat_messages_can_be_in_flight_together(tmp_path):
+    index = ProcessedMessageIndex(tmp_path / 'processed.json')
+    first, second = chat_message('msg-1'), chat_message('msg-2')
+
+    assert index.claim(first['id'], message_fingerprint(first))
+    assert index.claim(second['id'], message_fingerprint(second))
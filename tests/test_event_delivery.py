@@ -0,0 +1,54 @@
+from communication import websocket_bridge
+from communication.event_delivery import EventDelivery
+from communication.status_stream import StatusDiffer, merge_updates
+
+
+def agent(agent_id, status='idle'):
+    return {'id': agent_id, 'status': status}
+
+
+def test_bridge_coalesces_the_status_event_it_sends(tmp_path, monkeypatch):
+    # 送信スレッドを起動せず、バッファに積まれたイベントを確認する
+    monkeypatch.setattr(EventDelivery, 'start', lambda self: self)
+    bridge = websocket_bridge.OrchestraWebSocketBridge(str(tmp_path))
+
+    bridge.publish_agent_status([agent('actor')])
+    bridge.publish_agent_status([agent('actor', 'working')])
+    bridge.publish_agent_status([agent('actor', 'working'), agent('director')])
+
+    assert len(bridge.delivery.buffer) == 1
+    event, update = bridge.delivery.buffer[0]
+    assert update['keyframe'] and update['seq'] == 3
+    assert update['agents'] == [agent('actor', 'working'), agent('director')]
+
+
+def test_merged_deltas_keep_the_sequence_contiguous():
+    differ = StatusDiffer(keyframe_interval_seconds=3600)
+    differ.diff([agent('actor'), agent('director')])
+    first = differ.diff([agent('actor', 'working'), agent('director'), agent('tester')])
+    second = differ.diff([agent('actor', 'working'), agent('reviewer')])
+
+    merged = merge_updates(first, second)
+
+    assert (merged['fromSeq'], merged['seq']) == (2, 3)
+    assert merged['added'] == [agent('reviewer')]
+    assert merged['changed'] == [agent('actor', 'working')]
+    assert merged['removed'] == ['director']
+
+
+def test_monitor_pass_records_activity_on_the_cadence(tmp_path, monkeypatch):
+    monkeypatch.setattr(EventDelivery, 'start', lambda self: self)
+    bridge = websocket_bridge.OrchestraWebSocketBridge(str(tmp_path))
+    agents = [agent('actor')]
+    monkeypatch.setattr(bridge, 'detect_active_agents', lambda: agents)
+    cadence = bridge.status_cadence
+
+    # 状態が変わった周は最短間隔のまま
+    bridge.monitor_status_once()
+    assert not cadence.failing
+    assert cadence.interval == cadence.min_interval
+
+    # 変化のない周は間隔を延ばす（エラー時の待ち時間にはならない）
+    bridge.monitor_status_once()
+    assert not cadence.failing
+    assert cadence.interval == cadence.min_interval * cadence.backoff_factor
@@ -0,0 +1,31 @@
+import json
+
+from communication.ids import new_id, range_bounds, sort_key
+from communication.message_hub import MessageHub
+
+
+def test_legacy_and_ulid_ids_sort_by_creation_time():
+    ulid = new_id('msg-')
+    ids = [ulid, 'msg-1700000000001', 'task-1700000000000-abc123', 'msg-1600000000000']
+
+    assert sorted(ids, key=sort_key) == ['msg-1600000000000', 'task-1700000000000-abc123',
+                                         'msg-1700000000001', ulid]
+
+
+def test_range_bounds_with_legacy_cursor():
+    ids = sorted(['msg-1600000000000', 'msg-1700000000000', new_id('msg-'), new_id('msg-')], key=sort_key)
+
+    assert range_bounds(ids, after='msg-1700000000000') == (2, 4)
+    assert range_bounds(ids, after=ids[2]) == (3, 4)
+
+
+def test_inbox_keeps_legacy_messages_before_new_ones(tmp_path):
+    hub = MessageHub(str(tmp_path))
+    inbox = hub.messages_dir / 'actor_inbox.json'
+    legacy = {'id': 'msg-1600000000000', 'status': 'pending', 'type': 'hello'}
+    inbox.write_text(json.dumps([legacy]), encoding='utf-8')
+
+    new = hub.send_message('director', 'actor', 'hello', {})
+
+    assert [msg['id'] for msg in hub.get_messages('actor', mark_as_read=False)] == [legacy['id'], new]
+    assert [msg['id'] for msg in hub.get_messages_after('actor', legacy['id'])] == [new]
@@ -0,0 +1,17 @@
+from src.intent_router import GENERAL, GITHUB, IntentRouter
+
+
+def test_keyword_at_end_of_title_that_grows_when_lowercased():
+    router = IntentRouter()
+    # 'İ'.lower() は2文字になる
+    title = 'İİİİİİ github'
+
+    assert router.scan(title) == {('title', 'github')}
+    assert router.route(title) == GITHUB
+
+
+def test_description_keywords_stay_in_description():
+    router = IntentRouter()
+
+    assert router.scan('İİİİİİ', 'github') == {('description', 'github')}
+    assert router.route('İİİİİİ', 'github') == GENERAL
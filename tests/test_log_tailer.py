@@ -0,0 +1,18 @@
+from communication.log_tailer import parse_log_line
+
+TASK_ID = 'task-1700000000000-abc123def'
+
+
+def test_task_id_is_the_full_log_file_stem(tmp_path):
+    entry = parse_log_line('[2024-01-01T00:00:00] actor: Step started: implement',
+                           tmp_path / 'logs' / f'{TASK_ID}.log', 1)
+
+    assert entry['taskId'] == TASK_ID
+    assert entry['agentType'] == 'actor'
+    assert entry['message'] == 'Step started: implement'
+
+
+def test_non_task_logs_have_no_task_id(tmp_path):
+    entry = parse_log_line('[2024-01-01T00:00:00] system: started', tmp_path / 'orchestra.log', 1)
+
+    assert 'taskId' not in entry
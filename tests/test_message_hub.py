@@ -0,0 +1,26 @@
+import fcntl
+import json
+import threading
+
+from communication.message_hub import MessageHub
+
+
+def test_cleanup_waits_for_the_inbox_lock(tmp_path):
+    hub = MessageHub(str(tmp_path))
+    inbox = hub.messages_dir / 'actor_inbox.json'
+    old = {'id': 'msg-1600000000000', 'timestamp': '2020-01-01T00:00:00', 'status': 'read'}
+    inbox.write_text(json.dumps([old]), encoding='utf-8')
+
+    # 別のプロセスがメッセージを追加している最中
+    with open(inbox.with_name(inbox.name + '.lock'), 'a') as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        cleanup = threading.Thread(target=hub.cleanup_old_messages)
+        cleanup.start()
+        cleanup.join(0.2)
+        assert cleanup.is_alive()
+        new = dict(old, id='msg-01M5937WFTY110H5HWEXPPZ1YT', timestamp='2999-01-01T00:00:00')
+        inbox.write_text(json.dumps([old, new]), encoding='utf-8')
+        fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    cleanup.join()
+
+    assert [msg['id'] for msg in json.loads(inbox.read_text(encoding='utf-8'))] == [new['id']]
@@ -0,0 +1,30 @@
+import pstats
+import threading
+import time
+
+from communication.profiler import SignalProfiler
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_covers_worker_threads(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name='workflow_0')
+    worker.start()
+    profiler = SignalProfiler('test', tmp_path, duration_seconds=0, sample_rate_hz=200)
+    try:
+        profiler.start()
+        time.sleep(0.3)
+        collapsed_file = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert 'workflow_0;' in collapsed_file.read_text(encoding='utf-8')
+    stats = pstats.Stats(str(collapsed_file.with_suffix('.prof'))).stats
+    functions = {name: stat for (_, _, name), stat in stats.items()}
+    assert functions['busy_worker'][1] > 0
+    assert functions['<thread workflow_0>'][3] >= functions['busy_worker'][3]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import project_utils
+from task_history import append_entry
+
+CLAUDE_MD = """# p
+
+## 開発コマンド
+```bash
+npm install
+npm run build
+```
+
+## 依存関係
+- **Node.js** 18+
+
+## テスト
+- **フレームワーク**: Jest
+- `npm test` で全テスト
+
+## ディレクトリ構造
+```
+├── src/      # ソースコード
+```
+
+## タスク履歴
+
+### テストの追加 - 2024-01-01
+- **ステータス**: completed
+```bash
+npm run lint
+```
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    """tmp_path 上の projects.json とプロジェクトの CLAUDE.md"""
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'projects.json').write_text(
+        json.dumps([{'id': 'project-1', 'name': 'p', 'repository': 'p'}]), encoding='utf-8')
+    project_dir = tmp_path / 'projects' / 'p'
+    project_dir.mkdir(parents=True)
+    (project_dir / 'CLAUDE.md').write_text(CLAUDE_MD, encoding='utf-8')
+    return tmp_path, project_dir / 'CLAUDE.md'
+
+
+def test_sections_are_sorted_by_heading_and_task_history_is_skipped():
+    config = project_utils.parse_claude_config(CLAUDE_MD)
+
+    # タスク履歴の「### テスト…」やコードブロックは設定として読まない
+    assert config == {
+        'commands': {'install': 'npm install', 'build': 'npm run build', 'test': 'npm test'},
+        'dependencies': ['Node.js 18+'],
+        'testing': {'commands': ['npm test'], 'settings': {'フレームワーク': 'Jest'}, 'notes': []},
+        'deployment': {'commands': [], 'settings': {}, 'notes': []},
+        'structure': {'src/': 'ソースコード'}
+    }
+
+
+def test_config_is_reparsed_only_when_claude_md_changes(project, monkeypatch):
+    base_dir, claude_file = project
+    parsed = []
+    parse = project_utils.parse_claude_config
+    monkeypatch.setattr(project_utils, 'parse_claude_config',
+                        lambda content: parsed.append(content) or parse(content))
+
+    config = project_utils.get_project_claude_config('project-1', base_dir=str(base_dir))
+    # 呼び出し側が書き換えてもキャッシュには影響しない
+    config['config']['commands'].clear()
+    assert project_utils.get_project_claude_config('project-1', base_dir=str(base_dir))['config']['commands']
+    assert len(parsed) == 1
+
+    # メモリ上のキャッシュがなくても、内容が同じなら保存済みの解析結果を使う
+    project_utils._config_cache.clear()
+    project_utils.get_project_claude_config('project-1', base_dir=str(base_dir))
+    assert len(parsed) == 1
+    assert project_utils.config_cache_path(claude_file).exists()
+
+    claude_file.write_text(CLAUDE_MD.replace('npm run build', 'npm run build\nnpm run dev'), encoding='utf-8')
+    config = project_utils.get_project_claude_config('project-1', base_dir=str(base_dir))
+    assert len(parsed) == 2
+    assert config['config']['commands']['dev'] == 'npm run dev'
+
+
+def test_recent_task_history_is_read_from_the_journal(project):
+    base_dir, claude_file = project
+    for n, (status, agent) in enumerate([('completed', 'Actor'), ('failed', 'Actor'),
+                                         ('completed', 'Director'), ('completed', 'Actor')]):
+        append_entry(claude_file, {'title': f'課題 {n}', 'status': status, 'agent': agent})
+
+    def titles(**filters):
+        return [entry['title'] for entry in
+                project_utils.get_recent_task_history('project-1', base_dir=str(base_dir), **filters)]
+
+    assert titles() == ['課題 3', '課題 2', '課題 1', '課題 0']
+    assert titles(limit=2) == ['課題 3', '課題 2']
+    assert titles(status='completed', agent='Actor') == ['課題 3', '課題 0']
+    assert titles(agent='Director') == ['課題 2']
+
+    # 索引は追記された分だけ読み込み、CLAUDE.md に反映しても変わらない
+    append_entry(claude_file, {'title': '課題 4', 'status': 'failed'})
+    assert project_utils.merge_task_history('project-1', base_dir=str(base_dir)) == 5
+    assert titles(status='failed') == ['課題 4', '課題 1']
+    assert project_utils.get_recent_task_history('project-unknown', base_dir=str(base_dir)) == []
@@ -0,0 +1,47 @@
+import time
+
+from src.scheduler import FairScheduler
+
+
+def test_one_high_priority_arrival_preempts_one_running_task():
+    scheduler = FairScheduler()
+    scheduler.enqueue('p', 'urgent', {'id': 'urgent'}, 'high')
+
+    # 実行中の low タスク3件が同時に確認しても、譲るのは1件だけ
+    assert [scheduler.claim_preemption('low') for _ in range(3)] == [True, False, False]
+
+    assert scheduler.dequeue() == ('p', 'urgent', {'id': 'urgent'})
+    assert scheduler.preemption_claims == []
+    assert scheduler.claim_preemption('low') is False
+
+
+def test_each_waiting_high_priority_item_gets_its_own_victim():
+    scheduler = FairScheduler()
+    scheduler.enqueue('p', 'a', 'a', 'high')
+    scheduler.enqueue('p', 'b', 'b', 'high')
+
+    assert [scheduler.claim_preemption('medium') for _ in range(3)] == [True, True, False]
+    assert scheduler.claim_preemption('high') is False
+
+
+def test_preempted_task_is_requeued_with_its_original_enqueue_time(task_processor):
+    enqueued_at = time.monotonic() - 600
+    task = {'id': 'task-1700000000000-abc123', 'projectId': 'p', 'priority': 'low',
+            'title': 'slow', 'status': 'in_progress'}
+    task_processor.save_tasks([task])
+
+    task_processor.requeue_preempted_task(task, 50, enqueued_at)
+
+    assert task_processor.task_scheduler.queues['p'].oldest_enqueued_at() == enqueued_at
+    assert task_processor.get_task(task['id'])['status'] == 'pending'
+
+
+def test_should_preempt_does_not_reread_tasks(task_processor, monkeypatch):
+    task_processor.max_active_workflows = 0
+    task_processor.task_scheduler.enqueue('p', 'urgent', ({'id': 'urgent'}, time.monotonic()), 'high')
+    reads = []
+    monkeypatch.setattr(task_processor, 'load_tasks', lambda: reads.append(1) or [])
+    running = {'id': 'task-1700000000000-abc123', 'priority': 'low'}
+
+    assert [task_processor.should_preempt(running) for _ in range(3)] == [True, False, False]
+    assert reads == []
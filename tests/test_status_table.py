@@ -0,0 +1,39 @@
+import json
+import os
+
+from communication.agent_registry import process_start_ticks
+from communication.status_table import StatusTable
+
+
+def write_foreign_slot(table, index, agent_id, pid, start_ticks):
+    table._write_slot(index, pid, start_ticks, agent_id.encode('utf-8'),
+                      json.dumps({'id': agent_id}).encode('utf-8'))
+
+
+def test_snapshot_skips_slots_whose_pid_was_reused(tmp_path):
+    table = StatusTable(tmp_path / 'agent_status.table', slots=4)
+    parent = os.getppid()
+    write_foreign_slot(table, 0, 'live', parent, process_start_ticks(parent))
+    # 同じ PID でも起動時刻が違う（終了したプロセスの PID が再利用された）
+    write_foreign_slot(table, 1, 'stale', parent, process_start_ticks(parent) + 1)
+
+    assert [agent['id'] for agent in table.snapshot()] == ['live']
+
+
+def test_release_keeps_slots_owned_by_another_live_process(tmp_path):
+    table = StatusTable(tmp_path / 'agent_status.table', slots=4)
+    parent = os.getppid()
+    write_foreign_slot(table, 0, 'actor-1', parent, process_start_ticks(parent))
+    write_foreign_slot(table, 1, 'actor-2', parent, process_start_ticks(parent) + 1)
+
+    assert table.release('actor-1') is False
+    assert table.release('actor-2') is True
+    assert [agent['id'] for agent in table.snapshot()] == ['actor-1']
+
+
+def test_release_own_slot(tmp_path):
+    table = StatusTable(tmp_path / 'agent_status.table', slots=4)
+    table.slot('director').write({'id': 'director'})
+
+    assert table.release('director') is True
+    assert table.snapshot() == []
@@ -0,0 +1,54 @@
+import json
+
+from communication import websocket_bridge
+from communication.event_delivery import EventDelivery
+from communication.log_tailer import LogTailer
+from communication.subscriptions import Subscription
+
+TASK_ID = 'task-1700000000000-abc123def'
+
+
+def make_bridge(tmp_path, monkeypatch, filters):
+    monkeypatch.setattr(EventDelivery, 'start', lambda self: self)
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'tasks.json').write_text(json.dumps({'tasks': [
+        {'id': TASK_ID, 'projectId': 'project-web'},
+        {'id': 'task-1700000000001-zzz999xyz', 'projectId': 'project-api'},
+    ]}), encoding='utf-8')
+    bridge = websocket_bridge.OrchestraWebSocketBridge(str(tmp_path))
+    bridge.dashboard_subscription = Subscription(filters=filters)
+    return bridge
+
+
+def tail_task_log(tmp_path, bridge, task_id, line):
+    """タスクログに1行書き、LogTailer から bridge.send_logs まで通す"""
+    logs_dir = tmp_path / 'logs'
+    logs_dir.mkdir(exist_ok=True)
+    log_file = logs_dir / f'{task_id}.log'
+    with open(log_file, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+    LogTailer(logs_dir, bridge.send_logs).read_paths([str(log_file)])
+
+
+def delivered_logs(bridge):
+    return [data for event, data in bridge.delivery.buffer if event == 'log']
+
+
+def test_task_log_passes_task_and_project_filters(tmp_path, monkeypatch):
+    bridge = make_bridge(tmp_path, monkeypatch, {'taskIds': [TASK_ID], 'projects': ['project-web']})
+
+    tail_task_log(tmp_path, bridge, TASK_ID, '[2024-01-01T00:00:00] actor: Step started: implement')
+
+    [entry] = delivered_logs(bridge)
+    assert entry['taskId'] == TASK_ID
+    assert entry['projectId'] == 'project-web'
+    assert entry['message'] == 'Step started: implement'
+
+
+def test_other_tasks_are_filtered_out(tmp_path, monkeypatch):
+    bridge = make_bridge(tmp_path, monkeypatch, {'projects': ['project-web']})
+
+    tail_task_log(tmp_path, bridge, 'task-1700000000001-zzz999xyz', '[2024-01-01T00:00:00] actor: other')
+    tail_task_log(tmp_path, bridge, TASK_ID, '[2024-01-01T00:00:01] actor: mine')
+
+    assert [entry['message'] for entry in delivered_logs(bridge)] == ['mine']
@@ -0,0 +1,50 @@
+import threading
+
+import task_history
+
+
+def test_entries_go_into_an_empty_history_section_followed_by_another(tmp_path):
+    claude_file = tmp_path / 'CLAUDE.md'
+    claude_file.write_text('# p\n\n## タスク履歴\n## メモ\n- そのまま残す\n', encoding='utf-8')
+
+    task_history.append_entry(claude_file, {'title': '最初の課題', 'status': 'completed'})
+    assert task_history.merge_journal(claude_file) == 1
+
+    content = claude_file.read_text(encoding='utf-8')
+    assert content.index('## タスク履歴') < content.index('### 最初の課題') < content.index('## メモ')
+    assert content.endswith('## メモ\n- そのまま残す\n')
+    assert task_history.merge_journal(claude_file) == 0
+
+
+def test_concurrent_writers_are_merged_exactly_once(tmp_path):
+    claude_file = tmp_path / 'CLAUDE.md'
+    claude_file.write_text('# p\n\n## タスク履歴\n', encoding='utf-8')
+    writing = threading.Event()
+    writing.set()
+
+    def write(writer):
+        for n in range(25):
+            task_history.append_entry(claude_file, {'title': f'課題 {writer}-{n}'})
+
+    def merge():
+        while writing.is_set():
+            task_history.merge_journal(claude_file, max_entries=10)
+
+    writers = [threading.Thread(target=write, args=(writer,)) for writer in range(4)]
+    mergers = [threading.Thread(target=merge) for _ in range(2)]
+    for thread in mergers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writing.clear()
+    for thread in mergers:
+        thread.join()
+    while task_history.merge_journal(claude_file, max_entries=10):
+        pass
+
+    content = claude_file.read_text(encoding='utf-8')
+    assert content.count('\n### ') == 100
+    for writer in range(4):
+        for n in range(25):
+            assert content.count(f'### 課題 {writer}-{n} ') == 1
+    assert len(task_history.MERGE_MARKER_PATTERN.findall(content)) == 1
@@ -0,0 +1,35 @@
+import json
+
+from src.workflow import WorkflowRun
+
+
+def write_checkpoint(processor, task_id):
+    checkpoint = processor.workflow_engine.checkpoint_file(task_id)
+    checkpoint.write_text(json.dumps({'workflow': 'default', 'results': {}}), encoding='utf-8')
+
+
+def test_recovery_clears_checkpoints_of_rejected_tasks(task_processor):
+    task_processor.save_tasks([{'id': 'task-1-interrupted', 'status': 'in_progress', 'title': 'a'},
+                               {'id': 'task-2-rejected', 'status': 'rejected', 'title': 'b'},
+                               {'id': 'task-3-deferred', 'status': 'deferred', 'title': 'c'}])
+    for task_id in ('task-1-interrupted', 'task-2-rejected', 'task-3-deferred', 'task-4-missing'):
+        write_checkpoint(task_processor, task_id)
+
+    task_processor.recover_interrupted_workflows()
+
+    assert sorted(task_processor.workflow_engine.list_checkpoints()) == ['task-1-interrupted', 'task-3-deferred']
+    assert task_processor.get_task('task-1-interrupted')['status'] == 'pending'
+
+
+def test_failed_workflow_clears_its_checkpoint(task_processor):
+    task = {'id': 'task-1-failed', 'status': 'in_progress', 'title': 'a', 'projectId': 'p'}
+    task_processor.save_tasks([task])
+    write_checkpoint(task_processor, task['id'])
+    run = WorkflowRun(task['id'], task_processor.select_workflow(task),
+                      {'task': task, 'project_id': 'p', 'enqueued_at': 0.0}, None, None)
+    run.status, run.error = 'failed', 'implementation: boom'
+
+    task_processor.complete_task_workflow(run)
+
+    assert task_processor.workflow_engine.list_checkpoints() == []
+    assert task_processor.get_task(task['id'])['rejectedReason'] == 'workflow_failed'
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 import fs from 'fs/promises'
 import path from 'path'
+import { splitTraceContext } from '@/utils/traceContext'
 
 const ORCHESTRA_DIR = process.env.ORCHESTRA_DIR || path.resolve(process.cwd(), '..')
 const LOGS_DIR = path.join(ORCHESTRA_DIR, 'logs')
@@ -11,6 +12,8 @@ interface LogEntry {
   agent: string
   message: string
   raw: string
+  traceId?: string
+  spanId?: string
 }
 
 interface TaskLog {
@@ -47,12 +50,15 @@ function parseLogFile(content: string): LogEntry[] {
   for (const line of lines) {
     const match = line.match(/^\[([^\]]+)\]\s+([^:]+):\s+(.+)$/)
     if (match) {
-      const [, timestamp, agent, message] = match
+      const [, timestamp, agent, rawMessage] = match
+      const { message, traceId, spanId } = splitTraceContext(rawMessage)
       entries.push({
         timestamp,
         agent: agent.trim(),
         message: message.trim(),
-        raw: line
+        raw: line,
+        traceId,
+        spanId
       })
     }
   }
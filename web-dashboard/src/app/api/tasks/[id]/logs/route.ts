@@ -1,6 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server'
 import path from 'path'
 import fs from 'fs/promises'
+import { compareIds, indexAfter } from '@/utils/ids'
+import { splitTraceContext } from '@/utils/traceContext'
 
 const ORCHESTRA_DIR = process.env.ORCHESTRA_DIR || path.resolve(process.cwd(), '..')
 const LOGS_DIR = path.join(ORCHESTRA_DIR, 'logs')
@@ -13,6 +15,8 @@ interface TaskLog {
   message: string
   agent?: string
   taskId?: string
+  traceId?: string
+  spanId?: string
 }
 
 interface TaskProgress {
@@ -48,14 +52,17 @@ async function getTaskLogs(taskId: string): Promise<TaskLog[]> {
               // ログの解析（タイムスタンプとエージェント名を抽出）
               const timestampMatch = line.match(/\[([^\]]+)\] ([^:]+): (.+)/)
               if (timestampMatch) {
-                const [, timestamp, agent, message] = timestampMatch
+                const [, timestamp, agent, rawMessage] = timestampMatch
+                const { message, traceId, spanId } = splitTraceContext(rawMessage)
                 logs.push({
                   id: `${Date.now()}-${Math.random()}`,
                   timestamp,
                   level: 'info',
                   message,
                   agent,
-                  taskId
+                  taskId,
+                  traceId,
+                  spanId
                 })
               } else if (line.trim()) {
                 // タイムスタンプなしのログ
@@ -107,40 +114,47 @@ async function getTaskLogs(taskId: string): Promise<TaskLog[]> {
 }
 
 // エージェント間のメッセージを取得
-async function getAgentMessages(taskId: string): Promise<any[]> {
-  const messages: any[] = []
+// ファイル名 agent-msg-<taskId>-msg-<ID>.json のIDには生成時刻が含まれるので、ファイル名のIDの
+// ソートだけで時系列に並び（ULID 以前のIDと混在しても compareIds が時刻で比較する）、
+// カーソル（after）以降のファイルだけを読み込める
+async function getAgentMessages(taskId: string, after?: string): Promise<any[]> {
+  const messagesDir = path.join(COMMUNICATION_DIR, 'messages')
+  const prefix = `agent-msg-${taskId}-msg-`
+  const entries: { id: string; file: string; filePath: string }[] = []
   
-  try {
-    const messagesDir = path.join(COMMUNICATION_DIR, 'messages')
-    const files = await fs.readdir(messagesDir)
-    
-    for (const file of files) {
-      if (file.endsWith('.json') && file.includes('agent-msg')) {
-        try {
-          const filePath = path.join(messagesDir, file)
-          const content = await fs.readFile(filePath, 'utf-8')
-          const message = JSON.parse(content)
-          
-          // ファイル名からタスクIDを抽出 (例: agent-msg-test-12345-msg-xxx.json)
-          const taskIdMatch = file.match(/agent-msg-([^-]+(?:-[^-]+)*)-msg-/)
-          const fileTaskId = taskIdMatch ? taskIdMatch[1] : null
-          
-          if (fileTaskId === taskId || message.data?.id === taskId || message.id?.includes(taskId)) {
-            messages.push({
-              ...message,
-              filename: file
-            })
-          }
-        } catch (error) {
-          console.error(`メッセージファイル解析エラー ${file}:`, error)
+  // 処理済みでアーカイブされたメッセージも含める
+  for (const dir of [messagesDir, path.join(messagesDir, 'archive')]) {
+    try {
+      const files = await fs.readdir(dir)
+      for (const file of files) {
+        if (file.startsWith(prefix) && file.endsWith('.json')) {
+          entries.push({ id: file.slice(prefix.length, -'.json'.length), file, filePath: path.join(dir, file) })
         }
       }
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code !== 'ENOENT') {
+        console.error('メッセージディレクトリ読み取りエラー:', error)
+      }
+    }
+  }
+  
+  entries.sort((a, b) => compareIds(a.id, b.id))
+  const start = after ? indexAfter(entries.map(entry => entry.id), after) : 0
+  
+  const messages: any[] = []
+  for (const entry of entries.slice(start)) {
+    try {
+      const content = await fs.readFile(entry.filePath, 'utf-8')
+      messages.push({
+        ...JSON.parse(content),
+        filename: entry.file
+      })
+    } catch (error) {
+      console.error(`メッセージファイル解析エラー ${entry.file}:`, error)
     }
-  } catch (error) {
-    console.error('メッセージディレクトリ読み取りエラー:', error)
   }
   
-  return messages.sort((a, b) => new Date(a.timestamp).getTime() - new Date(b.timestamp).getTime())
+  return messages
 }
 
 // タスクの進行状況を計算
@@ -214,7 +228,8 @@ export async function GET(request: NextRequest, { params }: { params: { id: stri
     
     // ログとメッセージを取得
     const logs = await getTaskLogs(taskId)
-    const agentMessages = await getAgentMessages(taskId)
+    const after = request.nextUrl.searchParams.get('after') || undefined
+    const agentMessages = await getAgentMessages(taskId, after)
     
     // 進行状況を計算
     const { progress, currentStep } = calculateProgress(logs, task.status)
@@ -1,6 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server'
 import path from 'path'
 import fs from 'fs/promises'
+import { writeJsonAtomic } from '@/utils/durableFile'
+import { newId } from '@/utils/ids'
 
 const ORCHESTRA_DIR = process.env.ORCHESTRA_DIR || path.resolve(process.cwd(), '..')
 
@@ -9,8 +11,9 @@ async function sendMessageToProducer(taskId: string, message: string): Promise<v
   const messageDir = path.join(ORCHESTRA_DIR, 'communication', 'messages')
   await fs.mkdir(messageDir, { recursive: true })
   
+  const messageId = newId(`msg-${taskId}-`)
   const messageData = {
-    id: `msg-${taskId}-${Date.now()}`,
+    id: messageId,
     type: 'task_update',
     from: 'web_dashboard',
     to: 'producer',
@@ -22,8 +25,8 @@ async function sendMessageToProducer(taskId: string, message: string): Promise<v
     }
   }
   
-  const messageFile = path.join(messageDir, `msg-${taskId}-${Date.now()}.json`)
-  await fs.writeFile(messageFile, JSON.stringify(messageData, null, 2))
+  const messageFile = path.join(messageDir, `${messageId}.json`)
+  await writeJsonAtomic(messageFile, messageData)
   
   console.log(`メッセージ ${messageData.id} をProducerエージェントに送信しました`)
 }
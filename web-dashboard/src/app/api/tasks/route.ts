@@ -2,6 +2,7 @@ import { NextRequest, NextResponse } from 'next/server'
 import path from 'path'
 import fs from 'fs/promises'
 import { generateTaskTitle, isValidTitle } from '@/utils/ai'
+import { writeJsonAtomic } from '@/utils/durableFile'
 
 // タスクリクエストの型定義
 interface TaskRequest {
@@ -16,7 +17,7 @@ interface TaskRequest {
 
 interface Task extends TaskRequest {
   id: string
-  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected'
+  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected' | 'deferred'
   assignedAgent?: string
   createdAt: string
   updatedAt: string
@@ -44,7 +45,7 @@ async function saveTasks(tasks: Task[]): Promise<void> {
   const dir = path.dirname(TASKS_FILE)
   await fs.mkdir(dir, { recursive: true })
   // {"tasks": []} 形式で保存して一貫性を保つ
-  await fs.writeFile(TASKS_FILE, JSON.stringify({ tasks }, null, 2))
+  await writeJsonAtomic(TASKS_FILE, { tasks })
 }
 
 // プロジェクトファイルの読み込み
@@ -73,7 +74,7 @@ async function sendTaskToProducer(task: Task): Promise<void> {
   
   const messageFile = path.join(messageDir, `task-${task.id}.json`)
   console.log(`Creating message file: ${messageFile}`)
-  await fs.writeFile(messageFile, JSON.stringify(message, null, 2))
+  await writeJsonAtomic(messageFile, message)
   console.log(`Message file created successfully`)
   
   console.log(`タスク ${task.id} をProducerエージェントに送信しました`)
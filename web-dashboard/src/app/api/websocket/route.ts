@@ -4,6 +4,8 @@ import { Server as HTTPServer } from 'http'
 import fs from 'fs'
 import path from 'path'
 import { AgentLog, AgentStatus } from '@/types/agent'
+import { readJournalVersion } from '@/utils/durableFile'
+import { AgentStatusDelta, StatusDiffer, applyStatusDelta } from '@/utils/statusStream'
 
 // WebSocketサーバーのインスタンス
 let io: Server | null = null
@@ -15,6 +17,12 @@ const COMMUNICATION_DIR = path.join(ORCHESTRA_DIR, 'communication')
 
 // エージェント状態を管理
 const agentStatuses = new Map<string, AgentStatus>()
+// 最後に読み込んだ agent_status.json のジャーナルバージョン
+let agentStatusVersion = -1
+// クライアントへは前回からの差分だけを送る
+const statusDiffer = new StatusDiffer()
+// ブリッジから最後に適用した差分の連番（飛んだらキーフレームまで待つ）
+let bridgeStatusSeq: number | null = null
 
 // ログファイルを監視してリアルタイム更新
 function watchLogFiles() {
@@ -143,6 +151,11 @@ function watchAgentStatus() {
 // エージェント状態を読み取り
 function readAgentStatus(statusFile: string) {
   try {
+    // 前回から変更がなければ再パースしない
+    const version = readJournalVersion(statusFile)
+    if (version > 0 && version === agentStatusVersion) return
+    agentStatusVersion = version
+
     if (fs.existsSync(statusFile)) {
       const content = fs.readFileSync(statusFile, 'utf-8')
       const statuses: AgentStatus[] = JSON.parse(content)
@@ -157,12 +170,40 @@ function readAgentStatus(statusFile: string) {
   }
 }
 
-// エージェント状態をブロードキャスト
+// エージェント状態の差分をブロードキャスト（変化がなければキーフレームの時期まで何も送らない）
 function broadcastAgentStatus() {
-  if (io && agentStatuses.size > 0) {
-    const statusArray = Array.from(agentStatuses.values())
-    io.emit('agents', statusArray)
+  if (!io) return
+  const delta = statusDiffer.diff(Array.from(agentStatuses.values()))
+  if (delta) {
+    io.emit('agentsDelta', delta)
+  }
+}
+
+// ブリッジから届いた差分を反映
+function applyBridgeStatus(delta: AgentStatusDelta) {
+  const next = applyStatusDelta(Array.from(agentStatuses.values()), bridgeStatusSeq, delta)
+  if (!next) {
+    console.warn(`エージェント状態の連番が飛びました (${bridgeStatusSeq} -> ${delta.seq})。キーフレームを待ちます`)
+    return
   }
+  bridgeStatusSeq = delta.seq
+  agentStatuses.clear()
+  next.forEach(status => agentStatuses.set(status.id, status))
+  broadcastAgentStatus()
+}
+
+// ブリッジからのイベントをクライアントへ
+function dispatchBridgeEvent(event: string, data: any) {
+  if (event === 'agents_delta') {
+    applyBridgeStatus(data)
+  } else {
+    io!.emit(event, data)
+  }
+}
+
+// 現在の状態の全体（接続時・再同期要求時）
+function sendStatusKeyframe(socket: any) {
+  socket.emit('agentsDelta', statusDiffer.keyframe(Array.from(agentStatuses.values())))
 }
 
 // WebSocketサーバーの初期化
@@ -187,10 +228,7 @@ function initializeWebSocket() {
 
       // 接続時に現在の状態を送信
       try {
-        const statusArray = Array.from(agentStatuses.values())
-        if (statusArray.length > 0) {
-          socket.emit('agents', statusArray)
-        }
+        sendStatusKeyframe(socket)
       } catch (error) {
         console.error('初期状態送信エラー:', error)
       }
@@ -206,8 +244,7 @@ function initializeWebSocket() {
       // システム状態要求
       socket.on('requestStatus', () => {
         try {
-          const statusArray = Array.from(agentStatuses.values())
-          socket.emit('agents', statusArray)
+          sendStatusKeyframe(socket)
         } catch (error) {
           console.error('状態要求処理エラー:', error)
           socket.emit('error', { message: '状態の取得に失敗しました' })
@@ -267,13 +304,25 @@ export async function POST(request: NextRequest) {
     
     // メッセージをブロードキャスト
     if (io && body.type === 'broadcast') {
-      io.emit(body.event, body.data)
+      dispatchBridgeEvent(body.event, body.data)
       return new Response(JSON.stringify({ success: true }), {
         status: 200,
         headers: { 'Content-Type': 'application/json' }
       })
     }
 
+    // ブリッジがまとめて送ったイベントを順にブロードキャスト
+    if (io && body.type === 'batch' && Array.isArray(body.events)) {
+      const events = body.events.filter((item: any) => item && typeof item.event === 'string')
+      events.forEach((item: any) => {
+        dispatchBridgeEvent(item.event, item.data)
+      })
+      return new Response(JSON.stringify({ success: true, delivered: events.length }), {
+        status: 200,
+        headers: { 'Content-Type': 'application/json' }
+      })
+    }
+
     return new Response(JSON.stringify({ error: 'Invalid request' }), {
       status: 400,
       headers: { 'Content-Type': 'application/json' }
@@ -23,7 +23,7 @@ interface Task {
   id: string
   title: string
   description: string
-  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected'
+  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected' | 'deferred'
   priority: 'low' | 'medium' | 'high'
   tags: string[]
   requirements: string
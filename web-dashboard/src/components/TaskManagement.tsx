@@ -18,7 +18,7 @@ interface Task {
   tags: string[]
   requirements: string
   acceptanceCriteria: string
-  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected'
+  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected' | 'deferred'
   assignedAgent?: string
   createdAt: string
   updatedAt: string
@@ -195,6 +195,8 @@ export function TaskManagement({ initialTask }: TaskManagementProps) {
         return '完了'
       case 'rejected':
         return '却下'
+      case 'deferred':
+        return '保留中'
       default:
         return '不明'
     }
@@ -4,7 +4,7 @@ import { FixedSizeList as List } from 'react-window'
 interface TaskTimelineItem {
   id: string
   title: string
-  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected'
+  status: 'pending' | 'in_progress' | 'in_review' | 'completed' | 'rejected' | 'deferred'
   assignedAgent?: string
   createdAt: string
   updatedAt: string
@@ -28,6 +28,13 @@ export const SYSTEM_CONFIG = {
     maxLogLines: 500,
   },
   
+  // ブリッジの WebSocket サーバー（orchestra.json の push_server）に直接接続する場合のURL
+  // 例: ws://localhost:8002 （未設定なら Next.js の Socket.IO サーバー経由）
+  pushServer: {
+    url: process.env.NEXT_PUBLIC_BRIDGE_WS_URL || '',
+    reconnectInterval: 2000,
+  },
+  
   // Claude Code CLI設定
   claudeCodeCLI: {
     // タイムアウト（秒）
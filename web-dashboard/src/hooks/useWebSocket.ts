@@ -1,6 +1,8 @@
 import { useEffect, useState, useRef, useCallback } from 'react'
 import { io, Socket } from 'socket.io-client'
 import { AgentLog, AgentStatus } from '@/types/agent'
+import { SYSTEM_CONFIG } from '@/config/system'
+import { AgentStatusDelta, applyStatusDelta, isStaleDelta } from '@/utils/statusStream'
 
 interface UseWebSocketReturn {
   logs: AgentLog[]
@@ -8,6 +10,22 @@ interface UseWebSocketReturn {
   isConnected: boolean
   connectionError: string | null
   sendMessage?: (data: any) => boolean
+  updateSubscription: (subscription: LogSubscription) => boolean
+}
+
+// ブリッジに直接接続しているときにサーバー側で絞り込むログの条件（communication/subscriptions.py）
+export interface LogSubscription {
+  events?: string[]
+  filters?: {
+    taskIds?: string[]
+    agentTypes?: string[]
+    levels?: string[]
+    projects?: string[]
+  }
+  rateLimit?: {
+    linesPerSecond: number
+    burst?: number
+  }
 }
 
 interface WebSocketMessage {
@@ -31,6 +49,12 @@ export function useWebSocket(url?: string, options?: WebSocketOptions): UseWebSo
   const [connectionError, setConnectionError] = useState<string | null>(null)
   const socketRef = useRef<Socket | null>(null)
   const wsRef = useRef<WebSocket | null>(null)
+  const bridgeRef = useRef<WebSocket | null>(null)
+  // 差分の適用に使う最新の一覧と連番
+  const agentsRef = useRef<AgentStatus[]>([])
+  const statusSeqRef = useRef<number | null>(null)
+  // 再接続時にも送り直す購読条件
+  const subscriptionRef = useRef<LogSubscription | null>(null)
   
   // チャット用のメッセージ送信関数
   const sendMessage = useCallback((data: WebSocketMessage) => {
@@ -56,8 +80,117 @@ export function useWebSocket(url?: string, options?: WebSocketOptions): UseWebSo
     }
   }, [])
 
+  // 購読条件を変更（ブリッジに直接接続していないときは次の接続時に送る）
+  const updateSubscription = useCallback((subscription: LogSubscription) => {
+    subscriptionRef.current = subscription
+    const ws = bridgeRef.current
+    if (ws?.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ type: 'subscribe', ...subscription }))
+      return true
+    }
+    return false
+  }, [])
+
   useEffect(() => {
     let reconnectTimeout: NodeJS.Timeout | null = null
+    let disposed = false
+
+    // ログ受信
+    const handleLog = (log: AgentLog) => {
+      try {
+        setLogs(prev => {
+          const updated = [...prev, log]
+          // 最新100件のみ保持
+          return updated.slice(-100)
+        })
+      } catch (error) {
+        console.error('ログ受信処理エラー:', error)
+      }
+    }
+
+    // エージェント状態の差分受信（連番が飛んだら全体を要求して再同期）
+    const handleAgentsDelta = (delta: AgentStatusDelta, requestStatus: () => void) => {
+      try {
+        if (isStaleDelta(statusSeqRef.current, delta)) return
+        const next = applyStatusDelta(agentsRef.current, statusSeqRef.current, delta)
+        if (!next) {
+          statusSeqRef.current = null
+          requestStatus()
+          return
+        }
+        statusSeqRef.current = delta.seq
+        agentsRef.current = next
+        setAgents(next)
+      } catch (error) {
+        console.error('エージェント状態差分の処理エラー:', error)
+      }
+    }
+
+    // エージェント状態受信（全体）
+    const handleAgents = (agentList: AgentStatus[]) => {
+      try {
+        if (Array.isArray(agentList)) {
+          agentsRef.current = agentList
+          setAgents(agentList)
+        } else {
+          console.warn('無効なエージェント状態データを受信:', agentList)
+        }
+      } catch (error) {
+        console.error('エージェント状態受信処理エラー:', error)
+      }
+    }
+
+    // ブリッジの WebSocket サーバーに直接接続（Next.js のサーバーを経由しない）
+    const connectBridge = (bridgeUrl: string) => {
+      const ws = new WebSocket(bridgeUrl)
+      bridgeRef.current = ws
+      const requestStatus = () => {
+        if (ws.readyState === WebSocket.OPEN) {
+          ws.send(JSON.stringify({ type: 'requestStatus' }))
+        }
+      }
+
+      // 接続時にはサーバーが現在の状態（キーフレーム）を送ってくる
+      ws.onopen = () => {
+        console.log('ブリッジに接続しました:', bridgeUrl)
+        statusSeqRef.current = null
+        setIsConnected(true)
+        setConnectionError(null)
+        if (subscriptionRef.current) {
+          ws.send(JSON.stringify({ type: 'subscribe', ...subscriptionRef.current }))
+        }
+      }
+
+      ws.onmessage = (event) => {
+        try {
+          const message = JSON.parse(event.data)
+          if (message.event === 'log') {
+            handleLog(message.data)
+          } else if (message.event === 'agentsDelta') {
+            handleAgentsDelta(message.data, requestStatus)
+          } else if (message.event === 'agents') {
+            handleAgents(message.data)
+          }
+        } catch (error) {
+          console.error('ブリッジからのメッセージの処理エラー:', error)
+        }
+      }
+
+      // 遅い受信者として切断された場合も含めて再接続する
+      ws.onclose = (event) => {
+        if (bridgeRef.current === ws) {
+          bridgeRef.current = null
+        }
+        setIsConnected(false)
+        if (disposed) return
+        setConnectionError(`ブリッジから切断されました (${event.code})。再接続を試行中...`)
+        reconnectTimeout = setTimeout(() => connectBridge(bridgeUrl), SYSTEM_CONFIG.pushServer.reconnectInterval)
+      }
+
+      ws.onerror = (error) => {
+        console.error('ブリッジ接続エラー:', error)
+      }
+    }
     
     const connectWebSocket = async () => {
       // 既に接続されている場合はスキップ
@@ -150,31 +283,14 @@ export function useWebSocket(url?: string, options?: WebSocketOptions): UseWebSo
           setConnectionError(`サーバーエラー: ${error.message || '不明なエラー'}`)
         })
 
-        // ログ受信（エラーハンドリング追加）
-        socket.on('log', (log: AgentLog) => {
-          try {
-            setLogs(prev => {
-              const updated = [...prev, log]
-              // 最新100件のみ保持
-              return updated.slice(-100)
-            })
-          } catch (error) {
-            console.error('ログ受信処理エラー:', error)
-          }
-        })
-
-        // エージェント状態受信（エラーハンドリング追加）
-        socket.on('agents', (agentList: AgentStatus[]) => {
-          try {
-            if (Array.isArray(agentList)) {
-              setAgents(agentList)
-            } else {
-              console.warn('無効なエージェント状態データを受信:', agentList)
-            }
-          } catch (error) {
-            console.error('エージェント状態受信処理エラー:', error)
-          }
-        })
+        // ログ・エージェント状態の受信（ブリッジに直接接続している場合はそちらで受け取る）
+        if (!SYSTEM_CONFIG.pushServer.url) {
+          socket.on('log', handleLog)
+          socket.on('agentsDelta', (delta: AgentStatusDelta) => {
+            handleAgentsDelta(delta, () => socket.emit('requestStatus'))
+          })
+          socket.on('agents', handleAgents)
+        }
 
         // システム状態更新
         socket.on('systemStatus', (status: any) => {
@@ -243,12 +359,20 @@ export function useWebSocket(url?: string, options?: WebSocketOptions): UseWebSo
       }
     }
 
-    // 初回接続
-    connectWebSocket()
+    // 初回接続（ブリッジのURLが設定されていればログ・エージェント状態はブリッジから直接受け取る）
+    if (SYSTEM_CONFIG.pushServer.url) {
+      connectBridge(SYSTEM_CONFIG.pushServer.url)
+      if (url && options) {
+        connectWebSocket()
+      }
+    } else {
+      connectWebSocket()
+    }
 
     // クリーンアップ
     return () => {
       console.log('WebSocket接続をクリーンアップします')
+      disposed = true
       
       if (reconnectTimeout) {
         clearTimeout(reconnectTimeout)
@@ -263,6 +387,11 @@ export function useWebSocket(url?: string, options?: WebSocketOptions): UseWebSo
         wsRef.current.close()
         wsRef.current = null
       }
+      
+      if (bridgeRef.current) {
+        bridgeRef.current.close()
+        bridgeRef.current = null
+      }
     }
   }, [])
 
@@ -297,6 +426,7 @@ export function useWebSocket(url?: string, options?: WebSocketOptions): UseWebSo
     agents,
     isConnected,
     connectionError,
-    sendMessage
+    sendMessage,
+    updateSubscription
   }
 }
\ No newline at end of file
@@ -0,0 +1,64 @@
+import fs from 'fs'
+import fsPromises from 'fs/promises'
+import path from 'path'
+
+// communication/durable.py と同じ形式のファイル操作
+
+/**
+ * 一時ファイルに書き込んでから rename で置き換える
+ * 読み手（Task Processor など）が書きかけのJSONを読むことはない
+ * 変更ジャーナルは更新しない（バージョンを進めるのは Python 側の atomic_write_json のみ）
+ * @param filePath 保存先
+ * @param data 保存するデータ
+ */
+export async function writeJsonAtomic(filePath: string, data: unknown): Promise<void> {
+  const dir = path.dirname(filePath)
+  const tempFile = path.join(dir, `.${path.basename(filePath)}.${process.pid}.${Date.now()}.tmp`)
+  const handle = await fsPromises.open(tempFile, 'w')
+  try {
+    await handle.writeFile(JSON.stringify(data, null, 2))
+    await handle.sync()
+  } finally {
+    await handle.close()
+  }
+  try {
+    await fsPromises.rename(tempFile, filePath)
+  } catch (error) {
+    await fsPromises.unlink(tempFile).catch(() => {})
+    throw error
+  }
+}
+
+/**
+ * 変更ジャーナル（<file>.journal）の最新バージョンを取得する
+ * ジャーナルがなければ 0
+ * @param filePath 対象ファイル
+ */
+export function readJournalVersion(filePath: string): number {
+  const journalFile = `${filePath}.journal`
+  let fd: number
+  try {
+    fd = fs.openSync(journalFile, 'r')
+  } catch {
+    return 0
+  }
+  try {
+    // 末尾だけを読む
+    const size = fs.fstatSync(fd).size
+    const length = Math.min(size, 4096)
+    const buffer = Buffer.alloc(length)
+    fs.readSync(fd, buffer, 0, length, size - length)
+    const lines = buffer.toString('utf-8').split('\n').reverse()
+    for (const line of lines) {
+      try {
+        const entry = JSON.parse(line)
+        if (typeof entry.version === 'number') return entry.version
+      } catch {
+        continue
+      }
+    }
+    return 0
+  } finally {
+    fs.closeSync(fd)
+  }
+}
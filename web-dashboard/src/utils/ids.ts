@@ -0,0 +1,103 @@
+import { randomBytes } from 'crypto'
+
+// communication/ids.py と同じ形式（ULID: 時刻順にソート可能な26文字のID）
+const ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+const TIME_LENGTH = 10
+const RANDOM_LENGTH = 16
+
+const HALF = 2 ** 40
+
+// 80bitの乱数部は40bitずつ2つの数値で保持する
+let lastTime = 0
+let lastRandomHigh = 0
+let lastRandomLow = 0
+
+function encode(value: number, length: number): string {
+  let result = ''
+  for (let i = 0; i < length; i++) {
+    result = ENCODING[value % 32] + result
+    value = Math.floor(value / 32)
+  }
+  return result
+}
+
+function random40(): number {
+  const bytes = randomBytes(5)
+  return bytes.readUIntBE(0, 5)
+}
+
+/**
+ * 時刻順に単調増加するメッセージIDを生成する
+ * @param prefix IDの接頭辞（例: 'msg-'）
+ */
+export function newId(prefix = ''): string {
+  const now = Date.now()
+  if (now > lastTime) {
+    lastTime = now
+    lastRandomHigh = random40()
+    lastRandomLow = random40()
+  } else {
+    // 同じミリ秒内では直前のIDより大きくする
+    lastRandomLow += 1
+    if (lastRandomLow >= HALF) {
+      lastRandomLow = 0
+      lastRandomHigh += 1
+      if (lastRandomHigh >= HALF) {
+        lastRandomHigh = 0
+        lastTime += 1
+      }
+    }
+  }
+  return prefix + encode(lastTime, TIME_LENGTH) +
+    encode(lastRandomHigh, RANDOM_LENGTH / 2) + encode(lastRandomLow, RANDOM_LENGTH / 2)
+}
+
+// ULID 以前の ID（task-<ミリ秒>-<乱数>、msg-<ミリ秒>）に含まれる生成時刻
+const LEGACY_TIME_PATTERN = /(?<!\d)(\d{13})(?!\d)/
+
+/**
+ * ID の生成時刻（ミリ秒）。末尾26文字が ULID ならその時刻、旧形式なら含まれる13桁の数字
+ * 時刻を含まない ID は 0
+ * @param id メッセージID
+ */
+export function idTime(id: string): number {
+  const body = id.slice(-(TIME_LENGTH + RANDOM_LENGTH))
+  if (body.length === TIME_LENGTH + RANDOM_LENGTH && [...body].every(char => ENCODING.includes(char))) {
+    let value = 0
+    for (const char of body.slice(0, TIME_LENGTH)) {
+      value = value * 32 + ENCODING.indexOf(char)
+    }
+    return value
+  }
+  const match = id.match(LEGACY_TIME_PATTERN)
+  return match ? Number(match[1]) : 0
+}
+
+/**
+ * 生成時刻順（同時刻は文字列順）の比較（communication/ids.py の sort_key と同じ順序）
+ * ULID と旧形式の ID が混在しても時刻順に並ぶ
+ */
+export function compareIds(a: string, b: string): number {
+  const diff = idTime(a) - idTime(b)
+  if (diff !== 0) return diff
+  return a < b ? -1 : a > b ? 1 : 0
+}
+
+/**
+ * compareIds 順の配列で cursor より後の要素の開始位置を二分探索で求める
+ * @param sorted compareIds でソート済みの配列
+ * @param cursor 最後に受け取ったID
+ */
+export function indexAfter(sorted: string[], cursor: string): number {
+  let low = 0
+  let high = sorted.length
+  while (low < high) {
+    const mid = (low + high) >> 1
+    if (compareIds(sorted[mid], cursor) <= 0) {
+      low = mid + 1
+    } else {
+      high = mid
+    }
+  }
+  return low
+}
@@ -0,0 +1,126 @@
+// エージェント状態の差分配信（communication/status_stream.py と同じ形式）
+// 例: { seq: 12, keyframe: false, added: [...], changed: [...], removed: ['id'] }
+//     { seq: 13, keyframe: true, agents: [...] }
+//     { seq: 15, fromSeq: 14, keyframe: false, ... }（ブリッジが送信待ちの差分をまとめたもの）
+import { AgentStatus } from '@/types/agent'
+
+export interface AgentStatusDelta {
+  seq: number
+  // まとめた差分の最初の連番（なければ seq）
+  fromSeq?: number
+  keyframe: boolean
+  agents?: AgentStatus[]
+  added?: AgentStatus[]
+  changed?: AgentStatus[]
+  removed?: string[]
+  changes?: number
+  timestamp?: string
+}
+
+// 変化しても差分として送らないフィールド（キーフレームで更新される）
+const VOLATILE_FIELDS = ['lastSeen']
+
+function stableStringify(value: any): string {
+  if (Array.isArray(value)) {
+    return '[' + value.map(stableStringify).join(',') + ']'
+  }
+  if (value && typeof value === 'object') {
+    return '{' + Object.keys(value).sort().map(key => JSON.stringify(key) + ':' + stableStringify(value[key])).join(',') + '}'
+  }
+  return JSON.stringify(value === undefined ? null : value)
+}
+
+/**
+ * 変化の比較用（VOLATILE_FIELDS を除いた内容）
+ */
+export function agentFingerprint(agent: AgentStatus): string {
+  const copy: any = {}
+  Object.keys(agent).forEach(key => {
+    if (VOLATILE_FIELDS.indexOf(key) === -1) {
+      copy[key] = (agent as any)[key]
+    }
+  })
+  return stableStringify(copy)
+}
+
+/**
+ * 最後に配信した状態を保持し、次に送るべき差分またはキーフレームを作る
+ */
+export class StatusDiffer {
+  private published: { [id: string]: string } = {}
+  private lastKeyframe = 0
+  seq = 0
+
+  constructor(private keyframeIntervalMs: number = 60000) {}
+
+  diff(agents: AgentStatus[], now: number = Date.now()): AgentStatusDelta | null {
+    const current: { [id: string]: string } = {}
+    const added: AgentStatus[] = []
+    const changed: AgentStatus[] = []
+    agents.forEach(agent => {
+      const fingerprint = agentFingerprint(agent)
+      current[agent.id] = fingerprint
+      if (!(agent.id in this.published)) {
+        added.push(agent)
+      } else if (this.published[agent.id] !== fingerprint) {
+        changed.push(agent)
+      }
+    })
+    const removed = Object.keys(this.published).filter(id => !(id in current))
+    const changes = added.length + changed.length + removed.length
+
+    const keyframeDue = !this.lastKeyframe || now - this.lastKeyframe >= this.keyframeIntervalMs
+    if (!changes && !keyframeDue) return null
+
+    this.seq += 1
+    this.published = current
+    if (keyframeDue) {
+      this.lastKeyframe = now
+      return { seq: this.seq, keyframe: true, agents, changes, timestamp: new Date(now).toISOString() }
+    }
+    return { seq: this.seq, keyframe: false, added, changed, removed, changes, timestamp: new Date(now).toISOString() }
+  }
+
+  /**
+   * 現在の連番での全体（接続時・再同期要求時に送る。連番は進めない）
+   */
+  keyframe(agents: AgentStatus[]): AgentStatusDelta {
+    return { seq: this.seq, keyframe: true, agents, changes: 0, timestamp: new Date().toISOString() }
+  }
+}
+
+/**
+ * 既に受け取ったキーフレームに含まれている差分か（接続直後に届く古い差分は捨てる）
+ */
+export function isStaleDelta(lastSeq: number | null, delta: AgentStatusDelta): boolean {
+  return !delta.keyframe && lastSeq !== null && delta.seq <= lastSeq
+}
+
+/**
+ * 差分を適用した一覧を返す。連番が飛んでいれば null（キーフレームを待つか再同期を要求する）
+ */
+export function applyStatusDelta(agents: AgentStatus[], lastSeq: number | null, delta: AgentStatusDelta): AgentStatus[] | null {
+  if (delta.keyframe) {
+    return delta.agents || []
+  }
+  const fromSeq = delta.fromSeq !== undefined ? delta.fromSeq : delta.seq
+  if (lastSeq === null || fromSeq !== lastSeq + 1) {
+    return null
+  }
+  const removed = delta.removed || []
+  const updates: { [id: string]: AgentStatus } = {}
+  ;(delta.changed || []).forEach(agent => { updates[agent.id] = agent })
+
+  const result = agents
+    .filter(agent => removed.indexOf(agent.id) === -1)
+    .map(agent => updates[agent.id] || agent)
+  ;(delta.added || []).forEach(agent => {
+    const index = result.findIndex(existing => existing.id === agent.id)
+    if (index === -1) {
+      result.push(agent)
+    } else {
+      result[index] = agent
+    }
+  })
+  return result
+}
@@ -0,0 +1,24 @@
+// communication/tracing.py がログ行の末尾に付けるトレース情報
+// 例: [2024-01-01T00:00:00] actor: Task result: ... [traceparent=00-<trace_id>-<span_id>-01]
+const TRACE_SUFFIX = /\s\[traceparent=00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}\]$/
+
+export interface TracedMessage {
+  message: string
+  traceId?: string
+  spanId?: string
+}
+
+/**
+ * ログメッセージからトレース情報を取り出し、表示用のメッセージと分ける
+ */
+export function splitTraceContext(message: string): TracedMessage {
+  const match = message.match(TRACE_SUFFIX)
+  if (!match) {
+    return { message }
+  }
+  return {
+    message: message.slice(0, match.index),
+    traceId: match[1],
+    spanId: match[2]
+  }
+}